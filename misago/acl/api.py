@@ -9,9 +9,11 @@ aware of their ACLs. This gives objects themselves special "acl" attribute with
 properties defined by ACL providers within their "add_acl_to_target"
 """
 import copy
+from collections import OrderedDict
+from time import time
 
 from misago.core import threadstore
-from misago.core.cache import cache
+from misago.core.cache import get_or_compute, set_computed
 
 from . import version
 from .builder import build_acl
@@ -23,36 +25,55 @@ def get_user_acl(user):
     acl_key = 'acl_%s' % user.acl_key
 
     acl_cache = threadstore.get(acl_key)
-    if not acl_cache:
-        acl_cache = cache.get(acl_key)
+    if not (acl_cache and is_acl_valid(acl_cache)):
+        acl_cache = get_or_compute(acl_key, lambda: _build_user_acl(user), is_valid=is_acl_valid)
+        threadstore.set(acl_key, acl_cache)
+    return acl_cache
 
-    if acl_cache and version.is_valid(acl_cache.get('_acl_version')):
-        return acl_cache
-    else:
-        new_acl = build_acl(user.get_roles())
-        new_acl['_acl_version'] = version.get_version()
 
-        threadstore.set(acl_key, new_acl)
-        cache.set(acl_key, new_acl)
+def is_acl_valid(acl_cache):
+    return version.is_valid(acl_cache.get('_acl_version'), acl_cache.get('_roles_versions'))
+
+
+def build_user_acl(user):
+    """build ACL for User and store it in cache"""
+    started_on = time()
+    new_acl = _build_user_acl(user)
+    set_computed('acl_%s' % user.acl_key, new_acl, time() - started_on)
+    return new_acl
+
+
+def _build_user_acl(user):
+    roles = user.get_roles()
+
+    # read versions before building so concurrent changes invalidate our ACL
+    acl_version = version.get_version()
+    roles_versions = version.get_roles_versions(roles)
 
-        return new_acl
+    new_acl = build_acl(roles)
+    new_acl['_acl_version'] = acl_version
+    new_acl['_roles_versions'] = roles_versions
+    return new_acl
 
 
 def add_acl(user, target):
     """add valid ACL to target (iterable of objects or single object)"""
     if hasattr(target, '__iter__'):
-        for item in target:
-            _add_acl_to_target(user, item)
+        _add_acl_to_targets(user, target)
     else:
-        _add_acl_to_target(user, target)
+        _add_acl_to_targets(user, [target])
 
 
-def _add_acl_to_target(user, target):
-    """add valid ACL to single target, helper for add_acl function"""
-    target.acl = {}
+def _add_acl_to_targets(user, targets):
+    """add valid ACL to list of targets, helper for add_acl function"""
+    targets_types = OrderedDict()
+    for target in targets:
+        target.acl = {}
+        targets_types.setdefault(target.__class__, []).append(target)
 
-    for annotator in providers.get_type_annotators(target):
-        annotator(user, target)
+    for type_targets in targets_types.values():
+        for annotator in providers.get_type_batch_annotators(type_targets[0]):
+            annotator(user, type_targets)
 
 
 def serialize_acl(target):
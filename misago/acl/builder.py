@@ -1,3 +1,7 @@
+import pickle
+from hashlib import md5
+
+from .matrix import ACLMatrix
 from .providers import providers
 
 
@@ -12,4 +16,26 @@ def build_acl(roles):
             message = '%s has to define build_acl function' % extension
             raise AttributeError(message)
 
+    return compile_acl(acl)
+
+
+def compile_acl(acl):
+    """
+    replace per-category permissions in ACL with compact ACL matrix and
+    sign ACL with checksum of its contents
+    """
+    if 'categories' in acl:
+        acl['categories'] = ACLMatrix(acl['categories'])
+    acl['_checksum'] = get_acl_checksum(acl)
     return acl
+
+
+def get_acl_checksum(acl):
+    """
+    returns checksum identifying ACL's contents
+
+    Values derived from ACL can be cached under its checksum, without having
+    to worry about ACL versions or ACLs overridden in tests
+    """
+    acl_contents = [(k, v) for k, v in sorted(acl.items()) if not k.startswith('_')]
+    return md5(pickle.dumps(acl_contents, 2)).hexdigest()
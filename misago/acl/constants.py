@@ -1 +1,2 @@
 ACL_CACHEBUSTER = 'misago_acl'
+ACL_ROLE_CACHEBUSTER = 'misago_acl_role_%s'
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from misago.acl.prewarm import prewarm_acls
+from misago.conf import settings
+
+
+class Command(BaseCommand):
+    help = "Rebuilds and caches ACLs for all roles combinations in use."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            dest='workers',
+            type=int,
+            default=settings.MISAGO_ACL_PREWARM_WORKERS,
+            help="Number of threads building ACLs.",
+        )
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+        acls_count = prewarm_acls(options['workers'])
+        total_time = time.time() - start_time
+
+        self.stdout.write('Prewarmed %s ACLs in %.2fs' % (acls_count, total_time))
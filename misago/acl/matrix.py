@@ -0,0 +1,171 @@
+"""
+Compact representation of per-object permissions in ACL
+
+Misago's ACL stores permissions for every category user has access to in
+"categories" key, as dicts of flags. Keeping those as dicts means that every
+flag name is repeated for every category in pickled ACL that lands in cache,
+and that whole structure has to be unpickled on every request, even if only
+few categories are read during it.
+
+ACLMatrix stores rows as tuples of values that are laid out in fixed order
+described by one of matrix's "layouts". Because most categories share same
+permissions, each distinct row is stored once and objects ids only point to
+it, which is why flags values have to be hashable. Rows are expanded into
+dicts lazily, on first access. To code using it, matrix behaves like regular
+dict of dicts.
+
+Values derived from matrix's rows can be memoized in matrix's "memo" dict.
+Memo is cleared whenever matrix or any of its rows changes, so expanded rows
+are ACLRow dicts that notify their matrix about changes.
+"""
+try:
+    from collections.abc import MutableMapping
+except ImportError:  # pragma: no cover
+    from collections import MutableMapping
+
+
+class ACLMatrix(MutableMapping):
+    def __init__(self, rows=None):
+        self._layouts = []
+        self._values = []
+        self._packed = {}
+        self._expanded = {}
+        self.memo = {}
+
+        if rows:
+            self._packed = pack_rows(self._layouts, self._values, rows)
+
+    def __getitem__(self, key):
+        try:
+            return self._expanded[key]
+        except KeyError:
+            packed_row = self._values[self._packed[key]]
+            row = ACLRow(self, zip(self._layouts[packed_row[0]], packed_row[1:]))
+            self._expanded[key] = row
+            return row
+
+    def __setitem__(self, key, value):
+        self._packed.pop(key, None)
+        self._expanded[key] = ACLRow(self, value)
+        self.memo.clear()
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+
+        self._packed.pop(key, None)
+        self._expanded.pop(key, None)
+        self.memo.clear()
+
+    def __contains__(self, key):
+        return key in self._expanded or key in self._packed
+
+    def __iter__(self):
+        for key in self._expanded:
+            yield key
+        for key in self._packed:
+            if key not in self._expanded:
+                yield key
+
+    def __len__(self):
+        return len(set(self._packed).union(self._expanded))
+
+    def __repr__(self):
+        return '<ACLMatrix: %s rows>' % len(self)
+
+    def __getstate__(self):
+        # pack rows that were expanded (and possibly changed) since unpickling
+        layouts = list(self._layouts)
+        values = list(self._values)
+        packed = dict(self._packed)
+        packed.update(pack_rows(layouts, values, self._expanded))
+
+        return {'layouts': layouts, 'values': values, 'rows': packed}
+
+    def __setstate__(self, state):
+        self._layouts = state['layouts']
+        self._values = state['values']
+        self._packed = state['rows']
+        self._expanded = {}
+        self.memo = {}
+
+    def __deepcopy__(self, memo):
+        # rows hold only immutable values, so state copy is deep enough
+        matrix = ACLMatrix.__new__(ACLMatrix)
+        matrix.__setstate__(self.__getstate__())
+        return matrix
+
+    def __copy__(self):
+        return self.__deepcopy__({})
+
+    def copy(self):
+        return self.__copy__()
+
+
+class ACLRow(dict):
+    """matrix row that clears matrix's memo when its changed"""
+    def __init__(self, matrix, *args, **kwargs):
+        super(ACLRow, self).__init__(*args, **kwargs)
+        self._matrix = matrix
+
+    def __setitem__(self, key, value):
+        super(ACLRow, self).__setitem__(key, value)
+        self._matrix.memo.clear()
+
+    def __delitem__(self, key):
+        super(ACLRow, self).__delitem__(key)
+        self._matrix.memo.clear()
+
+    def __reduce__(self):
+        # copies of row are plain dicts detached from matrix
+        return (dict, (dict(self), ))
+
+    def clear(self):
+        super(ACLRow, self).clear()
+        self._matrix.memo.clear()
+
+    def pop(self, *args):
+        value = super(ACLRow, self).pop(*args)
+        self._matrix.memo.clear()
+        return value
+
+    def popitem(self):
+        item = super(ACLRow, self).popitem()
+        self._matrix.memo.clear()
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        super(ACLRow, self).update(*args, **kwargs)
+        self._matrix.memo.clear()
+
+
+def pack_rows(layouts, values, rows):
+    """
+    pack dict of dicts into dict of indexes, appending to layouts and values
+
+    Row layouts are sorted flag names. Packed row's first item is index of
+    its layout within layouts list, and remaining items are flags values.
+    Packed rows are stored in values list, and are reused between keys.
+    """
+    layouts_index = {layout: i for i, layout in enumerate(layouts)}
+    values_index = {row: i for i, row in enumerate(values)}
+
+    packed_rows = {}
+    for key, row in rows.items():
+        layout = tuple(sorted(row))
+        if layout not in layouts_index:
+            layouts_index[layout] = len(layouts)
+            layouts.append(layout)
+
+        packed_row = (layouts_index[layout], ) + tuple(row[f] for f in layout)
+        if packed_row not in values_index:
+            values_index[packed_row] = len(values)
+            values.append(packed_row)
+
+        packed_rows[key] = values_index[packed_row]
+    return packed_rows
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from misago.acl.constants import ACL_ROLE_CACHEBUSTER
+from misago.core.migrationutils import cachebuster_register_cache, delete_cachebuster_cache
+
+
+def register_roles_version_trackers(apps, schema_editor):
+    Role = apps.get_model('misago_acl', 'Role')
+    for role_pk in Role.objects.values_list('pk', flat=True):
+        cachebuster_register_cache(apps, ACL_ROLE_CACHEBUSTER % role_pk)
+    delete_cachebuster_cache()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misago_acl', '0003_default_roles'),
+        ('misago_core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(register_roles_version_trackers),
+    ]
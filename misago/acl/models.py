@@ -23,13 +23,30 @@ class BaseRole(models.Model):
 
     def save(self, *args, **kwargs):
         if self.pk:
-            acl_version.invalidate()
+            self.invalidate_acl()
         return super(BaseRole, self).save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
-        acl_version.invalidate()
+        self.invalidate_acl()
         return super(BaseRole, self).delete(*args, **kwargs)
 
+    def invalidate_acl(self):
+        """invalidate ACLs affected by change to this role"""
+        acl_version.invalidate()
+
 
 class Role(BaseRole):
-    pass
+    def save(self, *args, **kwargs):
+        is_new = not self.pk
+        super(Role, self).save(*args, **kwargs)
+
+        if is_new:
+            acl_version.register_role(self.pk)
+
+    def delete(self, *args, **kwargs):
+        role_pk = self.pk
+        super(Role, self).delete(*args, **kwargs)
+        acl_version.unregister_role(role_pk)
+
+    def invalidate_acl(self):
+        acl_version.invalidate_roles([self])
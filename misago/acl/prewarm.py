@@ -0,0 +1,65 @@
+"""
+ACL prewarming
+
+Invalidating ACLs makes every user rebuild theirs on next request, which
+on busy forum means all workers running same queries at same moment.
+Prewarming rebuilds ACLs for all distinct ACL keys in use ahead of time and
+stores them in cache under new ACL version.
+"""
+from multiprocessing.pool import ThreadPool
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from misago.conf import settings
+
+from .api import build_user_acl
+
+
+def get_acl_keys_users():
+    """returns one user for every distinct ACL key in use, plus anonymous user"""
+    from misago.users.models import AnonymousUser
+
+    UserModel = get_user_model()
+
+    queryset = UserModel.objects.filter(acl_key__isnull=False)
+    queryset = queryset.order_by('acl_key', 'id').distinct('acl_key')
+
+    users = [AnonymousUser()]
+    users += list(queryset.select_related('rank'))
+    return users
+
+
+def prewarm_acls(workers=None):
+    """rebuilds ACLs for all ACL keys in use, returns number of ACLs built"""
+    if workers is None:
+        workers = settings.MISAGO_ACL_PREWARM_WORKERS
+
+    users = get_acl_keys_users()
+
+    if workers > 1:
+        pool = ThreadPool(min(workers, len(users)))
+        try:
+            pool.map(_prewarm_user_acl_in_thread, users)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for user in users:
+            build_user_acl(user)
+
+    return len(users)
+
+
+def _prewarm_user_acl_in_thread(user):
+    try:
+        build_user_acl(user)
+    finally:
+        # database connections are per-thread, don't leave them behind
+        connection.close()
+
+
+def prewarm_acls_on_invalidate():
+    """schedules ACLs prewarm after invalidation, if it was enabled in settings"""
+    if settings.MISAGO_ACL_PREWARM_ON_INVALIDATE:
+        transaction.on_commit(prewarm_acls)
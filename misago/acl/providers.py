@@ -12,12 +12,14 @@ class PermissionProviders(object):
         self._providers_dict = {}
 
         self._annotators = {}
+        self._batch_annotators = {}
         self._serializers = {}
 
     def _assert_providers_registered(self):
         if not self._initialized:
             self._register_providers()
             self._change_lists_to_tupes(self._annotators)
+            self._change_lists_to_tupes(self._batch_annotators)
             self._change_lists_to_tupes(self._serializers)
             self._initialized = True
 
@@ -36,6 +38,11 @@ class PermissionProviders(object):
     def acl_annotator(self, hashable_type, func):
         """registers ACL annotator for specified types"""
         self._annotators.setdefault(hashable_type, []).append(func)
+        self._batch_annotators.setdefault(hashable_type, []).append(batch_annotator(func))
+
+    def acl_batch_annotator(self, hashable_type, func):
+        """registers ACL annotator for lists of objects of specified types"""
+        self._batch_annotators.setdefault(hashable_type, []).append(func)
 
     def acl_serializer(self, hashable_type, func):
         """registers ACL serializer for specified types"""
@@ -45,6 +52,10 @@ class PermissionProviders(object):
         self._assert_providers_registered()
         return self._annotators.get(obj.__class__, [])
 
+    def get_type_batch_annotators(self, obj):
+        self._assert_providers_registered()
+        return self._batch_annotators.get(obj.__class__, [])
+
     def get_type_serializers(self, obj):
         self._assert_providers_registered()
         return self._serializers.get(obj.__class__, [])
@@ -58,4 +69,13 @@ class PermissionProviders(object):
         return self._providers_dict
 
 
+def batch_annotator(annotator):
+    """wraps annotator for single object so it can be called with list of objects"""
+    def annotate_items(user, items):
+        for item in items:
+            annotator(user, item)
+
+    return annotate_items
+
+
 providers = PermissionProviders()
@@ -2,6 +2,8 @@ from django.contrib.auth import get_user_model
 from django.test import TestCase
 
 from misago.acl.api import get_user_acl
+from misago.acl.builder import get_acl_checksum
+from misago.acl.matrix import ACLMatrix
 from misago.users.models import AnonymousUser
 
 
@@ -24,3 +26,16 @@ class GetUserACLTests(TestCase):
 
         self.assertTrue(acl)
         self.assertEqual(acl, AnonymousUser().acl_cache)
+
+    def test_categories_acl_is_compiled(self):
+        """categories permissions in ACL are compiled into matrix"""
+        acl = get_user_acl(AnonymousUser())
+
+        self.assertIsInstance(acl['categories'], ACLMatrix)
+        self.assertTrue(acl['categories'])
+
+    def test_acl_checksum(self):
+        """ACL is signed with checksum of its contents"""
+        acl = get_user_acl(AnonymousUser())
+
+        self.assertEqual(acl['_checksum'], get_acl_checksum(acl))
@@ -0,0 +1,193 @@
+import pickle
+from copy import deepcopy
+
+from django.test import TestCase
+
+from misago.acl.matrix import ACLMatrix
+from misago.threads.permissions import threads as threads_permissions
+from misago.threads.permissions.threads import get_effective_category_acl
+
+
+class MockUser(object):
+    is_authenticated = True
+
+    def __init__(self, categories_acl):
+        self.acl_cache = {'categories': categories_acl}
+
+
+def get_rows(categories=400):
+    rows = {}
+    for pk in range(1, categories + 1):
+        rows[pk] = {
+            'can_see': 1,
+            'can_browse': 1,
+            'can_see_all_threads': pk % 2,
+            'can_start_threads': 1,
+            'can_reply_threads': 1,
+            'can_edit_threads': pk % 3,
+            'can_edit_posts': 1,
+            'can_hide_own_threads': 0,
+            'can_hide_own_posts': 0,
+            'thread_edit_time': 0,
+            'post_edit_time': 0,
+            'can_hide_threads': 0,
+            'can_hide_posts': 0,
+            'can_protect_posts': 0,
+            'can_move_posts': 0,
+            'can_merge_posts': 0,
+            'can_pin_threads': 0,
+            'can_close_threads': 0,
+            'can_move_threads': 0,
+            'can_merge_threads': 0,
+            'can_report_content': 1,
+            'can_see_reports': 0,
+            'can_see_posts_likes': 2,
+            'can_like_posts': 1,
+            'can_approve_content': 0,
+            'require_threads_approval': 0,
+            'require_replies_approval': 0,
+            'require_edits_approval': 0,
+            'can_hide_events': 0,
+        }
+
+    # invisible category contents
+    rows[categories + 1] = {'can_see': 1, 'can_browse': 0}
+    return rows
+
+
+class ACLMatrixTests(TestCase):
+    def test_matrix_behaves_like_dict(self):
+        """matrix exposes same rows as dict it was created from"""
+        rows = get_rows(10)
+        matrix = ACLMatrix(rows)
+
+        self.assertEqual(len(matrix), len(rows))
+        self.assertEqual(sorted(matrix), sorted(rows))
+        self.assertEqual(dict(matrix), rows)
+
+        self.assertIn(1, matrix)
+        self.assertNotIn(1000, matrix)
+        self.assertEqual(matrix[1], rows[1])
+        self.assertEqual(matrix.get(11), {'can_see': 1, 'can_browse': 0})
+        self.assertEqual(matrix.get(1000, {'can_browse': False}), {'can_browse': False})
+
+        with self.assertRaises(KeyError):
+            matrix[1000]
+        with self.assertRaises(KeyError):
+            matrix[11]['can_start_threads']
+
+    def test_matrix_changes(self):
+        """matrix rows can be changed, added and deleted"""
+        matrix = ACLMatrix(get_rows(10))
+        matrix.memo['test'] = True
+
+        matrix[1]['can_see_all_threads'] = 5
+        self.assertEqual(matrix[1]['can_see_all_threads'], 5)
+
+        matrix[1000] = {'can_see': 1, 'can_browse': 1}
+        self.assertEqual(matrix[1000], {'can_see': 1, 'can_browse': 1})
+        self.assertEqual(len(matrix), 12)
+        self.assertEqual(matrix.memo, {})
+
+        del matrix[2]
+        self.assertNotIn(2, matrix)
+        self.assertEqual(len(matrix), 11)
+
+        with self.assertRaises(KeyError):
+            del matrix[2]
+
+    def test_row_changes_clear_memo(self):
+        """changing expanded row in place clears matrix's memo"""
+        matrix = ACLMatrix(get_rows(10))
+        user = MockUser(matrix)
+
+        self.assertEqual(get_effective_category_acl(user, 1)['can_see_all_threads'], 1)
+
+        matrix[1]['can_see_all_threads'] = 0
+        self.assertEqual(matrix.memo, {})
+        self.assertEqual(get_effective_category_acl(user, 1)['can_see_all_threads'], 0)
+
+        matrix[1].update({'can_see_all_threads': 1})
+        self.assertEqual(matrix.memo, {})
+        self.assertEqual(get_effective_category_acl(user, 1)['can_see_all_threads'], 1)
+
+        for mutate in (
+                lambda row: row.pop('can_like_posts'),
+                lambda row: row.setdefault('can_fly', 1),
+                lambda row: row.__delitem__('can_see_posts_likes'),
+                lambda row: row.clear(),
+        ):
+            get_effective_category_acl(user, 1)
+            mutate(matrix[1])
+            self.assertEqual(matrix.memo, {})
+
+    def test_row_copies_are_detached(self):
+        """copied rows are plain dicts that don't clear matrix's memo"""
+        matrix = ACLMatrix(get_rows(10))
+        matrix.memo['test'] = True
+
+        row_copy = deepcopy(matrix[1])
+        self.assertEqual(type(row_copy), dict)
+        self.assertEqual(row_copy, matrix[1])
+
+        row_copy['can_see_all_threads'] = 5
+        self.assertEqual(matrix.memo, {'test': True})
+
+    def test_matrix_pickling(self):
+        """matrix survives pickling and deep copying together with its changes"""
+        rows = get_rows(10)
+        matrix = ACLMatrix(rows)
+        matrix[1]['can_see_all_threads'] = 5
+        matrix[1000] = {'can_see': 1, 'can_browse': 1, 'can_fly': 1}
+        matrix.memo['test'] = True
+
+        rows[1]['can_see_all_threads'] = 5
+        rows[1000] = {'can_see': 1, 'can_browse': 1, 'can_fly': 1}
+
+        for copied_matrix in (pickle.loads(pickle.dumps(matrix)), deepcopy(matrix)):
+            self.assertIsNot(copied_matrix, matrix)
+            self.assertEqual(dict(copied_matrix), rows)
+            self.assertEqual(copied_matrix.memo, {})
+
+            copied_matrix[2]['can_see_all_threads'] = 5
+            self.assertNotEqual(matrix[2]['can_see_all_threads'], 5)
+
+    def test_matrix_payload_size(self):
+        """pickled matrix is smaller than pickled dict of dicts"""
+        rows = get_rows()
+
+        dict_payload = pickle.dumps(rows, pickle.HIGHEST_PROTOCOL)
+        matrix_payload = pickle.dumps(ACLMatrix(rows), pickle.HIGHEST_PROTOCOL)
+
+        self.assertLess(len(matrix_payload) * 4, len(dict_payload))
+
+
+class ACLMatrixMemoTests(TestCase):
+    """compares dict of dicts ACL with ACLMatrix on 400 categories"""
+    def count_builds(self, categories_acl):
+        """annotates categories 10 times, like ten lists displayed in one request"""
+        user = MockUser(categories_acl)
+        builds = []
+
+        build_effective_category_acl = threads_permissions.build_effective_category_acl
+
+        def counted_build_effective_category_acl(user, category_acl):
+            builds.append(True)
+            return build_effective_category_acl(user, category_acl)
+
+        threads_permissions.build_effective_category_acl = counted_build_effective_category_acl
+        try:
+            for _ in range(10):
+                for category_id in categories_acl:
+                    threads_permissions.get_effective_category_acl(user, category_id)
+        finally:
+            threads_permissions.build_effective_category_acl = build_effective_category_acl
+
+        return len(builds)
+
+    def test_effective_acls_are_memoized(self):
+        """matrix builds effective ACL once per category, dict of dicts builds it every time"""
+        rows = get_rows()
+
+        self.assertEqual(self.count_builds(rows), 4000)
+        self.assertEqual(self.count_builds(pickle.loads(pickle.dumps(ACLMatrix(rows)))), 400)
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils.six import StringIO
+
+from misago.acl import version
+from misago.acl.management.commands import prewarmacls
+from misago.acl.models import Role
+from misago.acl.prewarm import get_acl_keys_users, prewarm_acls
+from misago.core.cache import cache, get_computed
+from misago.core.testutils import MisagoTestCase
+
+
+UserModel = get_user_model()
+
+
+class PrewarmACLsTests(MisagoTestCase):
+    def setUp(self):
+        super(PrewarmACLsTests, self).setUp()
+
+        self.user = UserModel.objects.create_user('Bob', 'bob@bob.com', 'pass123')
+        self.other_user = UserModel.objects.create_user('Alice', 'alice@bob.com', 'pass123')
+
+        self.moderator = UserModel.objects.create_user('Mod', 'mod@bob.com', 'pass123')
+        self.moderator.roles.add(Role.objects.get(name="Moderator"))
+        self.moderator.update_acl_key()
+        self.moderator.save(update_fields=['acl_key'])
+
+    def test_get_acl_keys_users(self):
+        """get_acl_keys_users returns one user per acl key and anonymous"""
+        users = get_acl_keys_users()
+        acl_keys = [u.acl_key for u in users]
+
+        self.assertEqual(len(acl_keys), len(set(acl_keys)))
+        self.assertIn('anonymous', acl_keys)
+        self.assertIn(self.user.acl_key, acl_keys)
+        self.assertIn(self.moderator.acl_key, acl_keys)
+
+    def test_prewarm_acls(self):
+        """prewarm_acls caches ACLs under current version"""
+        version.invalidate()
+        cache.clear()
+
+        prewarmed = prewarm_acls(workers=1)
+        self.assertEqual(prewarmed, len(get_acl_keys_users()))
+
+        for acl_key in ('anonymous', self.user.acl_key, self.moderator.acl_key):
+            acl = get_computed('acl_%s' % acl_key)
+            self.assertTrue(acl)
+            self.assertTrue(version.is_valid(acl['_acl_version']))
+
+        # prewarmed acl is used by get_user_acl
+        self.assertEqual(self.other_user.acl_cache, get_computed('acl_%s' % self.user.acl_key))
+
+    def test_prewarmacls_command(self):
+        """command prewarms ACLs"""
+        command = prewarmacls.Command()
+
+        out = StringIO()
+        call_command(command, workers=1, stdout=out)
+
+        command_output = out.getvalue().splitlines()[-1].strip()
+        self.assertTrue(command_output.startswith('Prewarmed %s ACLs' % len(get_acl_keys_users())))
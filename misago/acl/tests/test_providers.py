@@ -72,6 +72,30 @@ class PermissionProvidersTests(TestCase):
         annotators_list = providers.get_type_annotators(TestType())
         self.assertEqual(annotators_list[0], mock_annotator)
 
+    def test_batch_annotators(self):
+        """its possible to register and get batch annotators"""
+        providers = PermissionProviders()
+
+        annotated_items = []
+
+        def mock_annotator(user, item):
+            annotated_items.append(item)
+
+        def mock_batch_annotator(*args):
+            pass
+
+        providers.acl_annotator(TestType, mock_annotator)
+        providers.acl_batch_annotator(TestType, mock_batch_annotator)
+
+        annotators_list = providers.get_type_batch_annotators(TestType())
+        self.assertEqual(len(annotators_list), 2)
+        self.assertEqual(annotators_list[1], mock_batch_annotator)
+
+        # annotators for single items are called for every item on list
+        items = [TestType(), TestType()]
+        annotators_list[0](None, items)
+        self.assertEqual(annotated_items, items)
+
     def test_serializers(self):
         """its possible to register and get annotators"""
         providers = PermissionProviders()
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from misago.acl import version
+from misago.acl.api import get_user_acl
+from misago.acl.models import Role
+from misago.core import threadstore
+from misago.users.models import AnonymousUser
+
+
+UserModel = get_user_model()
+
+
+class ACLVersionTests(TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user('Bob', 'bob@bob.com', 'pass123')
+        self.anonymous_user = AnonymousUser()
+
+        self.user_acl = get_user_acl(self.user)
+        self.anonymous_acl = get_user_acl(self.anonymous_user)
+
+        threadstore.clear()
+
+    def tearDown(self):
+        threadstore.clear()
+
+    def test_roles_are_tracked(self):
+        """ACL stores versions of roles it was built from"""
+        roles_versions = self.user_acl['_roles_versions']
+
+        self.assertEqual(sorted(roles_versions), sorted(r.pk for r in self.user.get_roles()))
+        for role_pk, role_version in roles_versions.items():
+            self.assertEqual(version.get_role_version(role_pk), role_version)
+
+    def test_invalidate_roles(self):
+        """invalidate_roles only invalidates ACLs built from changed roles"""
+        member_role = Role.objects.get(special_role='authenticated')
+        version.invalidate_roles([member_role])
+
+        self.assertTrue(version.is_valid(
+            self.anonymous_acl['_acl_version'], self.anonymous_acl['_roles_versions']))
+        self.assertFalse(version.is_valid(
+            self.user_acl['_acl_version'], self.user_acl['_roles_versions']))
+
+        self.assertEqual(get_user_acl(self.anonymous_user), self.anonymous_acl)
+
+        new_user_acl = get_user_acl(self.user)
+        self.assertNotEqual(new_user_acl['_roles_versions'], self.user_acl['_roles_versions'])
+
+    def test_role_save_invalidates_role(self):
+        """changing role invalidates ACLs built from it"""
+        member_role = Role.objects.get(special_role='authenticated')
+        member_role.save()
+
+        self.assertTrue(version.is_valid(
+            self.anonymous_acl['_acl_version'], self.anonymous_acl['_roles_versions']))
+        self.assertFalse(version.is_valid(
+            self.user_acl['_acl_version'], self.user_acl['_roles_versions']))
+
+    def test_new_role_is_tracked(self):
+        """new roles get their version trackers, deleted roles lose them"""
+        role = Role.objects.create(name="Test Role")
+        self.assertEqual(version.get_role_version(role.pk), 0)
+
+        role_pk = role.pk
+        role.delete()
+        self.assertIsNone(version.get_role_version(role_pk))
+
+    def test_invalidate(self):
+        """invalidate invalidates all ACLs"""
+        version.invalidate()
+
+        self.assertFalse(version.is_valid(
+            self.anonymous_acl['_acl_version'], self.anonymous_acl['_roles_versions']))
+        self.assertFalse(version.is_valid(
+            self.user_acl['_acl_version'], self.user_acl['_roles_versions']))
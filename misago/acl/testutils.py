@@ -3,6 +3,7 @@ from hashlib import md5
 
 from misago.core import threadstore
 
+from .builder import compile_acl
 from .forms import get_permissions_forms
 
 
@@ -27,6 +28,7 @@ def override_acl(user, new_acl):
     """overrides user permissions with specified ones"""
     final_cache = deepcopy(user.acl_cache)
     final_cache.update(new_acl)
+    compile_acl(final_cache)
 
     if user.is_authenticated:
         user._acl_cache = final_cache
@@ -1,15 +1,74 @@
+"""
+ACL versioning
+
+ACLs are versioned with global ACL version that changes together with
+categories tree, and with versions of roles ACL was built from. Changes to
+roles permissions only invalidate ACLs that include changed roles.
+"""
 from misago.core import cachebuster
 
-from .constants import ACL_CACHEBUSTER
+from .constants import ACL_CACHEBUSTER, ACL_ROLE_CACHEBUSTER
 
 
 def get_version():
     return cachebuster.get_version(ACL_CACHEBUSTER)
 
 
-def is_valid(version):
-    return cachebuster.is_valid(ACL_CACHEBUSTER, version)
+def get_roles_versions(roles):
+    roles_versions = {}
+    for role in roles:
+        roles_versions[role.pk] = get_role_version(role.pk)
+    return roles_versions
+
+
+def get_role_version(role_pk):
+    try:
+        return cachebuster.get_version(ACL_ROLE_CACHEBUSTER % role_pk)
+    except ValueError:
+        return None  # role is not tracked yet
+
+
+def is_valid(version, roles_versions=None):
+    if not cachebuster.is_valid(ACL_CACHEBUSTER, version):
+        return False
+
+    for role_pk, role_version in (roles_versions or {}).items():
+        if get_role_version(role_pk) != role_version:
+            return False
+
+    return True
 
 
 def invalidate():
     cachebuster.invalidate(ACL_CACHEBUSTER)
+
+    from .prewarm import prewarm_acls_on_invalidate
+    prewarm_acls_on_invalidate()
+
+
+def invalidate_roles(roles):
+    """invalidates only ACLs that were built from specified roles or roles ids"""
+    untracked_roles = False
+    for role in roles:
+        role_pk = getattr(role, 'pk', role)
+        if get_role_version(role_pk) is None:
+            register_role(role_pk)
+            untracked_roles = True
+        else:
+            cachebuster.invalidate(ACL_ROLE_CACHEBUSTER % role_pk)
+
+    if untracked_roles:
+        # we can't tell which ACLs were built from untracked roles
+        invalidate()
+    else:
+        from .prewarm import prewarm_acls_on_invalidate
+        prewarm_acls_on_invalidate()
+
+
+def register_role(role_pk):
+    cachebuster.register(ACL_ROLE_CACHEBUSTER % role_pk)
+
+
+def unregister_role(role_pk):
+    if get_role_version(role_pk) is not None:
+        cachebuster.unregister(ACL_ROLE_CACHEBUSTER % role_pk)
@@ -0,0 +1,76 @@
+"""
+Categories subtree aggregates
+
+Categories list displays categories with counters and last thread of their
+whole subtrees. Those aggregates are computed for all categories at once
+and kept in cache until counters or last thread of any category change.
+
+Aggregates are only valid for users that can see and browse all categories
+in subtree. For other users get_categories_tree aggregates visible part of
+the subtree itself, using merge_stats like compute_categories_aggregates.
+"""
+from misago.core.cache import get_or_compute, shared_cache
+
+from . import THREADS_ROOT_NAME
+from .models import Category
+from .synchronization import LAST_THREAD_FIELDS, get_empty_stats
+from .tree import STATS_FIELDS, get_tree_index
+
+
+AGGREGATES_CACHE = 'misago_categories_aggregates'
+AGGREGATES_TIMEOUT = 60
+
+
+def merge_stats(stats, child_stats):
+    """adds child's counters to stats, and replaces last thread if child's is newer"""
+    stats['threads'] += child_stats['threads']
+    stats['posts'] += child_stats['posts']
+
+    if child_stats['last_post_on'] and (
+            not stats['last_post_on'] or stats['last_post_on'] < child_stats['last_post_on']):
+        for field, _ in LAST_THREAD_FIELDS:
+            stats[field] = child_stats[field]
+
+
+def get_categories_aggregates():
+    """
+    returns dict of categories ids and dicts with their own ("category")
+    and whole subtree's ("subtree") counters and last thread
+    """
+    return get_or_compute(
+        AGGREGATES_CACHE,
+        compute_categories_aggregates,
+        timeout=AGGREGATES_TIMEOUT,
+        backend=shared_cache,
+    )
+
+
+def compute_categories_aggregates():
+    tree_index = get_tree_index()
+    root_id = tree_index.get_special_id(THREADS_ROOT_NAME)
+    if root_id is None:
+        return {}
+
+    categories_ids = tree_index.get_descendants_ids(root_id, include_self=True)
+
+    categories_stats = {}
+    queryset = Category.objects.filter(pk__in=categories_ids)
+    for row in queryset.values('pk', *STATS_FIELDS):
+        categories_stats[row.pop('pk')] = row
+
+    aggregates = {}
+    for pk in reversed(categories_ids):
+        category_stats = categories_stats.get(pk) or get_empty_stats()
+        subtree_stats = category_stats.copy()
+        for child_id in reversed(tree_index.get_children_ids(pk)):
+            merge_stats(subtree_stats, aggregates[child_id]['subtree'])
+
+        aggregates[pk] = {
+            'category': category_stats,
+            'subtree': subtree_stats,
+        }
+    return aggregates
+
+
+def invalidate_categories_aggregates():
+    shared_cache.delete(AGGREGATES_CACHE)
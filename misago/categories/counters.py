@@ -0,0 +1,191 @@
+"""
+Deferred categories counters
+
+Posting doesn't update category's row, because that would make all posts
+in category wait for each other on that row's lock. Instead it records
+CategoryDelta with numbers of new threads and posts and thread that was
+posted in, and those deltas are folded into categories later:
+
+- lazily, by readers of categories counters, if deltas were recorded since
+  last fold and no other process is folding them at the moment
+- by synchronization of categories, which discards deltas that were
+  recorded before it counted threads and posts in category
+
+Folds and synchronizations lock rows of categories before they touch their
+deltas, so they never run for same category at same time.
+
+Only categories list and categories API (misago.categories.utils
+get_categories_tree) fold deltas before they read counters. Other readers
+of categories counters and last threads, like categories in threads lists
+and thread's API responses, categories from categories tree index or admin
+categories list, may be behind by deltas recorded since last fold.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+
+from misago.core.cache import shared_cache
+from misago.threads.models import Thread
+
+from .models import Category, CategoryDelta
+
+
+PENDING_CACHE = 'misago_categories_deltas'
+FOLD_LOCK_CACHE = 'misago_categories_deltas_lock'
+FOLD_LOCK_TIMEOUT = 30
+
+
+def record_delta(category, thread=None, threads=0, posts=0):
+    CategoryDelta.objects.create(
+        category=category,
+        threads=threads,
+        posts=posts,
+        last_thread=thread,
+        last_post_on=thread.last_post_on if thread else None,
+    )
+
+    # flag deltas as pending only after they are visible to other processes
+    transaction.on_commit(mark_pending)
+
+
+def mark_pending():
+    shared_cache.set(PENDING_CACHE, True, None)
+
+
+def lock_categories(categories_ids):
+    """
+    locks rows of categories until end of current transaction
+
+    Rows are locked in order of their ids to avoid deadlocks. Returns ids of
+    locked categories.
+    """
+    queryset = Category.objects.select_for_update().filter(pk__in=categories_ids)
+    return list(queryset.order_by('pk').values_list('pk', flat=True))
+
+
+def discard_deltas(deltas_ids):
+    """discards deltas that were counted by synchronization of categories"""
+    if deltas_ids:
+        CategoryDelta.objects.filter(pk__in=deltas_ids).delete()
+
+
+def fold_pending_deltas():
+    """
+    folds deltas if any were recorded since last fold
+
+    returns False if there was nothing to fold or other process is folding
+    deltas already
+    """
+    if not shared_cache.get(PENDING_CACHE):
+        return False
+    if not shared_cache.add(FOLD_LOCK_CACHE, True, FOLD_LOCK_TIMEOUT):
+        return False
+
+    try:
+        # deltas committed from now on will flag themselves as pending again
+        shared_cache.delete(PENDING_CACHE)
+        fold_deltas()
+    finally:
+        shared_cache.delete(FOLD_LOCK_CACHE)
+    return True
+
+
+def fold_deltas(categories_ids=None):
+    """folds deltas into categories, returns number of updated categories"""
+    from .aggregates import invalidate_categories_aggregates
+
+    with transaction.atomic():
+        queryset = CategoryDelta.objects.order_by()
+        if categories_ids is not None:
+            queryset = queryset.filter(category_id__in=categories_ids)
+
+        categories_ids = set(queryset.values_list('category_id', flat=True).distinct())
+        if not categories_ids:
+            return 0
+
+        # deltas of categories synchronized while we waited for lock are gone now
+        queryset = CategoryDelta.objects.select_for_update().filter(
+            category_id__in=lock_categories(categories_ids),
+        ).order_by('pk')
+
+        deltas = list(
+            queryset.values(
+                'pk',
+                'category_id',
+                'threads',
+                'posts',
+                'last_thread_id',
+                'last_post_on',
+            )
+        )
+        if not deltas:
+            return 0
+
+        categories_deltas = {}
+        for delta in deltas:
+            category_delta = categories_deltas.setdefault(delta['category_id'], {
+                'threads': 0,
+                'posts': 0,
+                'last_thread_id': None,
+                'last_post_on': None,
+            })
+
+            category_delta['threads'] += delta['threads']
+            category_delta['posts'] += delta['posts']
+
+            if delta['last_thread_id'] and (
+                    not category_delta['last_post_on'] or
+                    category_delta['last_post_on'] <= delta['last_post_on']):
+                category_delta['last_thread_id'] = delta['last_thread_id']
+                category_delta['last_post_on'] = delta['last_post_on']
+
+        last_threads = get_last_threads(categories_deltas.values())
+
+        for category_id, category_delta in categories_deltas.items():
+            update_category(category_id, category_delta, last_threads)
+
+        CategoryDelta.objects.filter(pk__in=[delta['pk'] for delta in deltas]).delete()
+
+    invalidate_categories_aggregates()
+    return len(categories_deltas)
+
+
+def get_last_threads(categories_deltas):
+    threads_ids = [d['last_thread_id'] for d in categories_deltas if d['last_thread_id']]
+    if not threads_ids:
+        return {}
+
+    queryset = Thread.objects.filter(pk__in=threads_ids).values(
+        'id',
+        'category_id',
+        'title',
+        'slug',
+        'last_post_on',
+        'last_poster_id',
+        'last_poster_name',
+        'last_poster_slug',
+    )
+    return dict((thread['id'], thread) for thread in queryset)
+
+
+def update_category(category_id, category_delta, last_threads):
+    if category_delta['threads'] or category_delta['posts']:
+        Category.objects.filter(pk=category_id).update(
+            threads=F('threads') + category_delta['threads'],
+            posts=F('posts') + category_delta['posts'],
+        )
+
+    thread = last_threads.get(category_delta['last_thread_id'])
+    if thread and thread['category_id'] == category_id:
+        # don't replace category's last thread if newer one was set on it since
+        older_last_post = (
+            Q(last_post_on__isnull=True) | Q(last_post_on__lte=thread['last_post_on'])
+        )
+        Category.objects.filter(older_last_post, pk=category_id).update(
+            last_post_on=thread['last_post_on'],
+            last_thread_id=thread['id'],
+            last_thread_title=thread['title'],
+            last_thread_slug=thread['slug'],
+            last_poster_id=thread['last_poster_id'],
+            last_poster_name=thread['last_poster_name'],
+            last_poster_slug=thread['last_poster_slug'],
+        )
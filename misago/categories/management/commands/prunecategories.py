@@ -1,58 +1,118 @@
-from datetime import timedelta
+import time
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
-from misago.categories.models import Category
+from misago.categories.pruning import (
+    count_posts, delete_threads, get_prunable_threads, get_pruned_categories, get_threads_chunks,
+    move_threads)
+from misago.categories.synchronization import synchronize_categories
+from misago.core.cache import shared_cache
+
+
+CHECKPOINT_CACHE = 'misago_prunecategories_checkpoint'
 
 
 class Command(BaseCommand):
     """
     This command is intended to work as CRON job fired
     every few days (or more often) to execute categories pruning policies
+
+    If run with time limit, command stops after chunk during which limit
+    was reached, and remembers category and thread it has stopped on.
+    Next run resumes pruning from there.
     """
     help = 'Prunes categories'
 
+    CHUNK_SIZE = 100
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            dest='dry_run',
+            action='store_true',
+            default=False,
+            help="Count threads that would be pruned without pruning them.",
+        )
+        parser.add_argument(
+            '--time-limit',
+            dest='time_limit',
+            type=int,
+            default=0,
+            help="Stop pruning after given number of seconds.",
+        )
+
     def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        time_limit = options['time_limit']
+
         now = timezone.now()
-        synchronize_categories = []
+        start_time = time.time()
+
+        if dry_run:
+            checkpoint = None
+        else:
+            checkpoint = shared_cache.get(CHECKPOINT_CACHE)
+
+        categories_to_sync = set()
+        pruned_threads = 0
+        pruned_posts = 0
+        is_completed = True
 
-        for category in Category.objects.iterator():
+        categories = get_pruned_categories()
+        if checkpoint:
+            categories = categories.filter(pk__gte=checkpoint[0])
+
+        for category in categories.iterator():
             archive = category.archive_pruned_in
-            pruned_threads = 0
 
-            threads_qs = category.thread_set.filter(weight=0)
+            resume_from = None
+            if checkpoint and checkpoint[0] == category.pk:
+                resume_from = checkpoint[1]
+
+            threads_queryset = get_prunable_threads(category, now)
+            for chunk in get_threads_chunks(threads_queryset, self.CHUNK_SIZE, resume_from):
+                pruned_threads += len(chunk)
+                pruned_posts += count_posts(chunk)
 
-            if category.prune_started_after:
-                cutoff = now - timedelta(days=category.prune_started_after)
-                prune_qs = threads_qs.filter(started_on__lte=cutoff)
-                for thread in prune_qs.iterator():
+                if not dry_run:
                     if archive:
-                        thread.move(archive)
-                        thread.save()
+                        move_threads(chunk, archive)
                     else:
-                        thread.delete()
-                    pruned_threads += 1
+                        delete_threads(chunk)
 
-            if category.prune_replied_after:
-                cutoff = now - timedelta(days=category.prune_replied_after)
-                prune_qs = threads_qs.filter(last_post_on__lte=cutoff)
-                for thread in prune_qs.iterator():
+                    categories_to_sync.add(category.pk)
                     if archive:
-                        thread.move(archive)
-                        thread.save()
-                    else:
-                        thread.delete()
-                    pruned_threads += 1
+                        categories_to_sync.add(archive.pk)
+
+                if time_limit and time.time() - start_time >= time_limit:
+                    if not dry_run:
+                        shared_cache.set(CHECKPOINT_CACHE, (category.pk, chunk[-1]), None)
+                    is_completed = False
+                    break
+
+            if not is_completed:
+                break
+
+        if is_completed and checkpoint:
+            shared_cache.delete(CHECKPOINT_CACHE)
+
+        if categories_to_sync:
+            synchronize_categories(categories_to_sync)
 
-            if pruned_threads:
-                if category not in synchronize_categories:
-                    synchronize_categories.append(category)
-                if archive and archive not in synchronize_categories:
-                    synchronize_categories.append(archive)
+        total_time = time.time() - start_time
+        if dry_run:
+            message = '%s threads (%s posts) would be pruned'
+        else:
+            message = 'Pruned %s threads (%s posts)'
+        message += ' in %.2fs (%.1f threads/s)'
 
-        for category in synchronize_categories:
-            category.synchronize()
-            category.save()
+        throughput = pruned_threads / total_time if total_time else 0
+        self.stdout.write(message % (pruned_threads, pruned_posts, total_time, throughput))
 
-        self.stdout.write('\n\nCategories were pruned')
+        if not is_completed:
+            self.stdout.write('\n\nTime limit was reached, pruning will resume on next run')
+        elif dry_run:
+            self.stdout.write('\n\nCategories were not pruned')
+        else:
+            self.stdout.write('\n\nCategories were pruned')
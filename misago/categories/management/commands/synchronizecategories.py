@@ -1,14 +1,18 @@
 from django.core.management.base import BaseCommand
 
 from misago.categories.models import Category
+from misago.categories.synchronization import synchronize_categories
 from misago.core.management.progressbar import show_progress
 
 
 class Command(BaseCommand):
     help = 'Synchronizes categories'
 
+    CHUNK_SIZE = 100
+
     def handle(self, *args, **options):
-        categories_to_sync = Category.objects.count()
+        categories_ids = list(Category.objects.order_by('pk').values_list('pk', flat=True))
+        categories_to_sync = len(categories_ids)
 
         message = 'Synchronizing %s categories...\n'
         self.stdout.write(message % categories_to_sync)
@@ -17,11 +21,9 @@ class Command(BaseCommand):
 
         synchronized_count = 0
         show_progress(self, synchronized_count, categories_to_sync)
-        for category in Category.objects.iterator():
-            category.synchronize()
-            category.save()
-
-            synchronized_count += 1
+        for chunk_start in range(0, categories_to_sync, self.CHUNK_SIZE):
+            chunk = categories_ids[chunk_start:chunk_start + self.CHUNK_SIZE]
+            synchronized_count += synchronize_categories(chunk)
             show_progress(self, synchronized_count, categories_to_sync)
 
         self.stdout.write(message % synchronized_count)
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from misago.categories.tree import CATEGORIES_CACHEBUSTER
+from misago.core.migrationutils import cachebuster_register_cache
+
+
+def register_categories_version_tracker(apps, schema_editor):
+    cachebuster_register_cache(apps, CATEGORIES_CACHEBUSTER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misago_categories', '0006_moderation_queue_roles'),
+        ('misago_core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(register_categories_version_tracker),
+    ]
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misago_threads', '0001_initial'),
+        ('misago_categories', '0007_categories_version_tracker'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryDelta',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        verbose_name='ID', serialize=False, auto_created=True, primary_key=True
+                    )
+                ),
+                ('threads', models.IntegerField(default=0)),
+                ('posts', models.IntegerField(default=0)),
+                ('last_post_on', models.DateTimeField(null=True, blank=True)),
+                (
+                    'category',
+                    models.ForeignKey(
+                        related_name='+',
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='misago_categories.Category'
+                    )
+                ),
+                (
+                    'last_thread',
+                    models.ForeignKey(
+                        related_name='+',
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        blank=True,
+                        null=True,
+                        to='misago_threads.Thread'
+                    )
+                ),
+            ],
+        ),
+    ]
@@ -1,14 +1,14 @@
 from mptt.managers import TreeManager
 from mptt.models import MPTTModel, TreeForeignKey
 
-from django.db import models
+from django.db import models, transaction
 from django.utils import six
 from django.utils.encoding import python_2_unicode_compatible
 
 from misago.acl import version as acl_version
 from misago.acl.models import BaseRole
 from misago.conf import settings
-from misago.core.cache import cache
+from misago.core.cache import get_or_compute, shared_cache
 from misago.core.utils import slugify
 from misago.threads.threadtypes import trees_map
 
@@ -28,11 +28,7 @@ class CategoryManager(TreeManager):
     def get_special(self, special_role):
         cache_name = '%s_%s' % (CACHE_NAME, special_role)
 
-        special_category = cache.get(cache_name, 'nada')
-        if special_category == 'nada':
-            special_category = self.get(special_role=special_role)
-            cache.set(cache_name, special_category)
-        return special_category
+        return get_or_compute(cache_name, lambda: self.get(special_role=special_role))
 
     def all_categories(self, include_root=False):
         tree_id = trees_map.get_tree_id_for_root(THREADS_ROOT_NAME)
@@ -42,11 +38,8 @@ class CategoryManager(TreeManager):
         return queryset.order_by('lft')
 
     def get_cached_categories_dict(self):
-        categories_dict = cache.get(CACHE_NAME, 'nada')
-        if categories_dict == 'nada':
-            categories_dict = self.get_categories_dict_from_db()
-            cache.set(CACHE_NAME, categories_dict)
-        return categories_dict
+        return get_or_compute(
+            CACHE_NAME, self.get_categories_dict_from_db, backend=shared_cache)
 
     def get_categories_dict_from_db(self):
         categories_dict = {}
@@ -55,7 +48,12 @@ class CategoryManager(TreeManager):
         return categories_dict
 
     def clear_cache(self):
-        cache.delete(CACHE_NAME)
+        from .aggregates import invalidate_categories_aggregates
+        from .tree import invalidate_tree_index
+
+        shared_cache.delete(CACHE_NAME)
+        invalidate_tree_index()
+        invalidate_categories_aggregates()
 
 
 @python_2_unicode_compatible
@@ -121,17 +119,26 @@ class Category(MPTTModel):
         return super(Category, self).delete(*args, **kwargs)
 
     def synchronize(self):
-        threads_queryset = self.thread_set.filter(is_hidden=False, is_unapproved=False)
-        self.threads = threads_queryset.count()
+        """
+        recomputes category's counters and last thread
 
-        if self.threads:
-            replies_sum = threads_queryset.aggregate(models.Sum('replies'))
-            self.posts = self.threads + replies_sum['replies__sum']
-        else:
-            self.posts = 0
+        Category's row is locked until end of current transaction, so
+        category should be synchronized and saved in same transaction, or
+        deltas folded before it's saved may be lost.
+        """
+        from .counters import discard_deltas, lock_categories
+        from .synchronization import get_categories_counters
+
+        with transaction.atomic():
+            lock_categories([self.pk])
+            categories_counters, counted_deltas = get_categories_counters([self.pk])
+            discard_deltas(counted_deltas)
+
+        self.threads = categories_counters[self.pk]['threads']
+        self.posts = categories_counters[self.pk]['posts']
 
         if self.threads:
-            last_thread_qs = threads_queryset.filter(is_hidden=False, is_unapproved=False)
+            last_thread_qs = self.thread_set.filter(is_hidden=False, is_unapproved=False)
             last_thread = last_thread_qs.order_by('-last_post_on')[:1][0]
             self.set_last_thread(last_thread)
         else:
@@ -183,8 +190,26 @@ class Category(MPTTModel):
         return child.lft > self.lft and child.rght < self.rght
 
 
+class CategoryDelta(models.Model):
+    """change to category's counters and last thread that wasn't folded into category yet"""
+    category = models.ForeignKey(Category, related_name='+', on_delete=models.CASCADE)
+    threads = models.IntegerField(default=0)
+    posts = models.IntegerField(default=0)
+    last_thread = models.ForeignKey(
+        'misago_threads.Thread',
+        related_name='+',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+    last_post_on = models.DateTimeField(null=True, blank=True)
+
+
 class CategoryRole(BaseRole):
-    pass
+    def invalidate_acl(self):
+        # only ACLs for roles using this role in any category are affected
+        roles = RoleCategoryACL.objects.filter(category_role=self)
+        acl_version.invalidate_roles(set(roles.values_list('role_id', flat=True)))
 
 
 class RoleCategoryACL(models.Model):
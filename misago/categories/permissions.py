@@ -85,9 +85,15 @@ def build_category_acl(acl, category, categories_roles, key_name):
             acl['browseable_categories'].append(category.pk)
 
 
-def add_acl_to_category(user, target):
-    target.acl['can_see'] = can_see_category(user, target)
-    target.acl['can_browse'] = can_browse_category(user, target)
+def add_acl_to_categories(user, categories):
+    visible_categories = set(user.acl_cache['visible_categories'])
+    categories_acl = user.acl_cache['categories']
+
+    for category in categories:
+        category_acl = categories_acl.get(category.pk, {'can_browse': False})
+
+        category.acl['can_see'] = category.pk in visible_categories
+        category.acl['can_browse'] = bool(category_acl['can_browse'])
 
 
 def serialize_categories_alcs(serialized_acl):
@@ -106,7 +112,7 @@ def serialize_categories_alcs(serialized_acl):
 
 
 def register_with(registry):
-    registry.acl_annotator(Category, add_acl_to_category)
+    registry.acl_batch_annotator(Category, add_acl_to_categories)
 
     registry.acl_serializer(get_user_model(), serialize_categories_alcs)
     registry.acl_serializer(AnonymousUser, serialize_categories_alcs)
@@ -0,0 +1,112 @@
+"""
+Categories pruning
+
+Pruned threads are selected in chunks ordered by their ids, and each chunk
+is deleted or moved to archive category with set-based queries, instead of
+calling Thread.delete or Thread.move for every thread. Those queries do what
+receivers of delete_thread and move_thread signals would, but for whole chunk
+at once. Because chunks are ordered by ids, pruning can be stopped after any
+chunk and resumed later from last pruned thread.
+
+Deleted rows are removed with plain DELETE queries that skip Django's
+deletion collector and post_delete signals, so number of queries run for
+chunk doesn't depend on number of posts in its threads. Caches that those
+signals would invalidate are invalidated once for whole chunk instead.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from misago.core.counts import invalidate_counts
+from misago.readtracker.models import ThreadRead
+from misago.threads.models import (
+    Attachment, Poll, PollVote, Post, PostEdit, PostLike, Subscription, Thread,
+    ThreadParticipant)
+from misago.threads.postspages import invalidate_posts_pages
+
+from .models import Category, CategoryDelta
+
+
+def get_pruned_categories():
+    queryset = Category.objects.filter(
+        Q(prune_started_after__gt=0) | Q(prune_replied_after__gt=0),
+    )
+    return queryset.order_by('pk')
+
+
+def get_prunable_threads(category, now=None):
+    """returns queryset of threads that category's pruning policy applies to"""
+    now = now or timezone.now()
+
+    pruning_policy = Q()
+    if category.prune_started_after:
+        cutoff = now - timedelta(days=category.prune_started_after)
+        pruning_policy |= Q(started_on__lte=cutoff)
+    if category.prune_replied_after:
+        cutoff = now - timedelta(days=category.prune_replied_after)
+        pruning_policy |= Q(last_post_on__lte=cutoff)
+
+    if not pruning_policy:
+        return Thread.objects.none()
+
+    queryset = Thread.objects.filter(pruning_policy, category=category, weight=0)
+    return queryset.order_by('pk')
+
+
+def get_threads_chunks(queryset, chunk_size, after=None):
+    """yields lists of ids of threads from queryset, starting after given thread id"""
+    while True:
+        chunk_queryset = queryset
+        if after:
+            chunk_queryset = chunk_queryset.filter(pk__gt=after)
+
+        chunk = list(chunk_queryset.values_list('pk', flat=True)[:chunk_size])
+        if not chunk:
+            return
+
+        yield chunk
+        after = chunk[-1]
+
+
+def count_posts(threads_ids):
+    replies = Thread.objects.filter(pk__in=threads_ids).aggregate(replies=Sum('replies'))
+    return len(threads_ids) + (replies['replies'] or 0)
+
+
+def delete_threads(threads_ids):
+    with transaction.atomic():
+        posts = Post.objects.filter(thread_id__in=threads_ids)
+        Attachment.objects.filter(post__in=posts).update(post=None)
+        raw_delete(Post.mentions.through.objects.filter(post__in=posts))
+
+        threads = Thread.objects.filter(pk__in=threads_ids)
+        threads.update(first_post=None, last_post=None)
+        Category.objects.filter(last_thread__in=threads).update(last_thread=None)
+        CategoryDelta.objects.filter(last_thread__in=threads).update(last_thread=None)
+
+        for model in (PostEdit, PostLike, PollVote, Poll, Subscription, ThreadParticipant,
+                      ThreadRead, Post):
+            raw_delete(model.objects.filter(thread_id__in=threads_ids))
+        raw_delete(threads)
+
+    invalidate_posts_pages(*threads_ids)
+    invalidate_counts('threads')
+
+
+def raw_delete(queryset):
+    """deletes rows with single query, without collecting them or sending signals"""
+    queryset._raw_delete(queryset.db)
+
+
+def move_threads(threads_ids, new_category):
+    with transaction.atomic():
+        Thread.objects.filter(pk__in=threads_ids).update(category=new_category)
+
+        for model in (Post, PostEdit, PostLike, Poll, PollVote, Subscription):
+            model.objects.filter(thread_id__in=threads_ids).update(category=new_category)
+
+        ThreadRead.objects.filter(thread_id__in=threads_ids).delete()
+
+    invalidate_counts('threads')
@@ -1,8 +1,7 @@
 from rest_framework import serializers
 
-from django.urls import reverse
-
 from misago.core.serializers import MutableFields
+from misago.core.urlbuilder import build_url
 from misago.core.utils import format_plaintext_for_html
 
 from .models import Category
@@ -103,7 +102,7 @@ class CategorySerializer(serializers.ModelSerializer, MutableFields):
     @last_activity_detail
     def get_last_poster_url(self, obj):
         if obj.last_poster_id:
-            return reverse(
+            return build_url(
                 'misago:user', kwargs={
                     'slug': obj.last_poster_slug,
                     'pk': obj.last_poster_id,
@@ -1,8 +1,12 @@
+from django.db.models.signals import post_save
 from django.dispatch import Signal, receiver
 
+from misago.core.signals import caches_invalidated
 from misago.users.signals import username_changed
 
+from .aggregates import invalidate_categories_aggregates
 from .models import Category
+from .tree import CATEGORIES_CACHEBUSTER, clear_tree_index, get_tree_index
 
 
 delete_category_content = Signal()
@@ -15,3 +19,28 @@ def update_usernames(sender, **kwargs):
         last_poster_name=sender.username,
         last_poster_slug=sender.slug,
     )
+    invalidate_categories_aggregates()
+
+
+@receiver(post_save, sender=Category)
+def invalidate_changed_tree(sender, instance, **kwargs):
+    # any save may change category's counters or last thread
+    invalidate_categories_aggregates()
+
+    try:
+        tree_index = get_tree_index()
+    except ValueError:
+        return  # categories version tracker is not registered yet
+
+    if tree_index.tree_id and instance.tree_id != tree_index.tree_id:
+        return  # category is not in threads tree
+
+    # saving counters or last thread doesn't change tree
+    if tree_index.is_structure_changed(instance):
+        Category.objects.clear_cache()
+
+
+@receiver(caches_invalidated)
+def clear_invalidated_tree(sender, caches, **kwargs):
+    if CATEGORIES_CACHEBUSTER in caches:
+        clear_tree_index()
@@ -0,0 +1,146 @@
+"""
+Bulk synchronization of categories counters and last threads
+
+Category.synchronize runs three queries for every category. Functions in
+this module compute same values for any number of categories with two
+grouped queries, and then save them with one update per category that has
+visible threads and one update for all categories that don't. Deltas of
+categories counters (see misago.categories.counters) recorded before
+threads were counted are discarded, and ones recorded after are left to be
+folded into synchronized categories.
+"""
+from django.db import transaction
+
+from misago.threads.models import Thread
+
+from .counters import discard_deltas, lock_categories
+from .models import Category, CategoryDelta
+
+
+# category field: thread field
+LAST_THREAD_FIELDS = (
+    ('last_post_on', 'last_post_on'),
+    ('last_thread_id', 'id'),
+    ('last_thread_title', 'title'),
+    ('last_thread_slug', 'slug'),
+    ('last_poster_id', 'last_poster_id'),
+    ('last_poster_name', 'last_poster_name'),
+    ('last_poster_slug', 'last_poster_slug'),
+)
+
+
+def get_empty_stats():
+    stats = {'threads': 0, 'posts': 0}
+    for field, _ in LAST_THREAD_FIELDS:
+        stats[field] = None
+    return stats
+
+
+def get_categories_counters(categories_ids):
+    """
+    returns dict of categories ids and their counters, and list of ids of
+    deltas that were recorded for posts included in those counters
+
+    Counters and deltas are read with single query, so they come from same
+    snapshot of database.
+    """
+    visible_threads = (
+        'FROM %(thread)s WHERE %(thread)s.category_id = %(category)s.id '
+        'AND %(thread)s.is_hidden = false AND %(thread)s.is_unapproved = false'
+    ) % {
+        'thread': Thread._meta.db_table,
+        'category': Category._meta.db_table,
+    }
+    deltas = 'SELECT id FROM %(delta)s WHERE %(delta)s.category_id = %(category)s.id' % {
+        'delta': CategoryDelta._meta.db_table,
+        'category': Category._meta.db_table,
+    }
+
+    queryset = Category.objects.filter(pk__in=categories_ids).extra(
+        select={
+            'threads_count': 'SELECT COUNT(*) %s' % visible_threads,
+            'replies_sum': 'SELECT COALESCE(SUM(replies), 0) %s' % visible_threads,
+            'deltas_ids': 'ARRAY(%s)' % deltas,
+        }
+    ).order_by().values('pk', 'threads_count', 'replies_sum', 'deltas_ids')
+
+    categories_counters = {}
+    deltas_ids = []
+    for row in queryset:
+        categories_counters[row['pk']] = {
+            'threads': row['threads_count'],
+            'posts': row['threads_count'] + row['replies_sum'],
+        }
+        deltas_ids.extend(row['deltas_ids'])
+    return categories_counters, deltas_ids
+
+
+def get_categories_stats(categories_ids, counted_deltas=None):
+    """
+    returns dict of categories ids and values Category.synchronize would set on them
+
+    If counted_deltas list is passed, ids of deltas included in returned
+    counters are appended to it.
+    """
+    categories_stats = dict((pk, get_empty_stats()) for pk in categories_ids)
+    if not categories_stats:
+        return categories_stats
+
+    categories_counters, deltas_ids = get_categories_counters(categories_stats.keys())
+    for pk, counters in categories_counters.items():
+        categories_stats[pk].update(counters)
+    if counted_deltas is not None:
+        counted_deltas.extend(deltas_ids)
+
+    threads_queryset = Thread.objects.filter(
+        category_id__in=categories_stats.keys(),
+        is_hidden=False,
+        is_unapproved=False,
+    ).order_by()
+
+    thread_fields = [thread_field for _, thread_field in LAST_THREAD_FIELDS]
+    last_threads = threads_queryset.order_by(
+        'category_id',
+        '-last_post_on',
+    ).distinct('category_id').values('category_id', *thread_fields)
+
+    for row in last_threads:
+        stats = categories_stats[row['category_id']]
+        for field, thread_field in LAST_THREAD_FIELDS:
+            stats[field] = row[thread_field]
+
+    return categories_stats
+
+
+def synchronize_categories(categories=None):
+    """
+    synchronizes categories (or their ids), or all categories if none are given
+
+    returns number of synchronized categories
+    """
+    from .aggregates import invalidate_categories_aggregates
+
+    if categories is None:
+        categories_ids = list(Category.objects.values_list('id', flat=True))
+    else:
+        categories_ids = [getattr(category, 'pk', category) for category in categories]
+
+    with transaction.atomic():
+        lock_categories(categories_ids)
+
+        counted_deltas = []
+        categories_stats = get_categories_stats(set(categories_ids), counted_deltas)
+        discard_deltas(counted_deltas)
+
+        empty_categories = []
+        for pk, stats in categories_stats.items():
+            if stats['threads']:
+                Category.objects.filter(pk=pk).update(**stats)
+            else:
+                empty_categories.append(pk)
+
+        if empty_categories:
+            Category.objects.filter(pk__in=empty_categories).update(**get_empty_stats())
+
+    invalidate_categories_aggregates()
+    return len(categories_stats)
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from misago.acl.testutils import override_acl
+from misago.categories.aggregates import (
+    get_categories_aggregates, invalidate_categories_aggregates)
+from misago.categories.models import Category
+from misago.categories.synchronization import synchronize_categories
+from misago.categories.utils import get_categories_tree
+from misago.threads import testutils
+from misago.users.testutils import AuthenticatedUserTestCase
+
+
+class CategoriesAggregatesTests(AuthenticatedUserTestCase):
+    def setUp(self):
+        """
+        Create categories tree for test cases:
+
+        First category (created by migration)
+          + Category A
+            + Category B
+        """
+        super(CategoriesAggregatesTests, self).setUp()
+        invalidate_categories_aggregates()
+
+        self.category = Category.objects.get(slug='first-category')
+
+        Category(
+            name='Category A',
+            slug='category-a',
+        ).insert_at(
+            self.category,
+            position='last-child',
+            save=True,
+        )
+        self.category_a = Category.objects.get(slug='category-a')
+
+        Category(
+            name='Category B',
+            slug='category-b',
+        ).insert_at(
+            self.category_a,
+            position='last-child',
+            save=True,
+        )
+        self.category_b = Category.objects.get(slug='category-b')
+
+        started_on = timezone.now() - timedelta(days=1)
+        testutils.post_thread(self.category, title='Old thread', started_on=started_on)
+        testutils.reply_thread(testutils.post_thread(self.category_a, title='Thread A'))
+        testutils.post_thread(self.category_b, title='Thread B')
+
+        synchronize_categories()
+
+    def override_acl(self, can_browse_b=True):
+        categories_acl = {'categories': {}, 'visible_categories': []}
+        for category in Category.objects.all_categories():
+            categories_acl['visible_categories'].append(category.pk)
+            categories_acl['categories'][category.pk] = {'can_see': 1, 'can_browse': 1}
+
+        if not can_browse_b:
+            categories_acl['categories'][self.category_b.pk]['can_browse'] = 0
+        override_acl(self.user, categories_acl)
+
+    def test_aggregates(self):
+        """aggregates contain counters of categories and their subtrees"""
+        aggregates = get_categories_aggregates()
+
+        self.assertEqual(aggregates[self.category_b.pk]['subtree']['threads'], 1)
+        self.assertEqual(aggregates[self.category_a.pk]['category']['threads'], 1)
+        self.assertEqual(aggregates[self.category_a.pk]['category']['posts'], 2)
+        self.assertEqual(aggregates[self.category_a.pk]['subtree']['threads'], 2)
+        self.assertEqual(aggregates[self.category_a.pk]['subtree']['posts'], 3)
+        self.assertEqual(aggregates[self.category.pk]['category']['threads'], 1)
+        self.assertEqual(aggregates[self.category.pk]['subtree']['threads'], 3)
+        self.assertEqual(aggregates[self.category.pk]['subtree']['posts'], 4)
+        self.assertEqual(
+            aggregates[self.category.pk]['subtree']['last_thread_title'], 'Thread B')
+
+    def test_aggregates_invalidation(self):
+        """aggregates are recomputed after category is saved"""
+        self.assertEqual(get_categories_aggregates()[self.category_b.pk]['category']['posts'], 1)
+
+        category = Category.objects.get(pk=self.category_b.pk)
+        category.posts = 42
+        category.save()
+
+        self.assertEqual(get_categories_aggregates()[self.category_b.pk]['category']['posts'], 42)
+
+    def test_categories_tree(self):
+        """categories tree uses subtrees aggregates"""
+        self.override_acl()
+
+        categories_tree = get_categories_tree(self.user)
+        self.assertEqual(categories_tree[0], self.category)
+        self.assertEqual(categories_tree[0].threads, 3)
+        self.assertEqual(categories_tree[0].posts, 4)
+        self.assertEqual(categories_tree[0].last_thread_title, 'Thread B')
+
+        category_a = categories_tree[0].subcategories[0]
+        self.assertEqual(category_a.threads, 2)
+        self.assertEqual(category_a.subcategories[0].threads, 1)
+
+    def test_categories_tree_unbrowseable_category(self):
+        """categories tree excludes categories user can't browse from counters"""
+        self.override_acl(can_browse_b=False)
+
+        categories_tree = get_categories_tree(self.user)
+        self.assertEqual(categories_tree[0].threads, 2)
+        self.assertEqual(categories_tree[0].posts, 3)
+        self.assertEqual(categories_tree[0].last_thread_title, 'Thread A')
+
+        category_a = categories_tree[0].subcategories[0]
+        self.assertEqual(category_a.threads, 1)
+        self.assertEqual(category_a.posts, 2)
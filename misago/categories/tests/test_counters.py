@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from misago.categories.counters import (
+    PENDING_CACHE, fold_deltas, fold_pending_deltas, mark_pending, record_delta)
+from misago.categories.models import Category, CategoryDelta
+from misago.categories.synchronization import get_categories_counters, synchronize_categories
+from misago.core.cache import shared_cache
+from misago.core.testutils import MisagoTestCase
+from misago.threads import testutils
+
+
+class CategoryCountersTests(MisagoTestCase):
+    def setUp(self):
+        super(CategoryCountersTests, self).setUp()
+
+        self.category = Category.objects.get(slug='first-category')
+        self.thread = testutils.post_thread(
+            self.category,
+            title='Old thread',
+            started_on=timezone.now() - timedelta(days=1),
+        )
+
+        self.category = Category.objects.get(pk=self.category.pk)
+
+    def test_fold_deltas(self):
+        """deltas are folded into category"""
+        thread = testutils.post_thread(self.category, title='New thread')
+        Category.objects.filter(pk=self.category.pk).update(threads=1, posts=1)
+
+        record_delta(self.category, thread, threads=1, posts=1)
+        for _ in range(3):
+            record_delta(self.category, self.thread, posts=1)
+
+        self.assertEqual(fold_deltas(), 1)
+        self.assertFalse(CategoryDelta.objects.exists())
+
+        category = Category.objects.get(pk=self.category.pk)
+        self.assertEqual(category.threads, 2)
+        self.assertEqual(category.posts, 5)
+        self.assertEqual(category.last_thread_id, thread.pk)
+        self.assertEqual(category.last_thread_title, 'New thread')
+
+        self.assertEqual(fold_deltas(), 0)
+
+    def test_fold_keeps_newer_last_thread(self):
+        """folding delta doesn't replace newer last thread set on category"""
+        thread = testutils.post_thread(self.category, title='New thread')
+
+        record_delta(self.category, self.thread, posts=1)
+        fold_deltas()
+
+        category = Category.objects.get(pk=self.category.pk)
+        self.assertEqual(category.last_thread_id, thread.pk)
+
+    def test_fold_pending_deltas(self):
+        """deltas are folded by readers only when they are flagged as pending"""
+        record_delta(self.category, self.thread, posts=1)
+
+        self.assertFalse(fold_pending_deltas())
+        self.assertTrue(CategoryDelta.objects.exists())
+
+        mark_pending()
+
+        self.assertTrue(fold_pending_deltas())
+        self.assertFalse(CategoryDelta.objects.exists())
+        self.assertIsNone(shared_cache.get(PENDING_CACHE))
+
+        category = Category.objects.get(pk=self.category.pk)
+        self.assertEqual(category.posts, self.category.posts + 1)
+
+    def test_synchronization_discards_deltas(self):
+        """synchronization discards deltas counted for synchronized categories"""
+        record_delta(self.category, self.thread, threads=1, posts=1)
+        synchronize_categories([self.category])
+
+        self.assertFalse(CategoryDelta.objects.exists())
+        self.assertEqual(fold_deltas(), 0)
+
+        record_delta(self.category, self.thread, threads=1, posts=1)
+        self.category.synchronize()
+
+        self.assertFalse(CategoryDelta.objects.exists())
+
+    def test_synchronization_keeps_other_categories_deltas(self):
+        """synchronization doesn't discard deltas of other categories"""
+        other_category = Category.objects.root_category()
+
+        record_delta(self.category, self.thread, threads=1, posts=1)
+        record_delta(other_category, posts=1)
+        synchronize_categories([self.category])
+
+        self.assertEqual(
+            list(CategoryDelta.objects.values_list('category_id', flat=True)),
+            [other_category.pk],
+        )
+
+    def test_get_categories_counters(self):
+        """counters are read together with ids of deltas they include in single query"""
+        testutils.reply_thread(self.thread)
+        delta = CategoryDelta.objects.create(category=self.category, posts=1)
+
+        with self.assertNumQueries(1):
+            counters, deltas_ids = get_categories_counters([self.category.pk])
+
+        self.assertEqual(counters, {self.category.pk: {'threads': 1, 'posts': 2}})
+        self.assertEqual(deltas_ids, [delta.pk])
@@ -1,13 +1,23 @@
 from datetime import timedelta
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.utils.six import StringIO
 
 from misago.categories.management.commands import prunecategories
 from misago.categories.models import Category
+from misago.categories.pruning import delete_threads
+from misago.core.cache import shared_cache
+from misago.readtracker.models import ThreadRead
 from misago.threads import testutils
+from misago.threads.models import Attachment, AttachmentType, Post, PostEdit, PostLike, Thread
+
+
+UserModel = get_user_model()
 
 
 class PruneCategoriesTests(TestCase):
@@ -45,7 +55,7 @@ class PruneCategoriesTests(TestCase):
         for thread in threads:
             category.thread_set.get(id=thread.id)
 
-        command_output = out.getvalue().strip()
+        command_output = out.getvalue().strip().splitlines()[-1]
         self.assertEqual(command_output, 'Categories were pruned')
 
     def test_category_prune_by_last_reply(self):
@@ -81,7 +91,7 @@ class PruneCategoriesTests(TestCase):
         for thread in threads:
             category.thread_set.get(id=thread.id)
 
-        command_output = out.getvalue().strip()
+        command_output = out.getvalue().strip().splitlines()[-1]
         self.assertEqual(command_output, 'Categories were pruned')
 
     def test_category_archive_by_start_date(self):
@@ -131,7 +141,7 @@ class PruneCategoriesTests(TestCase):
         for thread in threads:
             category.thread_set.get(id=thread.id)
 
-        command_output = out.getvalue().strip()
+        command_output = out.getvalue().strip().splitlines()[-1]
         self.assertEqual(command_output, 'Categories were pruned')
 
     def test_category_archive_by_last_reply(self):
@@ -180,5 +190,156 @@ class PruneCategoriesTests(TestCase):
         for thread in threads:
             category.thread_set.get(id=thread.id)
 
-        command_output = out.getvalue().strip()
+        command_output = out.getvalue().strip().splitlines()[-1]
         self.assertEqual(command_output, 'Categories were pruned')
+
+    def test_category_prune_deletes_posts(self):
+        """command deletes pruned threads posts"""
+        category = Category.objects.all_categories()[:1][0]
+
+        category.prune_started_after = 20
+        category.save()
+
+        started_on = timezone.now() - timedelta(days=30)
+        thread = testutils.post_thread(category, started_on=started_on)
+        testutils.reply_thread(thread)
+
+        call_command(prunecategories.Command(), stdout=StringIO())
+
+        self.assertFalse(Thread.objects.filter(pk=thread.pk).exists())
+        self.assertFalse(Post.objects.filter(thread_id=thread.pk).exists())
+
+    def test_delete_threads_queries(self):
+        """deleting threads runs same number of queries regardless of posts number"""
+        category = Category.objects.all_categories()[:1][0]
+        user = UserModel.objects.create_user("Bob", "bob@bob.com", "Pass.123")
+
+        def create_threads(replies):
+            threads_ids = []
+            for _ in range(2):
+                thread = testutils.post_thread(category)
+                for _ in range(replies):
+                    post = testutils.reply_thread(thread, poster=user)
+                    post.mentions.add(user)
+                    PostEdit.objects.create(
+                        category=category,
+                        thread=thread,
+                        post=post,
+                        editor_name=user.username,
+                        editor_slug=user.slug,
+                        editor_ip='127.0.0.1',
+                        edited_from='old',
+                        edited_to='new',
+                    )
+                    PostLike.objects.create(
+                        category=category,
+                        thread=thread,
+                        post=post,
+                        liker_name=user.username,
+                        liker_slug=user.slug,
+                        liker_ip='127.0.0.1',
+                    )
+                threads_ids.append(thread.pk)
+            return threads_ids
+
+        few_posts_threads = create_threads(1)
+        many_posts_threads = create_threads(10)
+
+        attachment = Attachment.objects.create(
+            secret=Attachment.generate_new_secret(),
+            filetype=AttachmentType.objects.order_by('id').last(),
+            post=Post.objects.filter(thread_id=many_posts_threads[0]).last(),
+            size=1000,
+            uploader_name=user.username,
+            uploader_slug=user.slug,
+            uploader_ip='127.0.0.1',
+            filename='testfile.zip',
+        )
+
+        with CaptureQueriesContext(connection) as few_posts_queries:
+            delete_threads(few_posts_threads)
+        with CaptureQueriesContext(connection) as many_posts_queries:
+            delete_threads(many_posts_threads)
+
+        self.assertEqual(len(few_posts_queries), len(many_posts_queries))
+
+        self.assertFalse(Thread.objects.filter(pk__in=many_posts_threads).exists())
+        self.assertFalse(Post.objects.filter(thread_id__in=many_posts_threads).exists())
+        self.assertFalse(PostEdit.objects.exists())
+        self.assertFalse(PostLike.objects.exists())
+        self.assertFalse(Post.mentions.through.objects.exists())
+        self.assertIsNone(Attachment.objects.get(pk=attachment.pk).post_id)
+
+    def test_category_archive_moves_content(self):
+        """command moves archived threads posts and clears their read tracker"""
+        category = Category.objects.all_categories()[:1][0]
+        archive = Category.objects.create(
+            lft=7,
+            rght=8,
+            tree_id=2,
+            level=0,
+            name='Archive',
+            slug='archive',
+        )
+
+        category.prune_started_after = 20
+        category.archive_pruned_in = archive
+        category.save()
+
+        started_on = timezone.now() - timedelta(days=30)
+        thread = testutils.post_thread(category, started_on=started_on)
+        testutils.reply_thread(thread)
+
+        ThreadRead.objects.create(
+            user=UserModel.objects.create_user('Bob', 'bob@bob.com', 'Pass.123'),
+            category=category,
+            thread=thread,
+            last_read_on=timezone.now(),
+        )
+
+        call_command(prunecategories.Command(), stdout=StringIO())
+
+        self.assertEqual(Thread.objects.get(pk=thread.pk).category_id, archive.pk)
+        self.assertEqual(Post.objects.filter(thread=thread, category=archive).count(), 2)
+        self.assertFalse(ThreadRead.objects.exists())
+
+    def test_category_prune_dry_run(self):
+        """command doesn't prune threads in dry run"""
+        category = Category.objects.all_categories()[:1][0]
+
+        category.prune_started_after = 20
+        category.save()
+
+        started_on = timezone.now() - timedelta(days=30)
+        for _ in range(10):
+            thread = testutils.post_thread(category, started_on=started_on)
+            testutils.reply_thread(thread)
+
+        out = StringIO()
+        call_command(prunecategories.Command(), dry_run=True, stdout=out)
+
+        self.assertEqual(category.thread_set.count(), 10)
+
+        command_output = out.getvalue().strip().splitlines()
+        self.assertTrue(command_output[0].startswith('10 threads (20 posts) would be pruned'))
+        self.assertEqual(command_output[-1], 'Categories were not pruned')
+
+    def test_category_prune_resumes_from_checkpoint(self):
+        """command resumes pruning from checkpoint left by previous run"""
+        category = Category.objects.all_categories()[:1][0]
+
+        category.prune_started_after = 20
+        category.save()
+
+        started_on = timezone.now() - timedelta(days=30)
+        threads = [testutils.post_thread(category, started_on=started_on) for _ in range(10)]
+
+        shared_cache.set(prunecategories.CHECKPOINT_CACHE, (category.pk, threads[4].pk))
+
+        call_command(prunecategories.Command(), stdout=StringIO())
+
+        self.assertEqual(
+            list(category.thread_set.order_by('pk').values_list('pk', flat=True)),
+            [thread.pk for thread in threads[:5]],
+        )
+        self.assertIsNone(shared_cache.get(prunecategories.CHECKPOINT_CACHE))
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from misago.categories.models import Category
+from misago.categories.synchronization import (
+    LAST_THREAD_FIELDS, get_categories_stats, synchronize_categories)
+from misago.threads import testutils
+
+
+STATS_FIELDS = ['threads', 'posts'] + [field for field, _ in LAST_THREAD_FIELDS]
+
+
+class SynchronizeCategoriesTests(TestCase):
+    def setUp(self):
+        self.root = Category.objects.root_category()
+        self.category = Category.objects.get(slug='first-category')
+
+        self.other_category = Category(name='Other category', slug='other-category')
+        self.other_category.insert_at(self.root, position='last-child', save=True)
+
+        self.empty_category = Category(name='Empty category', slug='empty-category')
+        self.empty_category.insert_at(self.root, position='last-child', save=True)
+
+        started_on = timezone.now() - timedelta(days=5)
+        for i in range(5):
+            thread = testutils.post_thread(
+                self.category,
+                started_on=started_on + timedelta(hours=i),
+            )
+            for _ in range(i):
+                testutils.reply_thread(thread)
+
+        testutils.post_thread(self.category, is_hidden=True)
+        testutils.post_thread(self.category, is_unapproved=True)
+
+        testutils.post_thread(self.other_category, is_hidden=True)
+        testutils.reply_thread(testutils.post_thread(self.other_category, poster='Bob'))
+
+    def get_stats(self, category):
+        category = Category.objects.get(pk=category.pk)
+        return dict((field, getattr(category, field)) for field in STATS_FIELDS)
+
+    def reset_stats(self):
+        Category.objects.update(threads=42, posts=42, last_thread=None, last_post_on=None)
+
+    def test_bulk_sync_matches_category_sync(self):
+        """synchronize_categories produces same results as Category.synchronize"""
+        categories = [self.category, self.other_category, self.empty_category]
+
+        self.reset_stats()
+        for category in categories:
+            category = Category.objects.get(pk=category.pk)
+            category.synchronize()
+            category.save()
+        expected_stats = [self.get_stats(c) for c in categories]
+
+        self.reset_stats()
+        self.assertEqual(synchronize_categories(categories), 3)
+        self.assertEqual([self.get_stats(c) for c in categories], expected_stats)
+
+        self.assertEqual(expected_stats[0]['threads'], 5)
+        self.assertEqual(expected_stats[0]['posts'], 15)
+        self.assertEqual(expected_stats[1]['threads'], 1)
+        self.assertEqual(expected_stats[1]['posts'], 2)
+        self.assertEqual(expected_stats[1]['last_thread_title'], 'Test thread')
+        self.assertEqual(expected_stats[2]['threads'], 0)
+        self.assertIsNone(expected_stats[2]['last_thread_id'])
+
+    def test_sync_all_categories(self):
+        """synchronize_categories synchronizes all categories by default"""
+        self.reset_stats()
+
+        self.assertEqual(synchronize_categories(), Category.objects.count())
+        self.assertEqual(self.get_stats(self.category)['threads'], 5)
+        self.assertEqual(self.get_stats(self.root)['threads'], 0)
+
+    def test_stats_queries(self):
+        """get_categories_stats runs two queries for any number of categories"""
+        categories_ids = list(Category.objects.values_list('pk', flat=True))
+        with self.assertNumQueries(2):
+            stats = get_categories_stats(categories_ids)
+        self.assertEqual(stats[self.category.pk]['threads'], 5)
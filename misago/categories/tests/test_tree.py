@@ -0,0 +1,182 @@
+from misago.categories import THREADS_ROOT_NAME
+from misago.categories.models import Category
+from misago.categories.tree import get_tree_index
+from misago.core.testutils import MisagoTestCase
+from misago.threads.viewmodels import ForumThread
+
+
+class CategoriesTreeIndexTests(MisagoTestCase):
+    def setUp(self):
+        """
+        Create categories tree for test cases:
+
+        First category (created by migration)
+
+        Category A
+          + Category B
+            + Subcategory C
+          + Category D
+        """
+        super(CategoriesTreeIndexTests, self).setUp()
+
+        self.root = Category.objects.root_category()
+        self.first_category = Category.objects.get(slug='first-category')
+
+        self.category_a = self.create_category('Category A', self.root)
+        self.category_b = self.create_category('Category B', self.category_a)
+        self.category_c = self.create_category('Subcategory C', self.category_b)
+        self.category_d = self.create_category('Category D', self.category_a)
+
+    def create_category(self, name, parent):
+        category = Category(name=name, slug=name.lower().replace(' ', '-'))
+        category.insert_at(parent, position='last-child', save=True)
+        return category
+
+    def test_tree_structure(self):
+        """index reflects categories tree"""
+        tree_index = get_tree_index()
+
+        self.assertEqual(tree_index.get_special_id(THREADS_ROOT_NAME), self.root.pk)
+        self.assertEqual(tree_index.tree_id, self.root.tree_id)
+        self.assertEqual(len(tree_index), 6)
+
+        self.assertEqual(tree_index.get_parent_id(self.category_c.pk), self.category_b.pk)
+        self.assertEqual(
+            tree_index.get_children_ids(self.category_a.pk),
+            (self.category_b.pk, self.category_d.pk)
+        )
+        self.assertEqual(
+            tree_index.get_ancestors_ids(self.category_c.pk),
+            (self.root.pk, self.category_a.pk, self.category_b.pk)
+        )
+        self.assertEqual(
+            tree_index.get_ancestors_ids(self.category_b.pk, include_self=True),
+            (self.root.pk, self.category_a.pk, self.category_b.pk)
+        )
+        self.assertEqual(
+            tree_index.get_descendants_ids(self.category_a.pk),
+            (self.category_b.pk, self.category_c.pk, self.category_d.pk)
+        )
+        self.assertEqual(
+            tree_index.get_descendants_ids(self.category_b.pk, include_self=True),
+            (self.category_b.pk, self.category_c.pk)
+        )
+        self.assertEqual(tree_index.get_descendants_ids(self.category_d.pk), ())
+        self.assertEqual(tree_index.get_depth(self.category_c.pk), 3)
+
+    def test_get_path(self):
+        """get_path returns categories from root to category"""
+        tree_index = get_tree_index()
+
+        self.assertEqual(
+            tree_index.get_path_ids(self.category_c.pk),
+            (self.root.pk, self.category_a.pk, self.category_b.pk, self.category_c.pk)
+        )
+        self.assertEqual(tree_index.get_path_ids(self.root.pk), (self.root.pk, ))
+
+        with self.assertNumQueries(0):
+            path = tree_index.get_path(self.category_d.pk)
+        self.assertEqual(path, [self.root, self.category_a, self.category_d])
+        self.assertEqual([c.name for c in path][1:], ['Category A', 'Category D'])
+
+        category = Category.objects.get(pk=self.category_a.pk)
+        category.name = 'Renamed category'
+        category.save()
+
+        path = get_tree_index().get_path(self.category_d.pk)
+        self.assertEqual(path[1].name, 'Renamed category')
+
+    def test_breadcrumbs_queries(self):
+        """thread's breadcrumbs are built without queries once index is loaded"""
+        get_tree_index()
+
+        viewmodel = ForumThread.__new__(ForumThread)
+        with self.assertNumQueries(0):
+            path = viewmodel.get_thread_path(self.category_c)
+            for category in (self.first_category, self.category_b, self.category_d):
+                viewmodel.get_thread_path(category)
+
+        self.assertEqual(
+            path, [self.root, self.category_a, self.category_b, self.category_c])
+        self.assertEqual(path[0].name, "Threads")
+        self.assertEqual(path[1].name, "Category A")
+        self.assertIs(path[2].parent, path[1])
+
+        # root category in index keeps its name
+        self.assertNotEqual(get_tree_index().get_category(self.root.pk).name, "Threads")
+
+    def test_get_top_categories_map(self):
+        """get_top_categories_map maps categories to their top categories for root"""
+        tree_index = get_tree_index()
+
+        self.assertEqual(
+            tree_index.get_top_categories_map(self.root.pk), {
+                self.first_category.pk: self.first_category.pk,
+                self.category_a.pk: self.category_a.pk,
+                self.category_b.pk: self.category_a.pk,
+                self.category_c.pk: self.category_a.pk,
+                self.category_d.pk: self.category_a.pk,
+            }
+        )
+
+        self.assertEqual(
+            tree_index.get_top_categories_map(self.category_b.pk), {
+                self.first_category.pk: self.first_category.pk,
+                self.category_a.pk: self.category_a.pk,
+                self.category_c.pk: self.category_c.pk,
+                self.category_d.pk: self.category_a.pk,
+            }
+        )
+
+        self.assertIs(
+            tree_index.get_top_categories_map(self.category_b.pk),
+            tree_index.get_top_categories_map(self.category_b.pk)
+        )
+
+    def test_index_is_shared(self):
+        """index is reused without queries until tree changes"""
+        tree_index = get_tree_index()
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_tree_index(), tree_index)
+
+        self.create_category('Category E', self.root)
+        self.assertIsNot(get_tree_index(), tree_index)
+        self.assertEqual(len(get_tree_index()), 7)
+
+    def test_stats_change_keeps_index(self):
+        """saving category counters doesn't invalidate index"""
+        tree_index = get_tree_index()
+
+        category = Category.objects.get(pk=self.category_b.pk)
+        category.threads = 42
+        category.posts = 120
+        category.save()
+
+        self.assertIs(get_tree_index(), tree_index)
+
+        category.name = 'Renamed category'
+        category.save()
+
+        self.assertIsNot(get_tree_index(), tree_index)
+        self.assertEqual(
+            get_tree_index().get_category(self.category_b.pk).name, 'Renamed category'
+        )
+
+    def test_get_categories(self):
+        """get_categories returns new instances in tree order"""
+        tree_index = get_tree_index()
+
+        categories = tree_index.get_categories([
+            self.category_d.pk,
+            self.category_c.pk,
+            self.category_a.pk,
+        ])
+        self.assertEqual(categories, [self.category_a, self.category_c, self.category_d])
+
+        self.assertEqual(categories[0].parent, self.root)
+        self.assertEqual(categories[1].parent, self.category_b)
+        self.assertIs(categories[2].parent, categories[0])
+
+        categories[0].name = 'Changed name'
+        self.assertEqual(tree_index.get_category(self.category_a.pk).name, 'Category A')
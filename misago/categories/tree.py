@@ -0,0 +1,207 @@
+"""
+In-memory index of threads categories tree
+
+Index is built from cached categories dict once per "misago_categories"
+cachebuster version and shared by all requests handled by process, so
+looking up category's parent, children, ancestors, descendants or path from
+tree root (breadcrumbs) costs no queries. Because its shared, index is never
+changed after creation (with exception of memoized top categories maps) and
+it hands out new Category instances to its callers.
+
+Counters and last thread fields (STATS_FIELDS) are read from cache together
+with rest of category and change without invalidating the tree, so index
+instances should not be trusted to have those up to date.
+"""
+from misago.core import cachebuster
+
+
+CATEGORIES_CACHEBUSTER = 'misago_categories'
+
+STATS_FIELDS = (
+    'threads',
+    'posts',
+    'last_post_on',
+    'last_thread_id',
+    'last_thread_title',
+    'last_thread_slug',
+    'last_poster_id',
+    'last_poster_name',
+    'last_poster_slug',
+)
+
+
+class CategoriesTreeIndex(object):
+    def __init__(self, version, categories):
+        self.version = version
+
+        ordered = sorted(categories.values(), key=lambda c: c.lft)
+
+        self._db = ordered[0]._state.db if ordered else None
+        self._fields = [f.attname for f in ordered[0]._meta.concrete_fields] if ordered else []
+
+        self._values = {}
+        self._parents = {}
+        self._children = {}
+        self._paths = {}
+        self._positions = {}
+        self._order = tuple(c.pk for c in ordered)
+        self._special = {}
+
+        for position, category in enumerate(ordered):
+            self._values[category.pk] = tuple(getattr(category, f) for f in self._fields)
+            self._parents[category.pk] = category.parent_id
+            self._children[category.pk] = []
+            self._positions[category.pk] = position
+
+            if category.special_role:
+                self._special[category.special_role] = category.pk
+
+            if category.parent_id in self._children:
+                self._children[category.parent_id].append(category.pk)
+                self._paths[category.pk] = self._paths[category.parent_id] + (category.pk, )
+            else:
+                self._paths[category.pk] = (category.pk, )
+
+        for pk, children in self._children.items():
+            self._children[pk] = tuple(children)
+
+        self._tree_id = ordered[0].tree_id if ordered else None
+        self._sizes = dict((c.pk, (c.rght - c.lft - 1) // 2) for c in ordered)
+
+        self._top_categories_maps = {}
+
+    def __contains__(self, pk):
+        return pk in self._values
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def tree_id(self):
+        return self._tree_id
+
+    def get_special_id(self, special_role):
+        return self._special.get(special_role)
+
+    def get_parent_id(self, pk):
+        return self._parents[pk]
+
+    def get_children_ids(self, pk):
+        return self._children[pk]
+
+    def get_ancestors_ids(self, pk, include_self=False):
+        """returns ids of category's ancestors, starting from tree's root"""
+        if include_self:
+            return self._paths[pk]
+        return self._paths[pk][:-1]
+
+    def get_path_ids(self, pk):
+        """returns ids of categories from tree's root to category, used for breadcrumbs"""
+        return self._paths[pk]
+
+    def get_path(self, pk):
+        return self.get_categories(self._paths[pk])
+
+    def get_descendants_ids(self, pk, include_self=False):
+        """returns ids of category's descendants, in tree order"""
+        position = self._positions[pk]
+        if not include_self:
+            position += 1
+        return self._order[position:self._positions[pk] + self._sizes[pk] + 1]
+
+    def get_depth(self, pk):
+        return len(self._paths[pk]) - 1
+
+    def get_top_categories_map(self, root_pk):
+        """
+        returns dict of category ids and ids of their top categories for root
+
+        Top category is root's child containing category. For categories
+        outside of root's subtree its their first level ancestor instead.
+        Root and tree root have no top category and are not in map.
+        """
+        try:
+            return self._top_categories_maps[root_pk]
+        except KeyError:
+            pass
+
+        top_categories_map = {}
+
+        root_depth = len(self._paths[root_pk])
+        root_subtree = self.get_descendants_ids(root_pk)
+        for pk in root_subtree:
+            top_categories_map[pk] = self._paths[pk][root_depth]
+
+        root_subtree = set(root_subtree)
+        for pk, path in self._paths.items():
+            if pk != root_pk and pk not in root_subtree and len(path) > 1:
+                top_categories_map[pk] = path[1]
+
+        self._top_categories_maps[root_pk] = top_categories_map
+        return top_categories_map
+
+    def get_ordered_ids(self, pks):
+        """returns ids from pks that are in index, in tree order"""
+        positions = self._positions
+        return sorted((pk for pk in set(pks) if pk in positions), key=positions.get)
+
+    def is_structure_changed(self, category):
+        """returns True if category differs from indexed one on other fields than stats"""
+        try:
+            values = self._values[category.pk]
+        except KeyError:
+            return True
+
+        for field, value in zip(self._fields, values):
+            if field not in STATS_FIELDS and getattr(category, field) != value:
+                return True
+        return False
+
+    def get_category(self, pk):
+        from .models import Category
+        return Category.from_db(self._db, self._fields, self._values[pk])
+
+    def get_categories(self, pks):
+        """
+        returns new instances of categories in tree order
+
+        Categories parents are set to instances from returned list, or to new
+        instances if parent is not on it.
+        """
+        categories = []
+        categories_dict = {}
+        for pk in self.get_ordered_ids(pks):
+            category = self.get_category(pk)
+            categories.append(category)
+            categories_dict[pk] = category
+
+        for category in categories:
+            if category.parent_id:
+                parent = categories_dict.get(category.parent_id)
+                if parent is None:
+                    parent = self.get_category(category.parent_id)
+                category.parent = parent
+        return categories
+
+
+_index = [None]
+
+
+def get_tree_index():
+    from .models import Category
+
+    version = cachebuster.get_version(CATEGORIES_CACHEBUSTER)
+
+    index = _index[0]
+    if index is None or index.version != version:
+        index = CategoriesTreeIndex(version, Category.objects.get_cached_categories_dict())
+        _index[0] = index
+    return index
+
+
+def clear_tree_index():
+    _index[0] = None
+
+
+def invalidate_tree_index():
+    cachebuster.invalidate(CATEGORIES_CACHEBUSTER)
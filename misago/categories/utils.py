@@ -1,21 +1,28 @@
 from misago.acl import add_acl
 from misago.readtracker import categoriestracker
 
-from .models import Category
+from . import THREADS_ROOT_NAME
+from .aggregates import get_categories_aggregates, merge_stats
+from .counters import fold_pending_deltas
+from .synchronization import get_empty_stats
+from .tree import get_tree_index
 
 
 def get_categories_tree(user, parent=None):
     if not user.acl_cache['visible_categories']:
         return []
 
+    tree_index = get_tree_index()
     if parent:
-        queryset = parent.get_descendants().order_by('lft')
+        subtree = tree_index.get_descendants_ids(parent.pk)
     else:
-        queryset = Category.objects.all_categories()
+        subtree = tree_index.get_descendants_ids(tree_index.get_special_id(THREADS_ROOT_NAME))
 
-    queryset_with_acl = queryset.filter(id__in=user.acl_cache['visible_categories'])
+    visible_ids = set(user.acl_cache['visible_categories'])
+    visible_categories = tree_index.get_categories([pk for pk in subtree if pk in visible_ids])
 
-    visible_categories = list(queryset_with_acl)
+    fold_pending_deltas()
+    aggregates = get_categories_aggregates()
 
     categories_dict = {}
     categories_list = []
@@ -33,32 +40,42 @@ def get_categories_tree(user, parent=None):
     add_acl(user, categories_list)
     categoriestracker.make_read_aware(user, categories_list)
 
+    subtrees_stats = {}
+    complete_subtrees = set()
     for category in reversed(visible_categories):
+        category_aggregates = aggregates.get(category.pk)
+        children_ids = tree_index.get_children_ids(category.pk)
+
+        is_complete = bool(category_aggregates)
+        for child_id in children_ids:
+            child = categories_dict.get(child_id)
+            if not child or not child.acl['can_browse'] or child_id not in complete_subtrees:
+                is_complete = False
+                break
+
+        if is_complete:
+            # user browses whole subtree, so precomputed aggregate applies
+            complete_subtrees.add(category.pk)
+            stats = category_aggregates['subtree'].copy()
+        else:
+            if category_aggregates:
+                stats = category_aggregates['category'].copy()
+            else:
+                stats = get_empty_stats()
+
+            for child_id in reversed(children_ids):
+                child = categories_dict.get(child_id)
+                if child and child.acl['can_browse']:
+                    merge_stats(stats, subtrees_stats[child_id])
+
+        subtrees_stats[category.pk] = stats
+        for field, value in stats.items():
+            setattr(category, field, value)
+
         if category.acl['can_browse']:
             category.parent = categories_dict.get(category.parent_id)
-            if category.parent:
-                category.parent.threads += category.threads
-                category.parent.posts += category.posts
-
-                if category.parent.last_post_on and category.last_post_on:
-                    parent_last_post = category.parent.last_post_on
-                    category_last_post = category.last_post_on
-                    update_last_thead = parent_last_post < category_last_post
-                elif not category.parent.last_post_on and category.last_post_on:
-                    update_last_thead = True
-                else:
-                    update_last_thead = False
-
-                if update_last_thead:
-                    category.parent.last_post_on = category.last_post_on
-                    category.parent.last_thread_id = category.last_thread_id
-                    category.parent.last_thread_title = category.last_thread_title
-                    category.parent.last_thread_slug = category.last_thread_slug
-                    category.parent.last_poster_name = category.last_poster_name
-                    category.parent.last_poster_slug = category.last_poster_slug
-
-                if not category.is_read:
-                    category.parent.is_read = False
+            if category.parent and not category.is_read:
+                category.parent.is_read = False
 
     flat_list = []
     for category in categories_list:
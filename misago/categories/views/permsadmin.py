@@ -116,6 +116,7 @@ class CategoryPermissions(CategoryAdmin, generic.ModelFormView):
         if request.method == 'POST' and forms_are_valid:
             target.category_role_set.all().delete()
             new_permissions = []
+            changed_roles = []
             for form in forms:
                 if form.cleaned_data['category_role']:
                     new_permissions.append(
@@ -125,10 +126,12 @@ class CategoryPermissions(CategoryAdmin, generic.ModelFormView):
                             category_role=form.cleaned_data['category_role'],
                         )
                     )
+                if form.cleaned_data['category_role'] != assigned_roles.get(form.role.pk):
+                    changed_roles.append(form.role)
             if new_permissions:
                 RoleCategoryACL.objects.bulk_create(new_permissions)
 
-            acl_version.invalidate()
+            acl_version.invalidate_roles(changed_roles)
 
             message = _("Category %(name)s permissions have been changed.")
             messages.success(request, message % {'name': target.name})
@@ -196,7 +199,7 @@ class RoleCategoriesACL(RoleAdmin, generic.ModelFormView):
             if new_permissions:
                 RoleCategoryACL.objects.bulk_create(new_permissions)
 
-            acl_version.invalidate()
+            acl_version.invalidate_roles([target])
 
             message = _("Category permissions for role %(name)s have been changed.")
             messages.success(request, message % {'name': target.name})
@@ -1,24 +1,62 @@
-from misago.core import threadstore
+from misago.core import cachebuster, threadstore
 
 
 CACHE_KEY = 'misago_db_settings'
+SETTINGS_CACHEBUSTER = 'misago_settings'
+
+
+class SettingsSnapshot(object):
+    """
+    Process-wide settings read from cache or database for settings version
+
+    Snapshot is shared by all threads, so it's never changed after creation,
+    with exception of lazy settings values that are loaded on first access.
+    """
+    def __init__(self, version, settings):
+        self.version = version
+        self.settings = settings
+        self.lazy_values = None
+
+    def get_lazy_values(self):
+        if self.lazy_values is None:
+            from .models import Setting
+
+            lazy_values = {}
+            for setting in Setting.objects.filter(is_lazy=True).iterator():
+                lazy_values[setting.setting] = setting.value
+            self.lazy_values = lazy_values
+        return self.lazy_values
 
 
 class DBSettings(object):
+    _snapshot = None
+
     def __init__(self):
-        self._settings = self._read_cache()
+        self._settings = self._get_snapshot()
         self._overrides = {}
 
-    def _read_cache(self):
-        from misago.core.cache import cache
-
-        data = cache.get(CACHE_KEY, 'nada')
-        if data == 'nada':
-            data = self._read_db()
-            cache.set(CACHE_KEY, data)
-        return data
-
-    def _read_db(self):
+    @classmethod
+    def _get_snapshot(cls):
+        try:
+            version = cachebuster.get_version(SETTINGS_CACHEBUSTER)
+        except ValueError:
+            version = None  # settings are not versioned, don't share them
+
+        snapshot = cls._snapshot
+        if version is None or not snapshot or snapshot.version != version:
+            snapshot = SettingsSnapshot(version, cls._read_cache())
+            if version is not None:
+                cls._snapshot = snapshot
+        return snapshot
+
+    @classmethod
+    def _read_cache(cls):
+        # snapshot is already kept in process, skip two-tier cache's local tier
+        from misago.core.cache import get_or_compute, shared_cache
+        return get_or_compute(CACHE_KEY, cls._read_db, backend=shared_cache)
+
+    @classmethod
+    def _read_db(cls):
         from .models import Setting
 
         data = {}
@@ -39,46 +77,43 @@ class DBSettings(object):
 
     def get_public_settings(self):
         public_settings = {}
-        for name, setting in self._settings.items():
+        for name, setting in self._settings.settings.items():
             if setting['is_public']:
-                public_settings[name] = setting['value']
+                public_settings[name] = self._overrides.get(name, setting['value'])
         return public_settings
 
     def get_lazy_setting(self, setting):
-        from .models import Setting
-
         try:
-            if self._settings[setting]['is_lazy']:
-                if not self._settings[setting].get('real_value'):
-                    real_value = Setting.objects.get(setting=setting).value
-                    self._settings[setting]['real_value'] = real_value
-                return self._settings[setting]['real_value']
+            if self._settings.settings[setting]['is_lazy']:
+                if setting in self._overrides:
+                    return self._overrides[setting]
+                return self._settings.get_lazy_values()[setting]
             else:
                 raise ValueError("Setting %s is not lazy" % setting)
-        except (KeyError, Setting.DoesNotExist):
+        except KeyError:
             raise AttributeError("Setting %s is undefined" % setting)
 
     def flush_cache(self):
-        from misago.core.cache import cache
-        cache.delete(CACHE_KEY)
+        from misago.core.cache import shared_cache
+        shared_cache.delete(CACHE_KEY)
+        cachebuster.invalidate(SETTINGS_CACHEBUSTER)
 
     def __getattr__(self, attr):
         try:
-            return self._settings[attr]['value']
+            if attr in self._overrides:
+                return self._overrides[attr]
+            return self._settings.settings[attr]['value']
         except KeyError:
             raise AttributeError("Setting %s is undefined" % attr)
 
     def override_setting(self, setting, new_value):
-        if not setting in self._overrides:
-            self._overrides[setting] = self._settings[setting]['value']
-        self._settings[setting]['value'] = new_value
-        self._settings[setting]['real_value'] = new_value
+        if setting not in self._settings.settings:
+            raise KeyError(setting)
+        self._overrides[setting] = new_value
         return new_value
 
     def reset_settings(self):
-        for setting, original_value in self._overrides.items():
-            self._settings[setting]['value'] = original_value
-            self._settings[setting].pop('real_value', None)
+        self._overrides = {}
 
 
 class _DBSettingsGateway(object):
@@ -24,6 +24,41 @@ MISAGO_ACL_EXTENSIONS = [
 ]
 
 
+# Rebuild ACLs for all roles combinations in use right after permissions change
+# instead of letting users rebuild them on their next request.
+# Prewarming can also be ran manually with "prewarmacls" command.
+
+MISAGO_ACL_PREWARM_ON_INVALIDATE = False
+MISAGO_ACL_PREWARM_WORKERS = 4
+
+
+# Number of seconds for which processes may keep cache versions in memory
+# before checking shared cache for changes. Changes made in same process are
+# visible immediately. Set to 0 to check shared cache on every request.
+
+MISAGO_CACHEBUSTER_LOCAL_TTL = 5
+
+
+# Number of seconds after which processes add their cache statistics to
+# statistics kept in shared cache. Statistics can be inspected with
+# "cachestats" command or on "Cache" page in admin.
+
+MISAGO_CACHE_STATS_INTERVAL = 60
+
+
+# Number of seconds for which counts of items on paginated lists are cached.
+# Counts are also invalidated when counted content changes.
+
+MISAGO_COUNTS_CACHE_TIMEOUT = 300
+
+
+# Lists that database planner estimates to have more items than this number
+# are paginated using this estimate instead of exact count of items.
+# Set to 0 to always count items exactly.
+
+MISAGO_COUNTS_ESTIMATE_THRESHOLD = 100000
+
+
 # Custom markup extensions
 
 MISAGO_MARKUP_EXTENSIONS = []
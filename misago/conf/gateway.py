@@ -1,22 +1,39 @@
 from django.conf import settings as dj_settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 
 from . import defaults
 from .dbsettings import db_settings
 
 
 class SettingsGateway(object):
+    def __init__(self):
+        self._sources = {}
+
     def __getattr__(self, name):
         try:
-            return getattr(dj_settings, name)
-        except AttributeError:
+            return getattr(self._sources[name], name)
+        except KeyError:
             pass
 
-        try:
-            return getattr(defaults, name)
-        except AttributeError:
-            pass
+        source = self._find_source(name)
+        self._sources[name] = source
+        return getattr(source, name)
 
-        return getattr(db_settings, name)
+    def _find_source(self, name):
+        if hasattr(dj_settings, name):
+            return dj_settings
+        if hasattr(defaults, name):
+            return defaults
+        return db_settings
+
+    def _clear_sources(self):
+        self._sources = {}
 
 
 settings = SettingsGateway()
+
+
+@receiver(setting_changed)
+def clear_settings_sources(**kwargs):
+    settings._clear_sources()
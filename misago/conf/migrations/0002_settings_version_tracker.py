@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from misago.conf.dbsettings import SETTINGS_CACHEBUSTER
+from misago.core.migrationutils import cachebuster_register_cache
+
+
+def register_settings_version_tracker(apps, schema_editor):
+    cachebuster_register_cache(apps, SETTINGS_CACHEBUSTER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misago_conf', '0001_initial'),
+        ('misago_core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(register_settings_version_tracker),
+    ]
@@ -1,6 +1,7 @@
-from misago.core.cache import cache as default_cache
+from misago.core import cachebuster
+from misago.core.cache import shared_cache
 
-from .dbsettings import CACHE_KEY
+from .dbsettings import CACHE_KEY, SETTINGS_CACHEBUSTER
 from .hydrators import dehydrate_value
 from .utils import get_setting_value, has_custom_value
 
@@ -39,6 +40,8 @@ def migrate_settings_group(apps, group_fixture, old_group_key=None):
         old_value = custom_settings_values.pop(setting_fixture['setting'], None)
         migrate_setting(Setting, group, setting_fixture, order, old_value)
 
+    delete_settings_cache()
+
 
 def get_group(SettingsGroup, group_key):
     try:
@@ -94,4 +97,9 @@ def migrate_setting(Setting, group, setting_fixture, order, old_value):
 
 
 def delete_settings_cache():
-    default_cache.delete(CACHE_KEY)
+    shared_cache.delete(CACHE_KEY)
+
+    try:
+        cachebuster.invalidate(SETTINGS_CACHEBUSTER)
+    except ValueError:
+        pass  # settings version tracker is not registered yet
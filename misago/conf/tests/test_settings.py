@@ -3,7 +3,7 @@ from django.conf import settings as dj_settings
 from django.test import TestCase, override_settings
 
 from misago.conf import defaults
-from misago.conf.dbsettings import db_settings
+from misago.conf.dbsettings import DBSettings, db_settings
 from misago.conf.gateway import settings as gateway
 from misago.conf.migrationutils import migrate_settings_group
 from misago.core import threadstore
@@ -19,6 +19,73 @@ class DBSettingsTests(TestCase):
             db_settings.MISAGO_THREADS_PER_PAGE
 
 
+class DBSettingsSnapshotTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+        threadstore.clear()
+
+    def test_snapshot_is_shared(self):
+        """settings snapshot is shared between requests"""
+        snapshot = DBSettings()._settings
+
+        threadstore.clear()
+        with self.assertNumQueries(0):
+            self.assertIs(DBSettings()._settings, snapshot)
+
+    def test_flush_cache(self):
+        """flushing settings cache replaces snapshot"""
+        snapshot = DBSettings()._settings
+        db_settings.flush_cache()
+
+        self.assertIsNot(DBSettings()._settings, snapshot)
+
+    def test_override_setting(self):
+        """settings overrides don't outlive request"""
+        db_settings.override_setting('forum_name', 'Overridden')
+        self.assertEqual(db_settings.forum_name, 'Overridden')
+        self.assertEqual(gateway.forum_name, 'Overridden')
+
+        db_settings.reset_settings()
+        self.assertEqual(db_settings.forum_name, 'Misago')
+
+        db_settings.override_setting('forum_name', 'Overridden')
+        threadstore.clear()
+        self.assertEqual(db_settings.forum_name, 'Misago')
+
+    def test_lazy_settings_are_loaded_once(self):
+        """lazy settings are loaded in single query"""
+        test_group = {
+            'key': 'test_group',
+            'name': "Test settings",
+            'description': "Those are test settings.",
+            'settings': [
+                {
+                    'setting': 'lazy_fish_name',
+                    'name': "Fish's name",
+                    'value': "Lazy Eric",
+                    'is_lazy': True,
+                },
+                {
+                    'setting': 'lazy_cat_name',
+                    'name': "Cat's name",
+                    'value': "Lazy Tom",
+                    'is_lazy': True,
+                },
+            ],
+        }
+
+        migrate_settings_group(apps, test_group)
+        db_settings.forum_name
+
+        with self.assertNumQueries(1):
+            self.assertEqual(db_settings.get_lazy_setting('lazy_fish_name'), 'Lazy Eric')
+            self.assertEqual(db_settings.get_lazy_setting('lazy_cat_name'), 'Lazy Tom')
+
+        threadstore.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(db_settings.get_lazy_setting('lazy_fish_name'), 'Lazy Eric')
+
+
 class GatewaySettingsTests(TestCase):
     def tearDown(self):
         cache.clear()
@@ -38,6 +105,15 @@ class GatewaySettingsTests(TestCase):
         """file settings are overrideable"""
         self.assertEqual(gateway.MISAGO_THREADS_PER_PAGE, 1234)
 
+    def test_setting_source_is_remembered(self):
+        """gateway remembers where setting was found"""
+        self.assertEqual(gateway.MISAGO_THREADS_PER_PAGE, defaults.MISAGO_THREADS_PER_PAGE)
+        self.assertIs(gateway._sources['MISAGO_THREADS_PER_PAGE'], defaults)
+
+        with override_settings(MISAGO_THREADS_PER_PAGE=1234):
+            self.assertEqual(gateway.MISAGO_THREADS_PER_PAGE, 1234)
+        self.assertEqual(gateway.MISAGO_THREADS_PER_PAGE, defaults.MISAGO_THREADS_PER_PAGE)
+
     def test_setting_public(self):
         """get_public_settings returns public settings"""
         test_group = {
@@ -1,9 +1,18 @@
+from django.conf.urls import url
 from django.utils.translation import ugettext_lazy as _
 
+from .adminviews import cache_stats
+
 
 class MisagoAdminExtension(object):
     def register_urlpatterns(self, urlpatterns):
         urlpatterns.namespace(r'^system/', 'system')
+        urlpatterns.namespace(r'^cache/', 'cache', 'system')
+
+        urlpatterns.patterns(
+            'system:cache',
+            url(r'^$', cache_stats, name='index'),
+        )
 
     def register_navigation_nodes(self, site):
         site.add_node(
@@ -13,3 +22,11 @@ class MisagoAdminExtension(object):
             namespace='misago:admin:system',
             link='misago:admin:system:settings:index',
         )
+
+        site.add_node(
+            name=_("Cache"),
+            icon='fa fa-tachometer',
+            parent='misago:admin:system',
+            after='misago:admin:system:settings:index',
+            link='misago:admin:system:cache:index',
+        )
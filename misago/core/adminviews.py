@@ -0,0 +1,41 @@
+from django.contrib import messages
+from django.shortcuts import redirect
+from django.utils.translation import ugettext as _
+
+from misago.admin.views import render
+
+from .cachestats import get_stats, reset_stats
+
+
+def cache_stats(request):
+    if request.method == 'POST':
+        reset_stats()
+        messages.success(request, _("Cache statistics have been reset."))
+        return redirect('misago:admin:system:cache:index')
+
+    families = []
+    for family, stats in get_stats().items():
+        hits = stats['hits'] + stats['stale_hits']
+        lookups = hits + stats['misses']
+
+        family_stats = {
+            'name': family,
+            'hits': hits,
+            'stale_hits': stats['stale_hits'],
+            'misses': stats['misses'],
+            'hit_ratio': None,
+            'recomputes': stats['recomputes'],
+            'recompute_time': None,
+            'payload_bytes': None,
+            'invalidations': stats['invalidations'],
+        }
+
+        if lookups:
+            family_stats['hit_ratio'] = hits * 100.0 / lookups
+        if stats['recomputes']:
+            family_stats['recompute_time'] = stats['recompute_time'] // stats['recomputes']
+            family_stats['payload_bytes'] = stats['payload_bytes'] // stats['recomputes']
+
+        families.append(family_stats)
+
+    return render(request, 'misago/admin/cache/index.html', {'items': families})
@@ -1,8 +1,168 @@
+"""
+Misago's cache and helpers for values that are recomputed on cache miss
+
+get_or_compute stores values together with time they expire at and time it
+took to compute them. This lets it protect database from stampedes of
+workers recomputing same value at same time:
+
+- only worker that got recompute lock recomputes expired or invalid value,
+  other workers keep serving stale value until new one is in cache
+- if there's no value to serve, other workers wait for one to appear
+- values may be recomputed ahead of their expiration, with probability
+  that grows as expiration gets closer and with time value took to compute
+"""
+import pickle
+from math import log
+from random import random
+from time import sleep, time
+
 from django.core.cache import cache as default_cache
 from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from . import cachestats
 
 
 try:
     cache = caches['misago']
 except InvalidCacheBackendError:
     cache = default_cache
+
+# shared tier of two-tier cache, used by cachebuster for its own versions
+shared_cache = getattr(cache, 'shared_cache', cache)
+
+LOCK_TIMEOUT = 10
+STALE_TIMEOUT = 60
+WAIT_TIMEOUT = 2
+WAIT_INTERVAL = 0.05
+
+
+class CachedValue(object):
+    __slots__ = ('value', 'expires', 'delta')
+
+    def __init__(self, value, expires, delta):
+        self.value = value
+        self.expires = expires
+        self.delta = delta
+
+    def __getstate__(self):
+        return (self.value, self.expires, self.delta)
+
+    def __setstate__(self, state):
+        self.value, self.expires, self.delta = state
+
+    def is_expired(self, beta=1.0):
+        if self.expires is None:
+            return False
+        # probabilistic early expiration, see "Optimal Probabilistic Cache Stampede Prevention"
+        return time() - self.delta * beta * log(1.0 - random()) >= self.expires
+
+
+def get_or_compute(
+        key,
+        compute,
+        timeout=DEFAULT_TIMEOUT,
+        is_valid=None,
+        beta=1.0,
+        backend=cache,
+):
+    """
+    returns value from cache, computing it if its missing, expired or invalid
+
+    is_valid is optional function that receives cached value and returns False
+    if value should be recomputed. Invalid values are never returned, even
+    while other worker recomputes them.
+    """
+    cached = get_valid(backend, key, is_valid)
+    if cached is not None and not cached.is_expired(beta):
+        cachestats.record(key, 'hits')
+        return cached.value
+
+    # locks are short lived, keep them out of in-process tier of two-tier cache
+    locks_backend = getattr(backend, 'shared_cache', backend)
+
+    lock_key = '%s_lock' % key
+    if locks_backend.add(lock_key, True, LOCK_TIMEOUT):
+        cachestats.record(key, 'misses')
+        try:
+            return _compute_and_set(key, compute, timeout, backend)
+        finally:
+            locks_backend.delete(lock_key)
+
+    if cached is not None:
+        # serve expired value while other worker recomputes it
+        cachestats.record(key, 'stale_hits')
+        return cached.value
+
+    cachestats.record(key, 'misses')
+
+    waited = 0
+    while waited < WAIT_TIMEOUT:
+        sleep(WAIT_INTERVAL)
+        waited += WAIT_INTERVAL
+
+        cached = get_valid(backend, key, is_valid)
+        if cached is not None:
+            return cached.value
+
+    # other worker didn't finish in time, compute value ourselves
+    return _compute_and_set(key, compute, timeout, backend)
+
+
+def get_valid(backend, key, is_valid):
+    """returns CachedValue stored under key, or None if its missing or invalid"""
+    cached = backend.get(key)
+    if not isinstance(cached, CachedValue):
+        return None
+    if is_valid is not None and not is_valid(cached.value):
+        return None
+    return cached
+
+
+def _compute_and_set(key, compute, timeout, backend):
+    started_on = time()
+    value = compute()
+    set_computed(key, value, time() - started_on, timeout, backend)
+    return value
+
+
+def set_computed(key, value, delta=0, timeout=DEFAULT_TIMEOUT, backend=cache):
+    """stores value computed outside of get_or_compute in cache"""
+    cachestats.record(key, 'recomputes')
+    cachestats.record(key, 'recompute_time', delta * 1000)
+    cachestats.record(key, 'payload_bytes', len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+
+    if timeout is DEFAULT_TIMEOUT:
+        timeout = backend.default_timeout
+
+    if timeout is None:
+        backend.set(key, CachedValue(value, None, delta), None)
+    else:
+        expires = time() + timeout
+        backend.set(key, CachedValue(value, expires, delta), timeout + STALE_TIMEOUT)
+
+
+def replace_computed(key, value, backend=cache):
+    """
+    replaces value stored by get_or_compute, keeping its expiration
+
+    returns False if there was no value to replace
+    """
+    cached = backend.get(key)
+    if not isinstance(cached, CachedValue):
+        return False
+
+    if cached.expires is None:
+        backend.set(key, CachedValue(value, None, cached.delta), None)
+    else:
+        timeout = max(cached.expires - time(), 0) + STALE_TIMEOUT
+        backend.set(key, CachedValue(value, cached.expires, cached.delta), timeout)
+    return True
+
+
+def get_computed(key, default=None, backend=cache):
+    """returns value stored by get_or_compute, ignoring its expiration"""
+    cached = backend.get(key)
+    if isinstance(cached, CachedValue):
+        return cached.value
+    return default
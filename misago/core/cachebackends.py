@@ -0,0 +1,172 @@
+"""
+Two-tier cache backend
+
+Pairs bounded in-process LRU with TTL with shared cache backend, saving round
+trips to shared cache for hot values. To use it, point "misago" cache to it:
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+    },
+    'misago': {
+        'BACKEND': 'misago.core.cachebackends.TwoTierCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': 500,
+            'LOCAL_TIMEOUT': 30,
+        }
+    }
+}
+
+Local tier is only meant for values that never change under their keys, or
+that can be served outdated for up to LOCAL_TIMEOUT seconds. Setting,
+deleting or clearing values only updates local tier of current process, and
+other processes keep their local values until they expire. Values that have
+to be seen by all processes as soon as they change should be stored in
+misago.core.cache.shared_cache instead, or have their versions in keys.
+
+Invalidating "misago_cache" cachebuster drops local values in all processes
+once they notice new version.
+"""
+import pickle
+from collections import OrderedDict
+from threading import Lock
+from time import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+CACHEBUSTER = 'misago_cache'
+
+_MISSING = object()
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super(TwoTierCache, self).__init__(params)
+
+        options = params.get('OPTIONS', {})
+
+        self._shared_alias = location or 'default'
+        self._local = OrderedDict()
+        self._local_max_entries = int(options.get('LOCAL_MAX_ENTRIES', 500))
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 30)
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def shared_cache(self):
+        return caches[self._shared_alias]
+
+    def get_stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._local),
+        }
+
+    def get_tier_version(self):
+        from . import cachebuster
+
+        try:
+            return cachebuster.get_version(CACHEBUSTER)
+        except ValueError:
+            return None  # cachebuster is not registered, rely on ttl
+
+    def get_local(self, local_key, tier_version):
+        with self._lock:
+            entry = self._local.pop(local_key, None)
+            if entry is None:
+                return _MISSING
+
+            expires, entry_version, payload = entry
+            if expires <= time() or entry_version != tier_version:
+                return _MISSING
+
+            # reinsert entry to move it to the end of LRU
+            self._local[local_key] = entry
+
+        return pickle.loads(payload)
+
+    def set_local(self, local_key, value, tier_version, timeout=DEFAULT_TIMEOUT):
+        local_timeout = self._local_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            local_timeout = min(local_timeout, timeout)
+
+        if local_timeout <= 0:
+            self.delete_local(local_key)
+            return
+
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        entry = (time() + local_timeout, tier_version, payload)
+
+        with self._lock:
+            self._local.pop(local_key, None)
+            self._local[local_key] = entry
+
+            while len(self._local) > self._local_max_entries:
+                self._local.popitem(last=False)
+                self.evictions += 1
+
+    def delete_local(self, local_key):
+        with self._lock:
+            self._local.pop(local_key, None)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_key(key, version)
+        tier_version = self.get_tier_version()
+
+        if self.shared_cache.add(key, value, timeout, version):
+            self.set_local(local_key, value, tier_version, timeout)
+            return True
+
+        self.delete_local(local_key)
+        return False
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_key(key, version)
+        tier_version = self.get_tier_version()
+
+        value = self.get_local(local_key, tier_version)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+
+        value = self.shared_cache.get(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+
+        self.set_local(local_key, value, tier_version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_key(key, version)
+        tier_version = self.get_tier_version()
+
+        self.shared_cache.set(key, value, timeout, version)
+        self.set_local(local_key, value, tier_version, timeout)
+
+    def delete(self, key, version=None):
+        self.shared_cache.delete(key, version)
+        self.delete_local(self.make_key(key, version))
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared_cache.incr(key, delta, version)
+        self.delete_local(self.make_key(key, version))
+        return value
+
+    def clear(self):
+        self.shared_cache.clear()
+        with self._lock:
+            self._local.clear()
@@ -1,15 +1,43 @@
+from time import time
+
 from django.db.models import F
 
-from . import threadstore
+from . import cachestats, threadstore
+from .signals import caches_invalidated
 
 
 CACHE_KEY = 'misago_cachebuster'
 
 
 class CacheBusterController(object):
+    """
+    Cache versions are read from threadstore, then from process-local table,
+    then from shared cache and finally from database.
+
+    Process-local table is kept for MISAGO_CACHEBUSTER_LOCAL_TTL seconds,
+    which is how long other processes may take to notice invalidation.
+    Invalidations are visible in current process immediately.
+
+    Caches missing from versions are looked up again once per process-local
+    table's lifetime, so lookups of unregistered caches don't refresh
+    versions on every request.
+    """
+    def __init__(self, local_ttl=None):
+        self.local_ttl = local_ttl
+        self.local_data = None
+        self.local_expires = 0
+        self.local_misses = set()
+
+    def get_local_ttl(self):
+        if self.local_ttl is None:
+            from misago.conf import settings
+            return settings.MISAGO_CACHEBUSTER_LOCAL_TTL
+        return self.local_ttl
+
     def register_cache(self, cache):
         from .models import CacheVersion
         CacheVersion.objects.create(cache=cache)
+        self.clear_cache()
 
     def unregister_cache(self, cache):
         from .models import CacheVersion
@@ -19,6 +47,19 @@ class CacheBusterController(object):
             cache.delete()
         except CacheVersion.DoesNotExist:
             raise ValueError('Cache "%s" is not registered' % cache)
+        self.clear_cache()
+
+    def clear_cache(self):
+        from .cache import shared_cache
+
+        threadstore.set(CACHE_KEY, 'nada')
+        self.clear_local()
+        shared_cache.delete(CACHE_KEY)
+
+    def clear_local(self):
+        self.local_data = None
+        self.local_expires = 0
+        self.local_misses = set()
 
     @property
     def cache(self):
@@ -27,18 +68,21 @@ class CacheBusterController(object):
     def read_threadstore(self):
         data = threadstore.get(CACHE_KEY, 'nada')
         if data == 'nada':
-            data = self.read_cache()
+            data = self.read_local()
             threadstore.set(CACHE_KEY, data)
         return data
 
-    def read_cache(self):
-        from .cache import cache as default_cache
+    def read_local(self):
+        now = time()
+        if self.local_data is None or self.local_expires <= now:
+            self.local_data = self.read_cache()
+            self.local_expires = now + self.get_local_ttl()
+            self.local_misses = set()
+        return self.local_data
 
-        data = default_cache.get(CACHE_KEY, 'nada')
-        if data == 'nada':
-            data = self.read_db()
-            default_cache.set(CACHE_KEY, data)
-        return data
+    def read_cache(self):
+        from .cache import get_or_compute, shared_cache
+        return get_or_compute(CACHE_KEY, self.read_db, backend=shared_cache)
 
     def read_db(self):
         from .models import CacheVersion
@@ -48,32 +92,64 @@ class CacheBusterController(object):
             data[cache_version.cache] = cache_version.version
         return data
 
+    def refresh(self):
+        """drop process-local versions, used when cache is missing from them"""
+        threadstore.set(CACHE_KEY, 'nada')
+        self.clear_local()
+
     def get_cache_version(self, cache):
         try:
             return self.cache[cache]
         except KeyError:
-            raise ValueError('Cache "%s" is not registered' % cache)
+            if cache in self.local_misses:
+                raise ValueError('Cache "%s" is not registered' % cache)
 
-    def is_cache_valid(self, cache, version):
+        # cache may have been registered by other process
+        self.refresh()
         try:
-            return self.cache[cache] == version
+            return self.cache[cache]
         except KeyError:
+            self.local_misses.add(cache)
             raise ValueError('Cache "%s" is not registered' % cache)
 
+    def is_cache_valid(self, cache, version):
+        return self.get_cache_version(cache) == version
+
     def invalidate_cache(self, cache):
-        from .cache import cache as default_cache
+        from .cache import shared_cache
         from .models import CacheVersion
 
-        self.cache[cache] += 1
-        CacheVersion.objects.filter(cache=cache).update(version=F('version') + 1)
-        default_cache.delete(CACHE_KEY)
+        # process-local version may be stale, so new one is read from database
+        queryset = CacheVersion.objects.filter(cache=cache)
+        if not queryset.update(version=F('version') + 1):
+            raise ValueError('Cache "%s" is not registered' % cache)
+        version = queryset.values_list('version', flat=True)[0]
+
+        self.cache[cache] = version
+        self.update_local({cache: version})
+        shared_cache.delete(CACHE_KEY)
+
+        cachestats.record(cache, 'invalidations')
+        caches_invalidated.send(sender=self, caches=[cache])
 
     def invalidate_all(self):
-        from .cache import cache as default_cache
+        from .cache import shared_cache
         from .models import CacheVersion
 
         CacheVersion.objects.update(version=F('version') + 1)
-        default_cache.delete(CACHE_KEY)
+        data = self.read_db()
+
+        threadstore.set(CACHE_KEY, data)
+        self.update_local(data)
+        shared_cache.delete(CACHE_KEY)
+
+        for cache in data:
+            cachestats.record(cache, 'invalidations')
+        caches_invalidated.send(sender=self, caches=list(data))
+
+    def update_local(self, versions):
+        if self.local_data is not None:
+            self.local_data.update(versions)
 
 
 _controller = CacheBusterController()
@@ -102,3 +178,7 @@ def invalidate(cache_name):
 
 def invalidate_all():
     _controller.invalidate_all()
+
+
+def clear_local():
+    _controller.clear_local()
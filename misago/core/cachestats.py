@@ -0,0 +1,142 @@
+"""
+Cache statistics
+
+Counters are kept per cache keys family in process memory and added to
+counters in shared cache every MISAGO_CACHE_STATS_INTERVAL seconds, so they
+can be inspected for all processes together.
+"""
+from collections import OrderedDict
+from threading import Lock
+from time import time
+
+
+STATS_KEY = 'misago_cachestats_%s_%s'
+
+# (key or cachebuster name prefix, family) pairs, first matching prefix wins
+KEY_FAMILIES = (
+    ('acl_', 'acl'),
+    ('misago_acl', 'acl'),
+    ('misago_bans', 'bans'),
+    ('misago_cachebuster', 'cachebuster'),
+    ('misago_categories', 'categories'),
+    ('misago_counts', 'counts'),
+    ('misago_db_settings', 'settings'),
+    ('misago_posts_pages', 'posts_pages'),
+    ('misago_settings', 'settings'),
+    ('misago_threads_visibility', 'threads_visibility'),
+    ('misago_cache', 'cache'),
+)
+
+FAMILIES = (
+    'acl',
+    'bans',
+    'cachebuster',
+    'categories',
+    'counts',
+    'posts_pages',
+    'settings',
+    'threads_visibility',
+    'cache',
+    'other',
+)
+
+COUNTERS = (
+    'hits',
+    'misses',
+    'stale_hits',
+    'recomputes',
+    'recompute_time',
+    'payload_bytes',
+    'invalidations',
+)
+
+_lock = Lock()
+_stats = {}
+_flushed_on = [time()]
+
+
+def get_key_family(key):
+    for prefix, family in KEY_FAMILIES:
+        if key.startswith(prefix):
+            return family
+    return 'other'
+
+
+def record(key, counter, value=1):
+    """record value for counter of key's family, recompute_time is in ms"""
+    family = get_key_family(key)
+
+    with _lock:
+        family_stats = _stats.setdefault(family, {})
+        family_stats[counter] = family_stats.get(counter, 0) + int(value)
+
+    if time() - _flushed_on[0] >= get_stats_interval():
+        flush_stats()
+
+
+def get_stats_interval():
+    from misago.conf import settings
+    return settings.MISAGO_CACHE_STATS_INTERVAL
+
+
+def get_process_stats():
+    """returns counters recorded by this process since last flush"""
+    with _lock:
+        return dict((family, dict(stats)) for family, stats in _stats.items())
+
+
+def flush_stats():
+    """adds process counters to shared counters"""
+    from .cache import shared_cache
+
+    with _lock:
+        stats = dict(_stats)
+        _stats.clear()
+        _flushed_on[0] = time()
+
+    for family, family_stats in stats.items():
+        for counter, value in family_stats.items():
+            if not value:
+                continue
+
+            stats_key = STATS_KEY % (family, counter)
+            shared_cache.add(stats_key, 0, None)
+            try:
+                shared_cache.incr(stats_key, value)
+            except ValueError:
+                # counter was evicted between add and incr
+                shared_cache.set(stats_key, value, None)
+
+
+def get_stats():
+    """returns shared counters for all families"""
+    from .cache import shared_cache
+
+    flush_stats()
+
+    values = shared_cache.get_many(get_stats_keys())
+
+    stats = OrderedDict()
+    for family in FAMILIES:
+        stats[family] = OrderedDict()
+        for counter in COUNTERS:
+            stats[family][counter] = values.get(STATS_KEY % (family, counter), 0)
+    return stats
+
+
+def reset_stats():
+    from .cache import shared_cache
+
+    with _lock:
+        _stats.clear()
+        _flushed_on[0] = time()
+
+    shared_cache.delete_many(get_stats_keys())
+
+
+def get_stats_keys():
+    stats_keys = []
+    for family in FAMILIES:
+        for counter in COUNTERS:
+            stats_keys.append(STATS_KEY % (family, counter))
+    return stats_keys
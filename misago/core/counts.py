@@ -0,0 +1,194 @@
+"""
+Cached counts of lists items
+
+Paginator counts all items in list on every request, and for lists of
+threads or posts this count has to go through all visibility checks that
+list itself does. CachedCountPaginator caches those counts instead.
+
+Counts are cached under keys made of name of counted content, its current
+versions and hash of counting query, which includes all visibility filters
+that were applied to list for user. Content versions are changed when
+counted content changes, making its cached counts obsolete.
+
+Besides version of whole content, counts may depend on versions of content's
+scopes (eg. categories threads are in). Changes that are known to affect
+only some scopes replace only their versions, leaving counts of lists in
+other scopes cached. Versions are replaced after transaction that changed
+content is committed, so counts computed from uncommitted data aren't
+cached under new versions.
+
+If database planner estimates that list has more items than
+MISAGO_COUNTS_ESTIMATE_THRESHOLD, this estimate is used instead of exact
+count, and paginator flags its count as approximate. Paginator with
+approximate count doesn't trust it to validate pages numbers: it selects
+one item more than fits on page to tell if there is next page, and allows
+pages past the estimate.
+"""
+from functools import partial
+from hashlib import md5
+
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import transaction
+from django.db.models.query import QuerySet
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.utils.crypto import get_random_string
+from django.utils.encoding import force_bytes
+from django.utils.functional import cached_property
+
+from misago.conf import settings
+
+from .cache import get_or_compute, shared_cache
+from .pgutils import explain_query
+
+
+COUNTS_CACHE = 'misago_counts_%s_%s_%s'
+VERSION_CACHE = 'misago_counts_version_%s'
+SCOPE_VERSION_CACHE = 'misago_counts_version_%s_%s'
+
+
+def get_versions_keys(content, scopes=None):
+    if scopes is None:
+        return [VERSION_CACHE % content]
+    return [SCOPE_VERSION_CACHE % (content, scope) for scope in sorted(set(scopes))]
+
+
+def get_content_versions(content, scopes=None):
+    """returns versions of content and its scopes, creating missing ones"""
+    versions_keys = get_versions_keys(content) + get_versions_keys(content, scopes or ())
+    versions = shared_cache.get_many(versions_keys)
+
+    for version_key in versions_keys:
+        if version_key not in versions:
+            version = get_random_string(8)
+            if not shared_cache.add(version_key, version, None):
+                version = shared_cache.get(version_key, version)
+            versions[version_key] = version
+
+    return [versions[version_key] for version_key in versions_keys]
+
+
+def invalidate_counts(content, scopes=None):
+    """
+    makes cached counts of content obsolete once current transaction commits
+
+    If scopes are given, only counts depending on those scopes are affected.
+    """
+    versions_keys = get_versions_keys(content, scopes)
+    if versions_keys:
+        transaction.on_commit(partial(replace_versions, versions_keys))
+
+
+def replace_versions(versions_keys):
+    shared_cache.set_many(dict((key, get_random_string(8)) for key in versions_keys), None)
+
+
+def get_count(queryset, content, scopes=None):
+    """returns tuple of queryset's items count and flag telling if its approximate"""
+    queryset = queryset.order_by()
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0, False
+
+    query_hash = md5(force_bytes('%s%r' % (sql, params))).hexdigest()
+    versions_hash = md5(force_bytes(':'.join(get_content_versions(content, scopes)))).hexdigest()
+
+    count_key = COUNTS_CACHE % (content, versions_hash, query_hash)
+    return get_or_compute(
+        count_key,
+        partial(compute_count, queryset),
+        timeout=settings.MISAGO_COUNTS_CACHE_TIMEOUT,
+        backend=shared_cache,
+    )
+
+
+def compute_count(queryset):
+    threshold = settings.MISAGO_COUNTS_ESTIMATE_THRESHOLD
+    if threshold:
+        estimate = estimate_count(queryset)
+        if estimate >= threshold:
+            return estimate, True
+    return queryset.count(), False
+
+
+def estimate_count(queryset):
+    """returns number of rows database planner expects queryset to return"""
+    return explain_query(queryset)['Plan Rows']
+
+
+class CachedCountPaginator(Paginator):
+    """paginator that caches counts of querysets of content it was created for"""
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True,
+                 content=None, scopes=None):
+        super(CachedCountPaginator,
+              self).__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.content = content
+        self.scopes = scopes
+        self.is_count_approximate = False
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super(CachedCountPaginator, self).count
+
+        count, self.is_count_approximate = get_count(
+            self.object_list, self.content, self.scopes)
+        return count
+
+    def validate_number(self, number):
+        if not (self.count and self.is_count_approximate):
+            return super(CachedCountPaginator, self).validate_number(number)
+
+        # pages past estimated count may exist
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
+
+    def page(self, number):
+        if not (self.count and self.is_count_approximate):
+            return super(CachedCountPaginator, self).page(number)
+
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        has_next = len(object_list) > self.per_page
+        if not object_list and number > 1:
+            raise EmptyPage("That page contains no results")
+
+        # page that has no next page is last one
+        if has_next:
+            self.num_pages = max(self.num_pages, number + 1)
+        else:
+            self.num_pages = number
+
+        return ApproximatePage(object_list[:self.per_page], number, self, has_next)
+
+
+class ApproximatePage(Page):
+    """page of paginator with approximate count, that knows if there's next page"""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super(ApproximatePage, self).__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return self.paginator.per_page * (self.number - 1) + 1
+
+    def end_index(self):
+        return self.paginator.per_page * (self.number - 1) + len(self.object_list)
+
+
+def cached_count_paginator(content, scopes=None):
+    """returns paginator for paginate shortcut, that caches counts of content"""
+    return partial(CachedCountPaginator, content=content, scopes=scopes)
@@ -0,0 +1,93 @@
+"""
+Keyset (cursor) pagination
+
+Unlike Paginator, which selects pages with OFFSET and counts all items in
+queryset, cursor pagination selects items that come after or before item
+that was last or first on previous page, using unique field that queryset
+is ordered by. This makes every page as cheap to select as first one, but
+there are no page numbers or counters. Instead, pages have opaque cursors
+that are used to request next and previous pages.
+"""
+from django.http import Http404
+from django.utils.encoding import force_bytes, force_text
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+class CursorPage(object):
+    def __init__(self, object_list, after=None, before=None):
+        self.object_list = object_list
+        self.after = after
+        self.before = before
+
+    def has_next(self):
+        return self.after is not None
+
+    def has_previous(self):
+        return self.before is not None
+
+
+def encode_cursor(value):
+    return force_text(urlsafe_base64_encode(force_bytes(value)))
+
+
+def decode_cursor(cursor):
+    """returns int value of cursor or raises Http404 if cursor is invalid"""
+    try:
+        value = force_text(urlsafe_base64_decode(cursor))
+    except (ValueError, UnicodeDecodeError):
+        raise Http404()
+
+    if value.isdigit():
+        return int(value)
+    else:
+        raise Http404()
+
+
+def paginate_by_cursor(queryset, ordering, per_page, after=None, before=None):
+    """
+    returns CursorPage with items from queryset ordered by unique int field
+
+    ordering is field's name, prefixed with "-" if queryset should be ordered
+    descending. After and before are encoded cursors.
+    """
+    field = ordering.lstrip('-')
+    is_descending = ordering.startswith('-')
+    reverse_ordering = field if is_descending else '-%s' % field
+
+    if before:
+        lookup = '%s__gt' if is_descending else '%s__lt'
+        queryset = queryset.filter(**{lookup % field: decode_cursor(before)})
+        queryset = queryset.order_by(reverse_ordering)
+    else:
+        if after:
+            lookup = '%s__lt' if is_descending else '%s__gt'
+            queryset = queryset.filter(**{lookup % field: decode_cursor(after)})
+        queryset = queryset.order_by(ordering)
+
+    # select one item more than displayed to know if there's another page
+    object_list = list(queryset[:per_page + 1])
+    has_more = len(object_list) > per_page
+    object_list = object_list[:per_page]
+
+    if before:
+        object_list.reverse()
+        has_next = True
+        has_previous = has_more
+    else:
+        has_next = has_more
+        has_previous = bool(after)
+
+    page = CursorPage(object_list)
+    if object_list:
+        if has_next:
+            page.after = encode_cursor(getattr(object_list[-1], field))
+        if has_previous:
+            page.before = encode_cursor(getattr(object_list[0], field))
+    return page
+
+
+def cursor_pagination_dict(page):
+    return {
+        'after': page.after,
+        'before': page.before,
+    }
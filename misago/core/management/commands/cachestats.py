@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from misago.core.cachestats import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = "Displays cache statistics collected by all processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            dest='reset',
+            default=False,
+            help="Reset statistics after displaying them.",
+        )
+
+    def handle(self, *args, **options):
+        row_pattern = '%-20s %10s %10s %8s %10s %12s %12s %12s\n'
+
+        self.stdout.write(row_pattern % (
+            'family',
+            'hits',
+            'misses',
+            'ratio',
+            'recomputes',
+            'avg time',
+            'avg size',
+            'invalidated',
+        ))
+
+        for family, stats in get_stats().items():
+            self.stdout.write(row_pattern % (
+                family,
+                stats['hits'] + stats['stale_hits'],
+                stats['misses'],
+                format_ratio(stats),
+                stats['recomputes'],
+                format_average(stats['recompute_time'], stats['recomputes'], 'ms'),
+                format_average(stats['payload_bytes'], stats['recomputes'], 'B'),
+                stats['invalidations'],
+            ))
+
+        if options['reset']:
+            reset_stats()
+            self.stdout.write("\nStatistics have been reset.")
+
+
+def format_ratio(stats):
+    hits = stats['hits'] + stats['stale_hits']
+    if not hits + stats['misses']:
+        return '-'
+    return '%.1f%%' % (hits * 100.0 / (hits + stats['misses']))
+
+
+def format_average(total, count, unit):
+    if not count:
+        return '-'
+    return '%s%s' % (total // count, unit)
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from misago.core.cachebackends import CACHEBUSTER
+from misago.core.migrationutils import cachebuster_register_cache
+
+
+def register_cache_version_tracker(apps, schema_editor):
+    cachebuster_register_cache(apps, CACHEBUSTER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misago_core', '0002_basic_settings'),
+    ]
+
+    operations = [
+        migrations.RunPython(register_cache_version_tracker),
+    ]
@@ -1,4 +1,4 @@
-from .cache import cache as default_cache
+from .cache import shared_cache
 from .cachebuster import CACHE_KEY
 
 
@@ -21,4 +21,4 @@ def cachebuster_unregister_cache(apps, cache):
 
 
 def delete_cachebuster_cache():
-    default_cache.delete(CACHE_KEY)
+    shared_cache.delete(CACHE_KEY)
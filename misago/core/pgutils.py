@@ -1,5 +1,10 @@
+import json
+
 from django.core.paginator import Paginator
+from django.db import connections
 from django.db.migrations.operations import RunSQL
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.utils import six
 
 
 class CreatePartialIndex(RunSQL):
@@ -62,6 +67,54 @@ def batch_delete(queryset, step=50):
         queryset_exists = queryset.exists()
 
 
+def union_all(*querysets):
+    """
+    returns raw queryset with rows of all querysets of same model
+
+    Querysets are selected in parentheses, so each of them keeps its own
+    ordering and limit, but rows are returned in no particular order.
+    """
+    statements = []
+    params = []
+
+    for queryset in querysets:
+        try:
+            sql, queryset_params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            continue
+
+        statements.append('(%s)' % sql)
+        params.extend(queryset_params)
+
+    if not statements:
+        return []
+
+    queryset = querysets[0]
+    return queryset.model.objects.raw(' UNION ALL '.join(statements), params, using=queryset.db)
+
+
+def explain_query(queryset):
+    """returns plan database planner made for queryset"""
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, six.string_types):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def get_plan_indexes(plan):
+    """returns names of indexes used by plan and its subplans"""
+    indexes = set()
+    if 'Index Name' in plan:
+        indexes.add(plan['Index Name'])
+    for subplan in plan.get('Plans', []):
+        indexes.update(get_plan_indexes(subplan))
+    return indexes
+
+
 class CreatePartialCompositeIndex(CreatePartialIndex):
     CREATE_SQL = """
 CREATE INDEX %(index_name)s ON %(table)s (%(fields)s)
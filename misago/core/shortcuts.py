@@ -55,7 +55,11 @@ def pagination_dict(page):
 
     if page.start_index():
         pagination['before'] = page.start_index() - 1
-    pagination['more'] = page.paginator.count - page.end_index()
+    pagination['more'] = max(page.paginator.count - page.end_index(), 0)
+
+    # paginators caching counts may use estimates for very long lists
+    if hasattr(page.paginator, 'is_count_approximate'):
+        pagination['is_count_approximate'] = page.paginator.is_count_approximate
 
     return pagination
 
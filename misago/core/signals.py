@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+
+caches_invalidated = Signal(providing_args=["caches"])
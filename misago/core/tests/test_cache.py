@@ -0,0 +1,159 @@
+from contextlib import contextmanager
+from threading import Thread
+from time import sleep, time
+
+from misago.core import cache as cache_module
+from misago.core.cache import (
+    CachedValue, cache, get_computed, get_or_compute, replace_computed, set_computed)
+from misago.core.testutils import MisagoTestCase
+
+
+@contextmanager
+def patch_random(value):
+    """makes early expiration draw specified number instead of random one"""
+    random = cache_module.random
+    cache_module.random = lambda: value
+    try:
+        yield
+    finally:
+        cache_module.random = random
+
+
+class GetOrComputeTests(MisagoTestCase):
+    def test_compute_on_miss(self):
+        """value is computed on miss and read from cache later"""
+        computes = []
+
+        def compute():
+            computes.append(True)
+            return 'value'
+
+        self.assertEqual(get_or_compute('test_key', compute), 'value')
+        self.assertEqual(get_or_compute('test_key', compute), 'value')
+        self.assertEqual(len(computes), 1)
+        self.assertEqual(get_computed('test_key'), 'value')
+
+    def test_invalid_value_is_recomputed(self):
+        """value is recomputed if its invalid"""
+        set_computed('test_key', 'old')
+
+        value = get_or_compute('test_key', lambda: 'new', is_valid=lambda v: v == 'new')
+        self.assertEqual(value, 'new')
+
+    def test_replace_computed(self):
+        """replaced value keeps expiration of value it replaced"""
+        self.assertFalse(replace_computed('test_key', 'new'))
+        self.assertIsNone(get_computed('test_key'))
+
+        expires = time() + 60
+        cache.set('test_key', CachedValue('old', expires, 1))
+
+        self.assertTrue(replace_computed('test_key', 'new'))
+
+        cached = cache.get('test_key')
+        self.assertEqual(cached.value, 'new')
+        self.assertEqual(cached.expires, expires)
+        self.assertEqual(cached.delta, 1)
+
+    def test_serve_stale_value(self):
+        """stale value is served while other worker holds recompute lock"""
+        cache.set('test_key', CachedValue('stale', time() - 1, 0))
+        cache.add('test_key_lock', True)
+
+        self.assertEqual(get_or_compute('test_key', lambda: 'new'), 'stale')
+
+        cache.delete('test_key_lock')
+        self.assertEqual(get_or_compute('test_key', lambda: 'new'), 'new')
+
+    def test_invalid_value_is_not_served(self):
+        """invalid value isn't served while other worker holds recompute lock"""
+        def is_valid(value):
+            return value != 'invalid'
+
+        for expires in (time() + 60, time() - 1):
+            cache.set('test_key', CachedValue('invalid', expires, 0))
+            cache.add('test_key_lock', True)
+
+            def recompute():
+                sleep(0.2)
+                set_computed('test_key', 'recomputed', timeout=60)
+
+            worker = Thread(target=recompute)
+            worker.start()
+
+            value = get_or_compute('test_key', lambda: 'new', is_valid=is_valid)
+            worker.join()
+            self.assertEqual(value, 'recomputed')
+
+            # worker holding lock didn't store value in time
+            cache.set('test_key', CachedValue('invalid', expires, 0))
+
+            wait_timeout = cache_module.WAIT_TIMEOUT
+            cache_module.WAIT_TIMEOUT = 0.1
+            try:
+                value = get_or_compute('test_key', lambda: 'new', is_valid=is_valid)
+            finally:
+                cache_module.WAIT_TIMEOUT = wait_timeout
+            self.assertEqual(value, 'new')
+
+            cache.delete('test_key_lock')
+
+    def test_early_refresh(self):
+        """value that is costly to compute is refreshed before it expires"""
+        with patch_random(0.5):
+            cache.set('test_key', CachedValue('old', time() + 60, 3600))
+            self.assertEqual(get_or_compute('test_key', lambda: 'new'), 'new')
+
+            cache.set('test_key', CachedValue('old', time() + 60, 0))
+            self.assertEqual(get_or_compute('test_key', lambda: 'new'), 'old')
+
+        # unlikely draw keeps costly value until its closer to expiration
+        with patch_random(0.001):
+            cache.set('test_key', CachedValue('old', time() + 60, 3600))
+            self.assertEqual(get_or_compute('test_key', lambda: 'new'), 'old')
+
+    def test_concurrent_computes(self):
+        """value is computed once by concurrent workers"""
+        computes = []
+        results = []
+
+        def compute():
+            computes.append(True)
+            sleep(0.2)
+            return 'value'
+
+        def worker():
+            results.append(get_or_compute('test_key', compute))
+
+        workers = [Thread(target=worker) for _ in range(10)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(len(computes), 1)
+        self.assertEqual(results, ['value'] * 10)
+
+    def test_concurrent_stale_computes(self):
+        """concurrent workers serve stale value while its recomputed once"""
+        cache.set('test_key', CachedValue('stale', time() - 1, 0))
+
+        computes = []
+        results = []
+
+        def compute():
+            computes.append(True)
+            sleep(0.2)
+            return 'value'
+
+        def worker():
+            results.append(get_or_compute('test_key', compute))
+
+        workers = [Thread(target=worker) for _ in range(10)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(len(computes), 1)
+        self.assertEqual(sorted(results), ['stale'] * 9 + ['value'])
@@ -0,0 +1,131 @@
+from django.core.cache import caches
+
+from misago.core import cachebuster, threadstore
+from misago.core.cachebackends import CACHEBUSTER, TwoTierCache
+from misago.core.testutils import MisagoTestCase
+
+
+def get_cache(**options):
+    return TwoTierCache('default', {'OPTIONS': options})
+
+
+class TwoTierCacheTests(MisagoTestCase):
+    def setUp(self):
+        super(TwoTierCacheTests, self).setUp()
+        self.shared_cache = caches['default']
+
+    def test_get_set(self):
+        """values are stored in both tiers and read from local tier"""
+        cache = get_cache()
+        cache.set('test_key', {'value': 42})
+
+        self.assertEqual(self.shared_cache.get('test_key'), {'value': 42})
+
+        # value is still in local tier
+        self.shared_cache.delete('test_key')
+        self.assertEqual(cache.get('test_key'), {'value': 42})
+        self.assertEqual(cache.get_stats()['hits'], 1)
+
+    def test_get_from_shared_tier(self):
+        """values missing from local tier are read from shared tier"""
+        cache = get_cache()
+        self.shared_cache.set('test_key', 'value')
+
+        self.assertEqual(cache.get('test_key'), 'value')
+        self.assertEqual(cache.get('test_key'), 'value')
+        self.assertIsNone(cache.get('other_key'))
+        self.assertEqual(cache.get('other_key', 'nada'), 'nada')
+
+        self.assertEqual(cache.get_stats()['hits'], 1)
+        self.assertEqual(cache.get_stats()['misses'], 3)
+
+    def test_local_values_are_copies(self):
+        """changes to values returned from local tier don't leak to cache"""
+        cache = get_cache()
+        cache.set('test_key', {'value': 42})
+
+        cache.get('test_key')['value'] = 0
+        self.assertEqual(cache.get('test_key'), {'value': 42})
+
+    def test_local_ttl(self):
+        """local values expire"""
+        cache = get_cache(LOCAL_TIMEOUT=0)
+        cache.set('test_key', 'value')
+
+        self.shared_cache.delete('test_key')
+        self.assertIsNone(cache.get('test_key'))
+
+    def test_local_lru(self):
+        """least recently used values are evicted from local tier"""
+        cache = get_cache(LOCAL_MAX_ENTRIES=2)
+        cache.set('key_a', 'a')
+        cache.set('key_b', 'b')
+        cache.get('key_a')
+        cache.set('key_c', 'c')
+
+        self.shared_cache.clear()
+
+        self.assertEqual(cache.get('key_a'), 'a')
+        self.assertIsNone(cache.get('key_b'))
+        self.assertEqual(cache.get('key_c'), 'c')
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_add(self):
+        """add respects values already in shared tier"""
+        cache = get_cache()
+        self.shared_cache.set('test_key', 'shared')
+
+        self.assertFalse(cache.add('test_key', 'local'))
+        self.assertEqual(cache.get('test_key'), 'shared')
+
+        self.assertTrue(cache.add('other_key', 'local'))
+        self.assertEqual(cache.get('other_key'), 'local')
+
+    def test_delete_is_local(self):
+        """deleting value doesn't drop other local tiers"""
+        cache = get_cache()
+        other_cache = get_cache()
+
+        cache.set('test_key', 'value')
+        other_cache.set('test_key', 'value')
+        other_cache.set('other_key', 'value')
+
+        with self.assertNumQueries(0):
+            cache.delete('test_key')
+        self.shared_cache.clear()
+
+        self.assertIsNone(cache.get('test_key'))
+        self.assertEqual(other_cache.get('test_key'), 'value')
+        self.assertEqual(other_cache.get('other_key'), 'value')
+
+    def test_cachebuster_invalidates_local_tiers(self):
+        """invalidating cachebuster drops local tiers"""
+        cache = get_cache()
+        other_cache = get_cache()
+
+        cache.set('test_key', 'value')
+        other_cache.set('other_key', 'value')
+
+        cachebuster.invalidate(CACHEBUSTER)
+        self.shared_cache.clear()
+
+        self.assertIsNone(cache.get('test_key'))
+        self.assertIsNone(other_cache.get('other_key'))
+
+    def test_round_trips(self):
+        """hot values are read from shared tier once per process"""
+        cache = get_cache()
+
+        self.shared_cache.set('misago_categories_tree_root_category', {1: 'category'})
+        self.shared_cache.set('misago_threads_visibility_abc', {'categories': [1]})
+        self.shared_cache.set('acl_anonymous', {'can_browse': True})
+
+        for _ in range(10):
+            cache.get('misago_categories_tree_root_category')
+            cache.get('misago_threads_visibility_abc')
+            cache.get('acl_anonymous')
+            threadstore.clear()
+
+        # plain cache would make 30 round trips to shared cache
+        self.assertEqual(cache.get_stats()['misses'], 3)
+        self.assertEqual(cache.get_stats()['hits'], 27)
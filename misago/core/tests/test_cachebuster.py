@@ -1,5 +1,7 @@
-from misago.core import cachebuster
+from misago.core import cachebuster, threadstore
+from misago.core.cachebuster import CacheBusterController
 from misago.core.models import CacheVersion
+from misago.core.signals import caches_invalidated
 from misago.core.testutils import MisagoTestCase
 
 
@@ -71,3 +73,122 @@ class CacheBusterCacheTests(MisagoTestCase):
         self.assertEqual(new_version_a, 1)
         self.assertEqual(new_version_b, 1)
         self.assertEqual(new_version_c, 1)
+
+
+class CacheBusterLocalVersionsTests(MisagoTestCase):
+    def setUp(self):
+        super(CacheBusterLocalVersionsTests, self).setUp()
+
+        self.cache_name = 'eric_the_fish'
+        cachebuster.register(self.cache_name)
+
+        # controllers standing for two processes
+        self.process_a = CacheBusterController(local_ttl=60)
+        self.process_b = CacheBusterController(local_ttl=60)
+
+        self.process_a.get_cache_version(self.cache_name)
+        self.process_b.get_cache_version(self.cache_name)
+        threadstore.clear()
+
+    def test_versions_are_kept_in_process(self):
+        """versions are read from process-local table in next requests"""
+        with self.assertNumQueries(0):
+            self.assertEqual(self.process_a.get_cache_version(self.cache_name), 0)
+
+    def test_invalidation_is_visible_in_process(self):
+        """invalidation is visible in invalidating process immediately"""
+        self.process_a.invalidate_cache(self.cache_name)
+        self.assertEqual(self.process_a.get_cache_version(self.cache_name), 1)
+
+        threadstore.clear()
+        self.assertEqual(self.process_a.get_cache_version(self.cache_name), 1)
+
+    def test_invalidation_all_is_visible_in_process(self):
+        """invalidate_all is visible in invalidating process immediately"""
+        self.process_a.invalidate_all()
+        self.assertEqual(self.process_a.get_cache_version(self.cache_name), 1)
+
+        threadstore.clear()
+        self.assertEqual(self.process_a.get_cache_version(self.cache_name), 1)
+
+    def test_staleness_is_bounded(self):
+        """other processes see invalidation after their local versions expire"""
+        self.process_a.invalidate_cache(self.cache_name)
+        threadstore.clear()
+
+        # within staleness window process B keeps its version
+        self.assertEqual(self.process_b.get_cache_version(self.cache_name), 0)
+        threadstore.clear()
+
+        # after window passes, process B reads new version from shared cache
+        self.process_b.local_expires = 0
+        self.assertEqual(self.process_b.get_cache_version(self.cache_name), 1)
+
+    def test_invalidation_with_stale_version(self):
+        """invalidation in process with stale version uses version from database"""
+        self.process_a.invalidate_cache(self.cache_name)
+        self.process_a.invalidate_cache(self.cache_name)
+        threadstore.clear()
+
+        self.assertEqual(self.process_b.get_cache_version(self.cache_name), 0)
+        self.process_b.invalidate_cache(self.cache_name)
+        self.assertEqual(self.process_b.get_cache_version(self.cache_name), 3)
+
+        threadstore.clear()
+        self.assertEqual(self.process_b.get_cache_version(self.cache_name), 3)
+
+    def test_zero_ttl_disables_local_versions(self):
+        """controller with zero ttl reads shared cache on every request"""
+        process_c = CacheBusterController(local_ttl=0)
+        process_c.get_cache_version(self.cache_name)
+        threadstore.clear()
+
+        self.process_a.invalidate_cache(self.cache_name)
+        threadstore.clear()
+
+        self.assertEqual(process_c.get_cache_version(self.cache_name), 1)
+
+    def test_cache_registered_in_other_process(self):
+        """cache registered in other process is found in database"""
+        self.process_a.register_cache('eric_the_halibut')
+        self.assertEqual(self.process_b.get_cache_version('eric_the_halibut'), 0)
+
+        with self.assertRaises(ValueError):
+            self.process_b.get_cache_version('eric_the_lion')
+
+    def test_missing_cache_is_remembered(self):
+        """missing cache doesn't refresh versions until they expire"""
+        with self.assertRaises(ValueError):
+            self.process_a.get_cache_version('eric_the_lion')
+        threadstore.clear()
+
+        with self.assertNumQueries(0):
+            with self.assertRaises(ValueError):
+                self.process_a.get_cache_version('eric_the_lion')
+            self.assertEqual(self.process_a.get_cache_version(self.cache_name), 0)
+
+        # cache registered in other process is found after versions expire
+        self.process_b.register_cache('eric_the_lion')
+        threadstore.clear()
+
+        with self.assertRaises(ValueError):
+            self.process_a.get_cache_version('eric_the_lion')
+        threadstore.clear()
+
+        self.process_a.local_expires = 0
+        self.assertEqual(self.process_a.get_cache_version('eric_the_lion'), 0)
+
+    def test_invalidation_notification(self):
+        """invalidation sends caches_invalidated signal"""
+        invalidated_caches = []
+
+        def handle_invalidation(sender, caches, **kwargs):
+            invalidated_caches.extend(caches)
+
+        caches_invalidated.connect(handle_invalidation)
+        try:
+            self.process_a.invalidate_cache(self.cache_name)
+        finally:
+            caches_invalidated.disconnect(handle_invalidation)
+
+        self.assertEqual(invalidated_caches, [self.cache_name])
@@ -0,0 +1,121 @@
+from time import time
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils.six import StringIO
+
+from misago.admin.testutils import AdminTestCase
+from misago.core import cachestats
+from misago.core.cache import CachedValue, cache, get_or_compute
+from misago.core.management.commands import cachestats as cachestats_command
+from misago.core.testutils import MisagoTestCase
+
+
+class CacheStatsTests(MisagoTestCase):
+    def setUp(self):
+        super(CacheStatsTests, self).setUp()
+        cachestats.reset_stats()
+
+    def test_get_key_family(self):
+        """keys are grouped into families"""
+        self.assertEqual(cachestats.get_key_family('acl_anonymous'), 'acl')
+        self.assertEqual(cachestats.get_key_family('misago_acl_role_1'), 'acl')
+        self.assertEqual(cachestats.get_key_family('misago_categories_tree'), 'categories')
+        self.assertEqual(
+            cachestats.get_key_family('misago_categories_tree_private_threads'), 'categories'
+        )
+        self.assertEqual(cachestats.get_key_family('misago_cachebuster'), 'cachebuster')
+        self.assertEqual(cachestats.get_key_family('misago_cache'), 'cache')
+        self.assertEqual(cachestats.get_key_family('eric_the_fish'), 'other')
+
+    def test_record_stats(self):
+        """recorded stats are aggregated in shared cache"""
+        cachestats.record('acl_anonymous', 'hits')
+        cachestats.record('acl_anonymous', 'hits', 2)
+        cachestats.record('misago_acl', 'invalidations')
+
+        self.assertEqual(cachestats.get_process_stats()['acl'], {
+            'hits': 3,
+            'invalidations': 1,
+        })
+
+        stats = cachestats.get_stats()
+        self.assertEqual(stats['acl']['hits'], 3)
+        self.assertEqual(stats['acl']['invalidations'], 1)
+        self.assertEqual(stats['acl']['misses'], 0)
+        self.assertEqual(cachestats.get_process_stats(), {})
+
+        cachestats.record('acl_anonymous', 'hits')
+        self.assertEqual(cachestats.get_stats()['acl']['hits'], 4)
+
+        cachestats.reset_stats()
+        self.assertEqual(cachestats.get_stats()['acl']['hits'], 0)
+
+    def test_get_or_compute_stats(self):
+        """get_or_compute records hits, misses and recomputes"""
+        get_or_compute('eric_the_fish', lambda: 'fish')
+        get_or_compute('eric_the_fish', lambda: 'fish')
+
+        stats = cachestats.get_stats()['other']
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['recomputes'], 1)
+        self.assertTrue(stats['payload_bytes'])
+
+    def test_get_or_compute_stale_stats(self):
+        """stale values served by get_or_compute are recorded only as stale hits"""
+        cache.set('eric_the_fish', CachedValue('fish', time() - 1, 0))
+        cache.add('eric_the_fish_lock', True)
+
+        get_or_compute('eric_the_fish', lambda: 'fish')
+        get_or_compute('eric_the_fish', lambda: 'fish')
+
+        stats = cachestats.get_stats()['other']
+        self.assertEqual(stats['stale_hits'], 2)
+        self.assertEqual(stats['hits'], 0)
+        self.assertEqual(stats['misses'], 0)
+
+    def test_cachestats_command(self):
+        """cachestats command displays and resets stats"""
+        cachestats.record('acl_anonymous', 'hits', 3)
+
+        out = StringIO()
+        call_command(cachestats_command.Command(), reset=True, stdout=out)
+        command_output = out.getvalue()
+
+        self.assertIn('acl', command_output)
+        self.assertIn('Statistics have been reset.', command_output)
+        self.assertEqual(cachestats.get_stats()['acl']['hits'], 0)
+
+
+class CacheStatsAdminViewsTests(AdminTestCase):
+    def test_link_registered(self):
+        """admin index view contains cache link"""
+        response = self.client.get(reverse('misago:admin:system:settings:index'))
+
+        self.assertContains(response, reverse('misago:admin:system:cache:index'))
+
+    def test_stats_view(self):
+        """cache stats view displays stats"""
+        response = self.client.get(reverse('misago:admin:system:cache:index'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'threads_visibility')
+
+    def test_stats_view_stale_hit_ratio(self):
+        """cache stats view counts stale hits as hits"""
+        cachestats.reset_stats()
+        cachestats.record('misago_threads_visibility_1', 'stale_hits', 3)
+
+        response = self.client.get(reverse('misago:admin:system:cache:index'))
+        families = dict((i['name'], i) for i in response.context['items'])
+        self.assertEqual(families['threads_visibility']['hit_ratio'], 100.0)
+
+    def test_reset_stats(self):
+        """cache stats view resets stats"""
+        cachestats.record('acl_anonymous', 'hits', 3)
+
+        response = self.client.post(reverse('misago:admin:system:cache:index'))
+        self.assertEqual(response.status_code, 302)
+
+        self.assertEqual(cachestats.get_stats()['acl']['hits'], 0)
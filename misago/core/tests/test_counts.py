@@ -0,0 +1,137 @@
+from django.contrib.auth import get_user_model
+from django.core.paginator import EmptyPage
+from django.test import TestCase, override_settings
+
+from misago.core import counts
+from misago.core.counts import (
+    CachedCountPaginator, estimate_count, get_count, invalidate_counts)
+from misago.core.testutils import run_commit_hooks
+
+
+UserModel = get_user_model()
+
+
+class CountsTests(TestCase):
+    def setUp(self):
+        invalidate_counts('test')
+        run_commit_hooks()
+
+        for i in range(3):
+            UserModel.objects.create_user('User%s' % i, 'user%s@example.com' % i, 'Pass.123')
+
+    def test_get_count(self):
+        """get_count caches count until content is invalidated"""
+        queryset = UserModel.objects.all()
+        self.assertEqual(get_count(queryset, 'test'), (3, False))
+
+        UserModel.objects.filter(username='User0').delete()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_count(queryset, 'test'), (3, False))
+
+        invalidate_counts('test')
+        run_commit_hooks()
+        self.assertEqual(get_count(queryset, 'test'), (2, False))
+
+    def test_invalidate_on_commit(self):
+        """counts are invalidated after transaction is committed"""
+        queryset = UserModel.objects.all()
+        self.assertEqual(get_count(queryset, 'test'), (3, False))
+
+        UserModel.objects.filter(username='User0').delete()
+        invalidate_counts('test')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_count(queryset, 'test'), (3, False))
+
+        run_commit_hooks()
+        self.assertEqual(get_count(queryset, 'test'), (2, False))
+
+    def test_invalidate_scopes(self):
+        """invalidating scope invalidates only counts depending on it"""
+        queryset = UserModel.objects.all()
+        self.assertEqual(get_count(queryset, 'test', [1, 2]), (3, False))
+        self.assertEqual(get_count(queryset, 'test', [3]), (3, False))
+
+        UserModel.objects.filter(username='User0').delete()
+        invalidate_counts('test', [2])
+        run_commit_hooks()
+
+        self.assertEqual(get_count(queryset, 'test', [1, 2]), (2, False))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_count(queryset, 'test', [3]), (3, False))
+
+        # invalidating whole content invalidates all its scopes
+        invalidate_counts('test')
+        run_commit_hooks()
+
+        self.assertEqual(get_count(queryset, 'test', [3]), (2, False))
+
+    def test_users_counts_invalidation(self):
+        """users counts are invalidated only by changes to fields users lists depend on"""
+        queryset = UserModel.objects.filter(is_active=True)
+        self.assertEqual(get_count(queryset, 'users'), (3, False))
+
+        user = UserModel.objects.get(username='User0')
+        user.save(update_fields=['last_login', 'last_ip'])
+        run_commit_hooks()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_count(queryset, 'users'), (3, False))
+
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        run_commit_hooks()
+
+        self.assertEqual(get_count(queryset, 'users'), (2, False))
+
+    def test_get_count_filters(self):
+        """get_count caches counts of querysets with different filters separately"""
+        self.assertEqual(get_count(UserModel.objects.all(), 'test'), (3, False))
+        self.assertEqual(
+            get_count(UserModel.objects.filter(username='User0'), 'test'), (1, False))
+
+    @override_settings(MISAGO_COUNTS_ESTIMATE_THRESHOLD=1)
+    def test_get_count_estimate(self):
+        """get_count returns planner estimate for long lists"""
+        queryset = UserModel.objects.all()
+        self.assertEqual(get_count(queryset, 'test'), (estimate_count(queryset), True))
+
+    def test_paginator(self):
+        """paginator uses cached count"""
+        paginator = CachedCountPaginator(UserModel.objects.order_by('pk'), 2, content='test')
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
+        self.assertFalse(paginator.is_count_approximate)
+
+    @override_settings(MISAGO_COUNTS_ESTIMATE_THRESHOLD=1)
+    def test_paginator_approximate_count(self):
+        """paginator doesn't trust estimated count to validate pages"""
+        queryset = UserModel.objects.order_by('pk')
+        users = list(queryset)
+
+        estimate = counts.estimate_count
+        try:
+            for estimated_count in (1, 10):
+                counts.estimate_count = lambda queryset: estimated_count
+                invalidate_counts('test')
+                run_commit_hooks()
+
+                paginator = CachedCountPaginator(queryset, 1, orphans=1, content='test')
+                self.assertEqual(paginator.count, estimated_count)
+                self.assertTrue(paginator.is_count_approximate)
+
+                for number, user in enumerate(users, 1):
+                    page = paginator.page(number)
+                    self.assertEqual(list(page.object_list), [user])
+                    self.assertEqual(page.start_index(), number)
+                    self.assertEqual(page.end_index(), number)
+                    self.assertEqual(page.has_next(), number < len(users))
+                    if page.has_next():
+                        self.assertEqual(page.next_page_number(), number + 1)
+
+                self.assertEqual(paginator.num_pages, len(users))
+                with self.assertRaises(EmptyPage):
+                    paginator.page(len(users) + 1)
+        finally:
+            counts.estimate_count = estimate
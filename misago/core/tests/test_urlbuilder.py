@@ -0,0 +1,39 @@
+from django.test import TestCase
+from django.urls import get_script_prefix, reverse, set_script_prefix
+
+from misago.core.urlbuilder import build_url, clear_url_templates
+
+
+class BuildUrlTests(TestCase):
+    def setUp(self):
+        clear_url_templates()
+        self.script_prefix = get_script_prefix()
+
+    def tearDown(self):
+        set_script_prefix(self.script_prefix)
+
+    def test_build_url(self):
+        """build_url returns same URLs that reverse does"""
+        urls = [
+            ('misago:threads', {}),
+            ('misago:thread', {'slug': 'test-thread', 'pk': 42}),
+            ('misago:thread', {'slug': 'test-thread', 'pk': 42, 'page': 3}),
+            ('misago:thread-post', {'slug': 'test-thread', 'pk': 42, 'post': 1337}),
+            ('misago:user', {'slug': 'bob', 'pk': 7}),
+            ('misago:api:thread-post-likes', {'thread_pk': 42, 'pk': 1337}),
+        ]
+
+        for _ in range(2):
+            for viewname, kwargs in urls:
+                self.assertEqual(build_url(viewname, kwargs), reverse(viewname, kwargs=kwargs))
+
+    def test_build_url_script_prefix(self):
+        """build_url respects current script prefix"""
+        kwargs = {'slug': 'test-thread', 'pk': 42}
+        build_url('misago:thread', kwargs)
+
+        set_script_prefix('/forum/')
+
+        url = build_url('misago:thread', kwargs)
+        self.assertEqual(url, reverse('misago:thread', kwargs=kwargs))
+        self.assertTrue(url.startswith('/forum/'))
@@ -1,6 +1,7 @@
+from django.db import connection
 from django.test import TestCase
 
-from . import threadstore
+from . import cachebuster, threadstore
 from .cache import cache
 
 
@@ -9,6 +10,7 @@ class MisagoTestCase(TestCase):
 
     def clear_state(self):
         cache.clear()
+        cachebuster.clear_local()
         threadstore.clear()
 
     def setUp(self):
@@ -18,3 +20,11 @@ class MisagoTestCase(TestCase):
     def tearDown(self):
         self.clear_state()
         super(MisagoTestCase, self).tearDown()
+
+
+def run_commit_hooks():
+    """runs on_commit callbacks, because transaction of test case is never committed"""
+    callbacks = connection.run_on_commit
+    connection.run_on_commit = []
+    for _, callback in callbacks:
+        callback()
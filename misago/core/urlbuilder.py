@@ -0,0 +1,91 @@
+"""
+Fast URLs building
+
+reverse() looks view's name up in URLconf, builds URL from pattern and
+validates it against pattern's regex every time it's called, which adds
+up when serializers build few URLs for every item on the list.
+
+build_url calls reverse() once for every view name and set of kwargs
+names (as well as URLconf and active language, that may change URLs),
+and compiles its result into format string that following URLs for this
+view are built from. Script prefix is not compiled into format strings,
+it's added to URLs when they are built.
+
+Unlike reverse(), build_url doesn't validate kwargs values against URL
+patterns, so it should only be used with values that are known to be
+valid, like ids and slugs of models.
+"""
+import re
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils import six
+from django.utils.http import RFC3986_SUBDELIMS, urlquote
+from django.utils.translation import get_language
+
+
+# placeholders are numbers, so they match both ids and slugs patterns
+PLACEHOLDER = 1357913579
+SAFE_CHARS = RFC3986_SUBDELIMS + '/~:@'
+SAFE_VALUE = re.compile(r'^[-a-zA-Z0-9_.%s]*$' % re.escape(SAFE_CHARS))
+
+_templates = {}
+
+
+def build_url(viewname, kwargs=None):
+    kwargs = kwargs or {}
+
+    template_key = (viewname, tuple(sorted(kwargs)), get_urlconf(), get_language())
+    try:
+        template = _templates[template_key]
+    except KeyError:
+        template = compile_url_template(viewname, template_key[1])
+        _templates[template_key] = template
+
+    if template is None:
+        # URL couldn't be compiled, fall back to reverse()
+        return reverse(viewname, kwargs=kwargs)
+
+    values = {}
+    for name, value in kwargs.items():
+        values[name] = quote_value(value)
+    return get_script_prefix() + template % values
+
+
+def quote_value(value):
+    if isinstance(value, six.integer_types):
+        return value
+    if isinstance(value, six.string_types) and SAFE_VALUE.match(value):
+        return value
+    return urlquote(value, safe=SAFE_CHARS)
+
+
+def compile_url_template(viewname, kwargs_names):
+    """returns format string for view's URL without script prefix, or None"""
+    placeholders = {}
+    for i, name in enumerate(kwargs_names):
+        placeholders[name] = str(PLACEHOLDER + i)
+
+    url = reverse(viewname, kwargs=placeholders)
+
+    script_prefix = get_script_prefix()
+    if not url.startswith(script_prefix):
+        return None
+
+    template = url[len(script_prefix):].replace('%', '%%')
+    for name, placeholder in placeholders.items():
+        if template.count(placeholder) != 1:
+            return None
+        template = template.replace(placeholder, '%%(%s)s' % name)
+    return template
+
+
+def clear_url_templates():
+    _templates.clear()
+
+
+@receiver(setting_changed)
+def clear_changed_urls(setting, **kwargs):
+    if setting in ('ROOT_URLCONF', 'LANGUAGE_CODE'):
+        clear_url_templates()
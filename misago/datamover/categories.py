@@ -55,6 +55,8 @@ def move_categories(stdout, style):
             archive_pruned_in=Category.objects.get(pk=new_archive_pk),
         )
 
+    Category.objects.clear_cache()
+
 
 def get_root_tree():
     query = 'SELECT tree_id FROM misago_forum WHERE special = %s'
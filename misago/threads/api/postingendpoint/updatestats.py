@@ -1,6 +1,7 @@
 from django.db.models import F
 
 from misago.categories import THREADS_ROOT_NAME
+from misago.categories.counters import record_delta
 
 from . import PostingEndpoint, PostingMiddleware
 
@@ -15,13 +16,12 @@ class UpdateStatsMiddleware(PostingMiddleware):
         if post.is_unapproved:
             return  # don't update category on moderated post
 
-        if self.mode == PostingEndpoint.START:
-            category.threads = F('threads') + 1
-
         if self.mode != PostingEndpoint.EDIT:
-            category.set_last_thread(thread)
-            category.posts = F('posts') + 1
-            category.update_all = True
+            # don't lock category's row, record change to be folded into it later
+            if self.mode == PostingEndpoint.START:
+                record_delta(category, thread, threads=1, posts=1)
+            else:
+                record_delta(category, thread, posts=1)
 
     def update_thread(self, thread, post):
         if post.is_unapproved:
@@ -15,16 +15,20 @@ class ThreadsList(object):
 
         list_type = request.query_params.get('list', 'all')
 
+        # cursors switch list to keyset pagination, "?after=" requests its first page
+        after = request.query_params.get('after')
+        before = request.query_params.get('before')
+
         category = self.get_category(request, pk=request.query_params.get('category'))
-        threads = self.get_threads(request, category, list_type, page)
+        threads = self.get_threads(request, category, list_type, page, after, before)
 
         return Response(self.get_response_json(request, category, threads)['THREADS'])
 
     def get_category(self, request, pk=None):
         raise NotImplementedError('Threads list has to implement get_category(request, pk=None)')
 
-    def get_threads(self, request, category, list_type, page):
-        return self.threads(request, category, list_type, page)
+    def get_threads(self, request, category, list_type, page, after=None, before=None):
+        return self.threads(request, category, list_type, page, after, before)
 
     def get_response_json(self, request, category, threads):
         return threads.get_frontend_context()
@@ -1,13 +1,16 @@
 from django.contrib.auth import get_user_model
 from django.core.exceptions import PermissionDenied, ValidationError
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils import six
 from django.utils.translation import gettext as _
 
 from misago.acl import add_acl
+from misago.categories import THREADS_ROOT_NAME
 from misago.categories.models import Category
 from misago.categories.permissions import allow_browse_category, allow_see_category
 from misago.categories.serializers import CategorySerializer
+from misago.categories.tree import get_tree_index
 from misago.core.apipatch import ApiPatch
 from misago.core.shortcuts import get_int_or_404
 from misago.threads.moderation import threads as moderation
@@ -108,13 +111,15 @@ thread_patch_dispatcher.replace('category', patch_move)
 
 def patch_top_category(request, thread, value):
     category_pk = get_int_or_404(value)
-    root_category = get_object_or_404(
-        Category.objects.all_categories(include_root=True), pk=category_pk
-    )
 
-    categories = list(
-        Category.objects.all_categories()
-        .filter(id__in=request.user.acl_cache['visible_categories'])
+    tree_index = get_tree_index()
+    if category_pk not in tree_index:
+        raise Http404()
+    root_category = tree_index.get_category(category_pk)
+
+    root_id = tree_index.get_special_id(THREADS_ROOT_NAME)
+    categories = tree_index.get_categories(
+        [pk for pk in request.user.acl_cache['visible_categories'] if pk != root_id]
     )
     add_categories_to_items(root_category, categories, [thread])
     return {'top_category': CategorySerializer(thread.top_category).data}
@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand
+from django.db.models.sql.datastructures import EmptyResultSet
+
+from misago.acl import add_acl
+from misago.categories.models import Category
+from misago.conf import settings
+from misago.core.pgutils import explain_query, get_plan_indexes
+from misago.threads.models import Thread
+from misago.threads.permissions import exclude_invisible_posts
+from misago.threads.viewmodels.threads import get_threads_queryset
+from misago.users.models import AnonymousUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks if database uses indexes made for threads lists and thread pages queries. "
+        "Queries are checked on largest category and thread, as seen by guests."
+    )
+
+    def handle(self, *args, **options):
+        categories = list(Category.objects.all_categories())
+        category = max(categories, key=lambda c: c.threads) if categories else None
+        thread = Thread.objects.filter(
+            category__in=categories,
+        ).select_related('category').order_by('-replies').first()
+
+        if not thread:
+            self.stdout.write("No threads were found")
+            return
+
+        message = 'Checking lists queries on "%s" category and "%s" thread...\n'
+        self.stdout.write(message % (category.name, thread.title))
+
+        queries = self.get_queries(AnonymousUser(), categories, category, thread)
+
+        unindexed_queries = 0
+        checked_queries = 0
+
+        for name, queryset, index_name in queries:
+            try:
+                plan = explain_query(queryset)
+            except EmptyResultSet:
+                self.stdout.write("%s: guests can't see it, skipped" % name)
+                continue
+
+            checked_queries += 1
+
+            plan_indexes = sorted(get_plan_indexes(plan))
+            if index_name in plan_indexes:
+                self.stdout.write("%s: uses %s" % (name, index_name))
+            else:
+                unindexed_queries += 1
+                message = "%s: doesn't use %s (%s)"
+                self.stdout.write(
+                    message % (name, index_name, ', '.join(plan_indexes) or plan['Node Type'])
+                )
+
+        if unindexed_queries:
+            message = "\n%s of %s checked queries don't use their indexes"
+            self.stdout.write(message % (unindexed_queries, checked_queries))
+        else:
+            self.stdout.write("\nAll checked queries use their indexes")
+
+    def get_queries(self, user, categories, category, thread):
+        """returns list of (name, queryset, index name) tuples"""
+        category_categories = [
+            c for c in categories if c.lft >= category.lft and c.rght <= category.rght
+        ]
+
+        category_threads = get_threads_queryset(user, category_categories, 'all').filter(
+            weight=0,
+            category__in=category_categories,
+        ).order_by('-last_post_id')[:settings.MISAGO_THREADS_PER_PAGE]
+
+        all_threads = get_threads_queryset(user, categories, 'all').filter(
+            weight__lt=2,
+            category__in=categories,
+        ).order_by('-last_post_id')[:settings.MISAGO_THREADS_PER_PAGE]
+
+        add_acl(user, thread.category)
+
+        thread_posts = exclude_invisible_posts(
+            user,
+            thread.category,
+            thread.post_set.filter(is_event=False),
+        ).order_by('id')[:settings.MISAGO_POSTS_PER_PAGE]
+
+        thread_events = exclude_invisible_posts(
+            user,
+            thread.category,
+            thread.post_set.filter(is_event=True),
+        ).order_by('-id')[:settings.MISAGO_EVENTS_PER_PAGE]
+
+        return [
+            ('category threads', category_threads, 'misago_thread_unpinned_last_post_partial'),
+            ('all threads', all_threads, 'misago_thread_not_global_last_post_partial'),
+            ('thread posts', thread_posts, 'misago_post_thread_posts_partial'),
+            ('thread events', thread_events, 'misago_post_thread_events_partial'),
+        ]
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from misago.core.management.progressbar import show_progress
+from misago.core.pgutils import batch_update
+from misago.threads.models import Thread
+from misago.threads.postspages import (
+    VISIBILITY_ALL, VISIBILITY_APPROVED, compute_posts_pages, get_cached_posts_pages,
+    invalidate_posts_pages)
+
+
+class Command(BaseCommand):
+    help = "Checks if cached pages of threads posts match posts in database"
+
+    def handle(self, *args, **options):
+        threads_to_check = Thread.objects.count()
+
+        if not threads_to_check:
+            self.stdout.write("\n\nNo threads were found")
+        else:
+            self.check_threads(threads_to_check)
+
+    def check_threads(self, threads_to_check):
+        message = "Checking posts pages of %s threads...\n"
+        self.stdout.write(message % threads_to_check)
+
+        checked_count = 0
+        outdated_count = 0
+
+        show_progress(self, checked_count, threads_to_check)
+        start_time = time.time()
+        for thread in batch_update(Thread.objects.all()):
+            if self.is_outdated(thread):
+                invalidate_posts_pages(thread.pk)
+                outdated_count += 1
+
+            checked_count += 1
+            show_progress(self, checked_count, threads_to_check, start_time)
+
+        if outdated_count:
+            message = "\n\nOutdated posts pages of %s threads were removed from cache"
+            self.stdout.write(message % outdated_count)
+        else:
+            self.stdout.write("\n\nPosts pages of all threads are up to date")
+
+    def is_outdated(self, thread):
+        for visibility in (VISIBILITY_APPROVED, VISIBILITY_ALL):
+            cached = get_cached_posts_pages(thread, visibility)
+            if cached and cached != compute_posts_pages(thread, visibility, cached['step']):
+                return True
+        return False
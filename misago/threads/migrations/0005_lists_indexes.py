@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from misago.core.pgutils import CreatePartialCompositeIndex
+
+
+# visibility flags are included in indexes, so hidden and unapproved threads
+# and posts can be filtered out before their rows are read from tables
+class Migration(migrations.Migration):
+    dependencies = [
+        ('misago_threads', '0004_update_settings'),
+    ]
+
+    operations = [
+        # category's threads, ordered by last post
+        CreatePartialCompositeIndex(
+            model='Thread',
+            fields=['category_id', 'last_post_id', 'is_hidden', 'is_unapproved'],
+            index_name='misago_thread_unpinned_last_post_partial',
+            condition='weight = 0',
+        ),
+        # all threads, ordered by last post
+        CreatePartialCompositeIndex(
+            model='Thread',
+            fields=['last_post_id', 'category_id', 'is_hidden', 'is_unapproved'],
+            index_name='misago_thread_not_global_last_post_partial',
+            condition='weight < 2',
+        ),
+        # thread's posts, ordered by id
+        CreatePartialCompositeIndex(
+            model='Post',
+            fields=['thread_id', 'id', 'is_unapproved', 'is_hidden'],
+            index_name='misago_post_thread_posts_partial',
+            condition='is_event = FALSE',
+        ),
+        # thread's events, ordered by id
+        CreatePartialCompositeIndex(
+            model='Post',
+            fields=['thread_id', 'id', 'is_unapproved', 'is_hidden'],
+            index_name='misago_post_thread_events_partial',
+            condition='is_event = TRUE',
+        ),
+    ]
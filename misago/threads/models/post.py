@@ -91,6 +91,20 @@ class Post(models.Model):
     def __str__(self):
         return '%s...' % self.original[10:].strip()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super(Post, cls).from_db(db, field_names, values)
+        post._pages_state = post.get_pages_state()
+        return post
+
+    def get_pages_state(self):
+        """returns values of fields that decide on which page of which thread post is"""
+        return (
+            self.__dict__.get('thread_id'),
+            self.__dict__.get('is_event'),
+            self.__dict__.get('is_unapproved'),
+        )
+
     def delete(self, *args, **kwargs):
         from misago.threads.signals import delete_post
         delete_post.send(sender=self)
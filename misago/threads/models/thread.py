@@ -110,8 +110,9 @@ class Thread(models.Model):
     def move(self, new_category):
         from misago.threads.signals import move_thread
 
+        old_category = self.category
         self.category = new_category
-        move_thread.send(sender=self)
+        move_thread.send(sender=self, old_category=old_category)
 
     def synchronize(self):
         try:
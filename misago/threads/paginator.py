@@ -21,3 +21,34 @@ class PostsPaginator(Paginator):
         if top < self.count:
             top += 1
         return self._get_page(self.object_list[bottom:top], number, self)
+
+
+class PostsPagesPaginator(PostsPaginator):
+    """
+    posts paginator that selects pages by ranges of posts ids
+
+    Instead of counting and slicing object list, it takes ids of posts that
+    start pages and number of posts, as returned by postspages.get_posts_pages
+    """
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True,
+                 pages=None):
+        super(PostsPagesPaginator,
+              self).__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.pages_ids, self.posts_count = pages
+
+    @property
+    def count(self):
+        return self.posts_count
+
+    def page(self, number):
+        """returns a Page object for the given 1-based page number."""
+        number = self.validate_number(number)
+        if not self.pages_ids:
+            return self._get_page(self.object_list.none(), number, self)
+
+        # pages share their last and first posts
+        object_list = self.object_list.filter(id__gte=self.pages_ids[number - 1])
+        if number < self.num_pages:
+            object_list = object_list.filter(id__lte=self.pages_ids[number])
+        return self._get_page(object_list, number, self)
@@ -58,17 +58,19 @@ def build_acl(acl, roles, key_name):
     )
 
 
-def add_acl_to_attachment(user, attachment):
-    if user.is_authenticated and user.id == attachment.uploader_id:
-        attachment.acl.update({
-            'can_delete': True,
-        })
-    else:
-        user_can_delete = user.acl_cache['can_delete_other_users_attachments']
-        attachment.acl.update({
-            'can_delete': user.is_authenticated and user_can_delete,
-        })
+def add_acl_to_attachments(user, attachments):
+    user_can_delete = user.acl_cache['can_delete_other_users_attachments']
+
+    for attachment in attachments:
+        if user.is_authenticated and user.id == attachment.uploader_id:
+            attachment.acl.update({
+                'can_delete': True,
+            })
+        else:
+            attachment.acl.update({
+                'can_delete': user.is_authenticated and user_can_delete,
+            })
 
 
 def register_with(registry):
-    registry.acl_annotator(Attachment, add_acl_to_attachment)
+    registry.acl_batch_annotator(Attachment, add_acl_to_attachments)
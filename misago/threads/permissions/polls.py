@@ -98,24 +98,32 @@ def build_acl(acl, roles, key_name):
     )
 
 
-def add_acl_to_poll(user, poll):
-    poll.acl.update({
-        'can_vote': can_vote_poll(user, poll),
-        'can_edit': can_edit_poll(user, poll),
-        'can_delete': can_delete_poll(user, poll),
-        'can_see_votes': can_see_poll_votes(user, poll),
-    })
+def add_acl_to_polls(user, polls):
+    for poll in polls:
+        poll.acl.update({
+            'can_vote': can_vote_poll(user, poll),
+            'can_edit': can_edit_poll(user, poll),
+            'can_delete': can_delete_poll(user, poll),
+            'can_see_votes': can_see_poll_votes(user, poll),
+        })
 
 
-def add_acl_to_thread(user, thread):
-    thread.acl.update({
-        'can_start_poll': can_start_poll(user, thread),
-    })
+def add_acl_to_threads(user, threads):
+    if user.is_anonymous or not user.acl_cache.get('can_start_polls'):
+        # user can't start polls at all, don't bother checking threads
+        for thread in threads:
+            thread.acl['can_start_poll'] = False
+        return
+
+    for thread in threads:
+        thread.acl.update({
+            'can_start_poll': can_start_poll(user, thread),
+        })
 
 
 def register_with(registry):
-    registry.acl_annotator(Poll, add_acl_to_poll)
-    registry.acl_annotator(Thread, add_acl_to_thread)
+    registry.acl_batch_annotator(Poll, add_acl_to_polls)
+    registry.acl_batch_annotator(Thread, add_acl_to_threads)
 
 
 def allow_start_poll(user, target):
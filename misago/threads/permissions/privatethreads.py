@@ -151,10 +151,13 @@ def build_acl(acl, roles, key_name):
     return new_acl
 
 
-def add_acl_to_thread(user, thread):
-    if thread.thread_type.root_name != PRIVATE_THREADS_ROOT_NAME:
-        return
+def add_acl_to_threads(user, threads):
+    for thread in threads:
+        if thread.thread_type.root_name == PRIVATE_THREADS_ROOT_NAME:
+            add_acl_to_thread(user, thread)
 
+
+def add_acl_to_thread(user, thread):
     if not hasattr(thread, 'participant'):
         thread.participants_list = []
         thread.participant = None
@@ -167,7 +170,7 @@ def add_acl_to_thread(user, thread):
 
 
 def register_with(registry):
-    registry.acl_annotator(Thread, add_acl_to_thread)
+    registry.acl_batch_annotator(Thread, add_acl_to_threads)
 
 
 def allow_use_private_threads(user):
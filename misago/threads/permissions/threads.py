@@ -1,8 +1,10 @@
+from hashlib import md5
+
 from django import forms
 from django.core.exceptions import PermissionDenied
 from django.db.models import Q
 from django.http import Http404
-from django.utils import timezone
+from django.utils import six, timezone
 from django.utils.translation import ugettext_lazy as _
 from django.utils.translation import ungettext
 
@@ -11,6 +13,7 @@ from misago.acl.decorators import return_boolean
 from misago.acl.models import Role
 from misago.categories.models import Category, CategoryRole
 from misago.categories.permissions import get_categories_roles
+from misago.core.cache import cache
 from misago.core.forms import YesNoSwitch
 from misago.threads.models import Post, Thread
 
@@ -46,6 +49,25 @@ __all__ = [
     'exclude_invisible_posts',
 ]
 
+THREADS_VISIBILITY_CACHE = 'misago_threads_visibility_%s'
+
+# rules for threads visibility in category, in order they are OR-ed in query
+SHOW_ALL = 'all'
+SHOW_ACCEPTED_VISIBLE = 'accepted_visible'
+SHOW_ACCEPTED = 'accepted'
+SHOW_VISIBLE = 'visible'
+SHOW_OWNED = 'owned'
+SHOW_OWNED_VISIBLE = 'owned_visible'
+
+VISIBILITY_RULES = (
+    SHOW_ALL,
+    SHOW_ACCEPTED_VISIBLE,
+    SHOW_ACCEPTED,
+    SHOW_VISIBLE,
+    SHOW_OWNED,
+    SHOW_OWNED_VISIBLE,
+)
+
 
 class RolePermissionsForm(forms.Form):
     legend = _("Threads")
@@ -348,10 +370,57 @@ def build_category_acl(acl, category, categories_roles, key_name):
     return final_acl
 
 
+APPROVAL_FLAGS = ('require_threads_approval', 'require_replies_approval', 'require_edits_approval')
+
+
+def add_acl_to_categories(user, categories):
+    for category in categories:
+        add_acl_to_category(user, category)
+
+
 def add_acl_to_category(user, category):
     category_acl = user.acl_cache['categories'].get(category.pk, {})
 
-    category.acl.update({
+    category.acl.update(get_effective_category_acl(user, category.pk))
+
+    for approval_flag in APPROVAL_FLAGS:
+        category.acl[approval_flag] = getattr(category, approval_flag)
+        if user.is_authenticated and approval_flag in category_acl:
+            category.acl[approval_flag] = algebra.greater(
+                category.acl[approval_flag], category_acl[approval_flag]
+            )
+
+    if user.acl_cache['can_approve_content']:
+        category.acl.update({
+            'require_threads_approval': 0,
+            'require_replies_approval': 0,
+            'require_edits_approval': 0,
+        })
+
+
+def get_effective_category_acl(user, category_id):
+    """
+    returns category permissions as seen by annotators
+
+    Result depends only on user's ACL, so its memoized on ACL's categories
+    matrix for as long as matrix is alive (usually single request).
+    """
+    categories_acl = user.acl_cache['categories']
+
+    try:
+        memo = categories_acl.memo.setdefault('effective_category_acl', {})
+    except AttributeError:
+        memo = {}
+
+    if category_id not in memo:
+        memo[category_id] = build_effective_category_acl(
+            user, categories_acl.get(category_id, {})
+        )
+    return memo[category_id]
+
+
+def build_effective_category_acl(user, category_acl):
+    effective_acl = {
         'can_see_all_threads': 0,
         'can_see_own_threads': 0,
         'can_start_threads': 0,
@@ -376,14 +445,11 @@ def add_acl_to_category(user, category):
         'can_see_posts_likes': 0,
         'can_like_posts': 0,
         'can_approve_content': 0,
-        'require_threads_approval': category.require_threads_approval,
-        'require_replies_approval': category.require_replies_approval,
-        'require_edits_approval': category.require_edits_approval,
         'can_hide_events': 0,
-    })
+    }
 
     algebra.sum_acls(
-        category.acl,
+        effective_acl,
         acls=[category_acl],
         can_see_all_threads=algebra.greater,
         can_see_posts_likes=algebra.greater,
@@ -391,7 +457,7 @@ def add_acl_to_category(user, category):
 
     if user.is_authenticated:
         algebra.sum_acls(
-            category.acl,
+            effective_acl,
             acls=[category_acl],
             can_start_threads=algebra.greater,
             can_reply_threads=algebra.greater,
@@ -414,20 +480,16 @@ def add_acl_to_category(user, category):
             can_see_reports=algebra.greater,
             can_like_posts=algebra.greater,
             can_approve_content=algebra.greater,
-            require_threads_approval=algebra.greater,
-            require_replies_approval=algebra.greater,
-            require_edits_approval=algebra.greater,
             can_hide_events=algebra.greater,
         )
 
-    if user.acl_cache['can_approve_content']:
-        category.acl.update({
-            'require_threads_approval': 0,
-            'require_replies_approval': 0,
-            'require_edits_approval': 0,
-        })
+    effective_acl['can_see_own_threads'] = not effective_acl['can_see_all_threads']
+    return effective_acl
+
 
-    category.acl['can_see_own_threads'] = not category.acl['can_see_all_threads']
+def add_acl_to_threads(user, threads):
+    for thread in threads:
+        add_acl_to_thread(user, thread)
 
 
 def add_acl_to_thread(user, thread):
@@ -466,11 +528,21 @@ def add_acl_to_thread(user, thread):
         thread.acl['can_merge_posts'] = category_acl.get('can_merge_posts', False)
 
 
+def add_acl_to_posts(user, posts):
+    # thread-level permissions are resolved once per thread on the list
+    can_reply_threads = {}
+
+    for post in posts:
+        if post.is_event:
+            add_acl_to_event(user, post)
+        else:
+            if post.thread_id not in can_reply_threads:
+                can_reply_threads[post.thread_id] = can_reply_thread(user, post.thread)
+            add_acl_to_reply(user, post, can_reply_threads[post.thread_id])
+
+
 def add_acl_to_post(user, post):
-    if post.is_event:
-        add_acl_to_event(user, post)
-    else:
-        add_acl_to_reply(user, post)
+    add_acl_to_posts(user, [post])
 
 
 def add_acl_to_event(user, event):
@@ -487,25 +559,40 @@ def add_acl_to_event(user, event):
     })
 
 
-def add_acl_to_reply(user, post):
+def add_acl_to_reply(user, post, can_reply=None):
     category_acl = user.acl_cache['categories'].get(post.category_id, {})
 
+    if can_reply is None:
+        can_reply = can_reply_thread(user, post.thread)
+
     post.acl.update({
-        'can_reply': can_reply_thread(user, post.thread),
-        'can_edit': can_edit_post(user, post),
+        'can_reply': can_reply,
+        'can_edit': False,
         'can_see_hidden': post.is_first_post or category_acl.get('can_hide_posts'),
-        'can_unhide': can_unhide_post(user, post),
-        'can_hide': can_hide_post(user, post),
-        'can_delete': can_delete_post(user, post),
-        'can_protect': can_protect_post(user, post),
-        'can_approve': can_approve_post(user, post),
-        'can_move': can_move_post(user, post),
+        'can_unhide': False,
+        'can_hide': False,
+        'can_delete': False,
+        'can_protect': False,
+        'can_approve': False,
+        'can_move': False,
         'can_report': category_acl.get('can_report_content', False),
         'can_see_reports': category_acl.get('can_see_reports', False),
         'can_see_likes': category_acl.get('can_see_posts_likes', 0),
         'can_like': False,
     })
 
+    # anonymous users can't moderate posts, so don't bother checking
+    if user.is_authenticated:
+        post.acl.update({
+            'can_edit': can_edit_post(user, post),
+            'can_unhide': can_unhide_post(user, post),
+            'can_hide': can_hide_post(user, post),
+            'can_delete': can_delete_post(user, post),
+            'can_protect': can_protect_post(user, post),
+            'can_approve': can_approve_post(user, post),
+            'can_move': can_move_post(user, post),
+        })
+
     if not post.acl['can_see_hidden']:
         post.acl['can_see_hidden'] = post.id == post.thread.first_post_id
     if user.is_authenticated and post.acl['can_see_likes']:
@@ -513,9 +600,9 @@ def add_acl_to_reply(user, post):
 
 
 def register_with(registry):
-    registry.acl_annotator(Category, add_acl_to_category)
-    registry.acl_annotator(Thread, add_acl_to_thread)
-    registry.acl_annotator(Post, add_acl_to_post)
+    registry.acl_batch_annotator(Category, add_acl_to_categories)
+    registry.acl_batch_annotator(Thread, add_acl_to_threads)
+    registry.acl_batch_annotator(Post, add_acl_to_posts)
 
 
 def allow_see_thread(user, target):
@@ -912,106 +999,174 @@ def has_time_to_edit_post(user, target):
 
 
 def exclude_invisible_threads(user, categories, queryset):
-    show_all = []
-    show_accepted_visible = []
-    show_accepted = []
-    show_visible = []
-    show_owned = []
-    show_owned_visible = []
+    visibility = get_threads_visibility(user, categories)
+    conditions = compile_threads_visibility(user, visibility)
 
-    for category in categories:
-        add_acl(user, category)
+    if conditions:
+        return queryset.filter(conditions)
+    else:
+        return Thread.objects.none()
 
+
+def get_threads_visibility(user, categories):
+    """
+    returns threads visibility descriptor for user and categories
+
+    Descriptor depends only on user's ACL and categories, so it's memoized
+    on ACL for duration of request and cached under ACL's checksum
+    """
+    categories_ids = sorted(set(c.pk for c in categories))
+    acl_checksum = user.acl_cache.get('_checksum')
+
+    cache_key = THREADS_VISIBILITY_CACHE % md5(
+        ('%s:%s:%s' % (
+            acl_checksum,
+            int(user.is_authenticated),
+            ','.join(six.text_type(pk) for pk in categories_ids),
+        )).encode()
+    ).hexdigest()
+
+    try:
+        memo = user.acl_cache['categories'].memo.setdefault('threads_visibility', {})
+    except AttributeError:
+        memo = {}
+
+    if cache_key not in memo:
+        visibility = None
+        if acl_checksum:
+            visibility = cache.get(cache_key)
+        if visibility is None:
+            visibility = build_threads_visibility(user, categories)
+            if acl_checksum:
+                cache.set(cache_key, visibility)
+        memo[cache_key] = visibility
+    return memo[cache_key]
+
+
+def build_threads_visibility(user, categories):
+    """
+    returns tuple of (rule, categories ids ranges, categories ids) tuples
+
+    Runs of at least three consecutive categories ids sharing same rule are
+    merged into ranges. Categories that user can't browse are left out.
+    """
+    categories = list(categories)
+    add_acl(user, categories)
+
+    rules_categories = {}
+    for category in categories:
         if not (category.acl['can_see'] and category.acl['can_browse']):
             continue
 
+        rule = None
         can_hide = category.acl['can_hide_threads']
         if category.acl['can_see_all_threads']:
             can_mod = category.acl['can_approve_content']
 
             if can_mod and can_hide:
-                show_all.append(category)
+                rule = SHOW_ALL
             elif user.is_authenticated:
                 if not can_mod and not can_hide:
-                    show_accepted_visible.append(category)
+                    rule = SHOW_ACCEPTED_VISIBLE
                 elif not can_mod:
-                    show_accepted.append(category)
+                    rule = SHOW_ACCEPTED
                 elif not can_hide:
-                    show_visible.append(category)
+                    rule = SHOW_VISIBLE
             else:
-                show_accepted_visible.append(category)
+                rule = SHOW_ACCEPTED_VISIBLE
         elif user.is_authenticated:
             if can_hide:
-                show_owned.append(category)
+                rule = SHOW_OWNED
             else:
-                show_owned_visible.append(category)
+                rule = SHOW_OWNED_VISIBLE
 
-    conditions = None
-    if show_all:
-        conditions = Q(category__in=show_all)
+        if rule:
+            rules_categories.setdefault(rule, set()).add(category.pk)
 
-    if show_accepted_visible:
-        if user.is_authenticated:
-            condition = Q(
-                Q(starter=user) | Q(is_unapproved=False),
-                category__in=show_accepted_visible,
-                is_hidden=False,
-            )
-        else:
-            condition = Q(
-                category__in=show_accepted_visible,
-                is_hidden=False,
-                is_unapproved=False,
-            )
+    visibility = []
+    for rule in VISIBILITY_RULES:
+        if rule in rules_categories:
+            ranges, ids = merge_categories_ids(rules_categories[rule])
+            visibility.append((rule, ranges, ids))
+    return tuple(visibility)
 
-        if conditions:
-            conditions = conditions | condition
-        else:
-            conditions = condition
 
-    if show_accepted:
-        condition = Q(
-            Q(starter=user) | Q(is_unapproved=False),
-            category__in=show_accepted,
-        )
+def merge_categories_ids(categories_ids):
+    ranges = []
+    ids = []
 
-        if conditions:
-            conditions = conditions | condition
+    run = []
+    for category_id in sorted(categories_ids) + [None]:
+        if run and category_id is not None and category_id == run[-1] + 1:
+            run.append(category_id)
+            continue
+
+        if len(run) >= 3:
+            ranges.append((run[0], run[-1]))
         else:
-            conditions = condition
+            ids.extend(run)
+        run = [category_id]
+
+    return tuple(ranges), tuple(ids)
+
+
+def compile_threads_visibility(user, visibility):
+    """compiles threads visibility descriptor to Q object or None if no thread is visible"""
+    if len(visibility) == 1 and visibility[0][0] == SHOW_ALL:
+        # everything is visible, limit queryset to categories only
+        return compile_categories_condition(visibility[0][1], visibility[0][2])
 
-    if show_visible:
-        condition = Q(category__in=show_visible, is_hidden=False)
+    conditions = None
+    for rule, ranges, ids in visibility:
+        condition = compile_categories_condition(ranges, ids)
+
+        if rule == SHOW_ACCEPTED_VISIBLE:
+            if user.is_authenticated:
+                condition = Q(
+                    condition,
+                    Q(starter=user) | Q(is_unapproved=False),
+                    is_hidden=False,
+                )
+            else:
+                condition = Q(condition, is_hidden=False, is_unapproved=False)
+        elif rule == SHOW_ACCEPTED:
+            condition = Q(condition, Q(starter=user) | Q(is_unapproved=False))
+        elif rule == SHOW_VISIBLE:
+            condition = Q(condition, is_hidden=False)
+        elif rule == SHOW_OWNED:
+            condition = Q(condition, starter=user)
+        elif rule == SHOW_OWNED_VISIBLE:
+            condition = Q(condition, starter=user, is_hidden=False)
 
         if conditions:
             conditions = conditions | condition
         else:
             conditions = condition
 
-    if show_owned:
-        condition = Q(category__in=show_owned, starter=user)
+    return conditions
+
 
+def compile_categories_condition(ranges, ids):
+    conditions = None
+    for range_start, range_end in ranges:
+        condition = Q(category_id__gte=range_start, category_id__lte=range_end)
         if conditions:
             conditions = conditions | condition
         else:
             conditions = condition
 
-    if show_owned_visible:
-        condition = Q(
-            category__in=show_owned_visible,
-            starter=user,
-            is_hidden=False,
-        )
+    if ids:
+        if len(ids) == 1:
+            condition = Q(category_id=ids[0])
+        else:
+            condition = Q(category_id__in=ids)
 
         if conditions:
             conditions = conditions | condition
         else:
             conditions = condition
 
-    if conditions:
-        return queryset.filter(conditions)
-    else:
-        return Thread.objects.none()
+    return conditions
 
 
 def exclude_invisible_posts(user, category, queryset):
@@ -0,0 +1,211 @@
+"""
+Pages of thread's posts
+
+PostsPaginator slices posts list with OFFSET and counts all its posts,
+which gets slow on deep pages of threads with many replies.
+
+Instead, ids of posts that start pages and number of posts are kept in
+cache for every thread, and pages are selected by ranges of posts ids.
+They are kept for two classes of posts visibility: approved posts, and all
+posts for users that can approve them. Users that may see their own
+unapproved posts in thread fall back to PostsPaginator, and goto views find
+their pages from pages of approved posts and their unapproved posts.
+
+Replies are appended to thread's cached pages when their transaction is
+committed: reply that is first post of new page adds its id to ids of pages,
+and number of posts is incremented. Other changes that move posts between
+pages (deleting, approving or moving posts to other thread) remove thread's
+pages from cache, and they are computed again when thread is displayed next
+time. Cached pages of approved posts are also recomputed if their number of
+posts doesn't match thread's replies counter, so pages computed by reader
+while reply was being committed aren't served until they expire.
+
+Goto views use them to find post's page without counting posts before it.
+"""
+from bisect import bisect_right
+from functools import partial
+
+from django.db import connections
+
+from misago.core.cache import (
+    LOCK_TIMEOUT, get_computed, get_or_compute, replace_computed, shared_cache)
+
+from .paginator import PostsPagesPaginator
+
+
+POSTS_PAGES_CACHE = 'misago_posts_pages_%s_%s'
+POSTS_PAGES_TIMEOUT = 300
+
+VISIBILITY_APPROVED = 'approved'
+VISIBILITY_ALL = 'all'
+
+# ids of every step-th post (first posts of pages), number of all posts and last post id
+POSTS_PAGES_SQL = """
+SELECT id, total, last_id FROM (
+    SELECT
+        id,
+        row_number() OVER (ORDER BY id) AS position,
+        count(*) OVER () AS total,
+        max(id) OVER () AS last_id
+    FROM (%(posts)s) AS posts
+) AS positions
+WHERE mod(position - 1, %(step)s) = 0
+ORDER BY id
+"""
+
+
+def get_posts_visibility(user, thread):
+    """returns visibility class of thread's posts for user, or None if user has own class"""
+    if thread.category.acl['can_approve_content']:
+        return VISIBILITY_ALL
+    if user.is_anonymous or not thread.has_unapproved_posts:
+        return VISIBILITY_APPROVED
+    return None
+
+
+def get_posts_pages(thread, visibility, per_page):
+    """returns tuple of ids of posts starting pages and number of posts"""
+    # last post of page is repeated as first post of next page
+    step = per_page - 1
+    cached = get_or_compute(
+        POSTS_PAGES_CACHE % (thread.pk, visibility),
+        partial(compute_posts_pages, thread, visibility, step),
+        timeout=POSTS_PAGES_TIMEOUT,
+        is_valid=partial(is_posts_pages_valid, thread, visibility, step),
+        backend=shared_cache,
+    )
+    return cached['pages']
+
+
+def is_posts_pages_valid(thread, visibility, step, cached):
+    if cached['step'] != step or 'last_id' not in cached:
+        return False
+    if visibility == VISIBILITY_ALL and thread.has_unapproved_posts:
+        return True
+    # thread's replies counter counts approved posts other than first one
+    return cached['pages'][1] == thread.replies + 1
+
+
+def get_cached_posts_pages(thread, visibility):
+    """returns thread's posts pages that are in cache without computing them, or None"""
+    return get_computed(POSTS_PAGES_CACHE % (thread.pk, visibility), backend=shared_cache)
+
+
+def compute_posts_pages(thread, visibility, step):
+    queryset = thread.post_set.filter(is_event=False)
+    if visibility == VISIBILITY_APPROVED:
+        queryset = queryset.filter(is_unapproved=False)
+
+    pages_ids, posts_count, last_id = select_posts_pages(queryset, step)
+    return {
+        'step': step,
+        'pages': (pages_ids, posts_count),
+        'last_id': last_id,
+    }
+
+
+def select_posts_pages(queryset, step):
+    sql, params = queryset.order_by().values('id').query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(POSTS_PAGES_SQL % {'posts': sql, 'step': step}, params)
+        rows = cursor.fetchall()
+
+    if not rows:
+        return (), 0, None
+    return tuple(row[0] for row in rows), rows[0][1], rows[0][2]
+
+
+def get_post_page(pages, post_id, per_page, orphans=0):
+    """returns number of page that post (or event following it) is displayed on"""
+    # post repeated on next page is resolved to that page
+    page = max(1, bisect_right(pages[0], post_id))
+    paginator = PostsPagesPaginator(None, per_page, orphans, pages=pages)
+    return min(page, paginator.num_pages)
+
+
+def get_own_posts_page(thread, user, post_id, per_page, orphans=0):
+    """
+    returns number of page that post is displayed on for user that sees own unapproved posts
+
+    Position of post is found from cached pages of approved posts, approved
+    posts on its page of approved posts and user's unapproved posts in thread.
+    """
+    step = per_page - 1
+    pages_ids, approved_count = get_posts_pages(thread, VISIBILITY_APPROVED, per_page)
+
+    approved_before = 0
+    page_index = bisect_right(pages_ids, post_id) - 1
+    if page_index >= 0:
+        approved_before = page_index * step + thread.post_set.filter(
+            is_event=False,
+            is_unapproved=False,
+            id__gte=pages_ids[page_index],
+            id__lte=post_id,
+        ).count()
+
+    own_unapproved_queryset = thread.post_set.filter(
+        is_event=False,
+        is_unapproved=True,
+        poster=user,
+    )
+    own_unapproved_ids = list(own_unapproved_queryset.values_list('id', flat=True))
+    own_before = len([i for i in own_unapproved_ids if i <= post_id])
+
+    # post repeated on next page is resolved to that page
+    page = (max(approved_before + own_before, 1) - 1) // step + 1
+
+    posts_count = approved_count + len(own_unapproved_ids)
+    paginator = PostsPagesPaginator(None, per_page, orphans, pages=((), posts_count))
+    return min(page, paginator.num_pages)
+
+
+def append_post_to_pages(post):
+    """adds new reply to its thread's cached pages, or removes pages it can't be added to"""
+    visibilities = [VISIBILITY_ALL]
+    if not post.is_unapproved:
+        visibilities.append(VISIBILITY_APPROVED)
+
+    for visibility in visibilities:
+        cache_key = POSTS_PAGES_CACHE % (post.thread_id, visibility)
+
+        # share lock with get_or_compute, so pages aren't changed while they are computed
+        lock_key = '%s_lock' % cache_key
+        if not shared_cache.add(lock_key, True, LOCK_TIMEOUT):
+            shared_cache.delete(cache_key)
+            continue
+
+        try:
+            cached = get_computed(cache_key, backend=shared_cache)
+            if not cached or cached.get('last_id') is None:
+                continue
+
+            if post.pk <= cached['last_id']:
+                # replies were committed out of order, pages have to be computed again
+                shared_cache.delete(cache_key)
+                continue
+
+            pages_ids, posts_count = cached['pages']
+            if posts_count % cached['step'] == 0:
+                pages_ids += (post.pk, )
+
+            replace_computed(
+                cache_key,
+                {
+                    'step': cached['step'],
+                    'pages': (pages_ids, posts_count + 1),
+                    'last_id': post.pk,
+                },
+                backend=shared_cache,
+            )
+        finally:
+            shared_cache.delete(lock_key)
+
+
+def invalidate_posts_pages(*threads_ids, **kwargs):
+    visibilities = kwargs.get('visibilities', (VISIBILITY_APPROVED, VISIBILITY_ALL))
+
+    cache_keys = []
+    for thread_id in threads_ids:
+        for visibility in visibilities:
+            cache_keys.append(POSTS_PAGES_CACHE % (thread_id, visibility))
+    shared_cache.delete_many(cache_keys)
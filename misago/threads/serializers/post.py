@@ -1,8 +1,7 @@
 from rest_framework import serializers
 
-from django.urls import reverse
-
 from misago.core.serializers import MutableFields
+from misago.core.urlbuilder import build_url
 from misago.threads.models import Post
 from misago.users.serializers import UserSerializer as BaseUserSerializer
 
@@ -149,7 +148,7 @@ class PostSerializer(serializers.ModelSerializer, MutableFields):
 
     def get_last_editor_url(self, obj):
         if obj.last_editor_id:
-            return reverse(
+            return build_url(
                 'misago:user', kwargs={
                     'pk': obj.last_editor_id,
                     'slug': obj.last_editor_slug,
@@ -160,7 +159,7 @@ class PostSerializer(serializers.ModelSerializer, MutableFields):
 
     def get_hidden_by_url(self, obj):
         if obj.hidden_by_id:
-            return reverse(
+            return build_url(
                 'misago:user', kwargs={
                     'pk': obj.hidden_by_id,
                     'slug': obj.hidden_by_slug,
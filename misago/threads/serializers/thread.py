@@ -1,9 +1,8 @@
 from rest_framework import serializers
 
-from django.urls import reverse
-
 from misago.categories.serializers import CategorySerializer
 from misago.core.serializers import MutableFields
+from misago.core.urlbuilder import build_url
 from misago.threads.models import Thread
 
 from .poll import PollSerializer
@@ -120,7 +119,7 @@ class ThreadSerializer(serializers.ModelSerializer, MutableFields):
 
     def get_last_poster_url(self, obj):
         if obj.last_poster_id:
-            return reverse(
+            return build_url(
                 'misago:user', kwargs={
                     'slug': obj.last_poster_slug,
                     'pk': obj.last_poster_id,
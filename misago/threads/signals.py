@@ -1,14 +1,20 @@
+from functools import partial
+
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models.signals import pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import Signal, receiver
 
 from misago.categories.models import Category
 from misago.categories.signals import delete_category_content, move_category_content
+from misago.categories.synchronization import synchronize_categories
+from misago.core.counts import invalidate_counts
 from misago.core.pgutils import batch_delete, batch_update
 from misago.users.signals import delete_user_content, username_changed
 
-from .models import Attachment, Poll, PollVote, Post, PostEdit, PostLike, Thread
+from .models import (
+    Attachment, Poll, PollVote, Post, PostEdit, PostLike, Subscription, Thread, ThreadParticipant)
+from .postspages import VISIBILITY_APPROVED, append_post_to_pages, invalidate_posts_pages
 
 
 delete_post = Signal()
@@ -16,7 +22,20 @@ delete_thread = Signal()
 merge_post = Signal(providing_args=["other_post"])
 merge_thread = Signal(providing_args=["other_thread"])
 move_post = Signal()
-move_thread = Signal()
+move_thread = Signal(providing_args=["old_category"])
+
+# post fields that decide on which page of thread post is displayed
+POSTS_PAGES_FIELDS = ('thread', 'thread_id', 'is_event', 'is_unapproved')
+
+# fields that decide which lists thread or post is counted on
+THREADS_COUNTS_FIELDS = (
+    'category', 'category_id', 'weight', 'is_hidden', 'is_unapproved', 'starter', 'starter_id',
+    'first_post', 'first_post_id'
+)
+POSTS_COUNTS_FIELDS = (
+    'category', 'category_id', 'thread', 'thread_id', 'poster', 'poster_id', 'is_hidden',
+    'is_unapproved'
+)
 
 
 @receiver(merge_thread)
@@ -27,6 +46,8 @@ def merge_threads_posts(sender, **kwargs):
         thread=sender,
     )
 
+    transaction.on_commit(partial(invalidate_posts_pages, sender.pk))
+
 
 @receiver(merge_post)
 def merge_posts(sender, **kwargs):
@@ -69,6 +90,8 @@ def move_category_threads(sender, **kwargs):
     sender.pollvote_set.update(category=new_category)
     sender.subscription_set.update(category=new_category)
 
+    invalidate_counts('threads', [sender.pk, new_category.pk])
+
 
 @receiver(delete_user_content)
 def delete_user_threads(sender, **kwargs):
@@ -93,9 +116,7 @@ def delete_user_threads(sender, **kwargs):
             thread.save()
 
     if recount_categories:
-        for category in Category.objects.filter(id__in=recount_categories):
-            category.synchronize()
-            category.save()
+        synchronize_categories(recount_categories)
 
 
 @receiver(username_changed)
@@ -152,3 +173,84 @@ def remove_unparticipated_private_threads(sender, **kwargs):
         if thread.participants.count() == 1:
             with transaction.atomic():
                 thread.delete()
+
+
+def is_counted_change(counted_fields, update_fields):
+    return not update_fields or bool(set(update_fields).intersection(counted_fields))
+
+
+@receiver(post_save, sender=Thread)
+@receiver(post_delete, sender=Thread)
+def invalidate_thread_counts(sender, **kwargs):
+    if is_counted_change(THREADS_COUNTS_FIELDS, kwargs.get('update_fields')):
+        invalidate_counts('threads', [kwargs['instance'].category_id])
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_counts(sender, **kwargs):
+    # only first posts are counted on lists, and they go away with their threads
+    post = kwargs['instance']
+    if kwargs['created'] or not post.is_first_post:
+        return
+    if is_counted_change(POSTS_COUNTS_FIELDS, kwargs.get('update_fields')):
+        invalidate_counts('threads', [post.category_id])
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_subscription_counts(sender, **kwargs):
+    # subscriptions are updated when subscribed threads are read
+    if kwargs.get('created') is False:
+        return
+    invalidate_counts('threads', [kwargs['instance'].category_id])
+
+
+@receiver(post_save, sender=ThreadParticipant)
+@receiver(post_delete, sender=ThreadParticipant)
+def invalidate_participant_counts(sender, **kwargs):
+    invalidate_counts('threads', [Category.objects.private_threads().pk])
+
+
+@receiver(move_thread)
+def invalidate_moved_thread_counts(sender, **kwargs):
+    invalidate_counts('threads', [kwargs['old_category'].pk])
+
+
+@receiver(post_delete, sender=Thread)
+def invalidate_thread_posts_pages(sender, **kwargs):
+    transaction.on_commit(partial(invalidate_posts_pages, kwargs['instance'].pk))
+
+
+@receiver(post_save, sender=Post)
+def update_post_thread_pages(sender, **kwargs):
+    post = kwargs['instance']
+    pages_state = post.get_pages_state()
+    old_pages_state = getattr(post, '_pages_state', None)
+    post._pages_state = pages_state
+
+    if kwargs['created']:
+        if not post.is_event:
+            transaction.on_commit(partial(append_post_to_pages, post))
+        return
+
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not set(update_fields).intersection(POSTS_PAGES_FIELDS):
+        return
+    if pages_state == old_pages_state:
+        return
+
+    if old_pages_state and old_pages_state[:2] == pages_state[:2]:
+        # approval only changes pages of approved posts
+        transaction.on_commit(
+            partial(invalidate_posts_pages, post.thread_id, visibilities=[VISIBILITY_APPROVED])
+        )
+    else:
+        threads_ids = set([post.thread_id])
+        if old_pages_state and old_pages_state[0]:
+            threads_ids.add(old_pages_state[0])
+        transaction.on_commit(partial(invalidate_posts_pages, *threads_ids))
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_post_thread_pages(sender, **kwargs):
+    transaction.on_commit(partial(invalidate_posts_pages, kwargs['instance'].thread_id))
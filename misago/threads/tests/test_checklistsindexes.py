@@ -0,0 +1,85 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from misago.categories.models import Category
+from misago.threads import testutils
+from misago.threads.management.commands import checklistsindexes
+
+
+INDEXES = {
+    'category threads': 'misago_thread_unpinned_last_post_partial',
+    'all threads': 'misago_thread_not_global_last_post_partial',
+    'thread posts': 'misago_post_thread_posts_partial',
+    'thread events': 'misago_post_thread_events_partial',
+}
+
+
+class CheckListsIndexesTests(TestCase):
+    def test_no_threads(self):
+        """command works when there are no threads"""
+        command = checklistsindexes.Command()
+
+        out = StringIO()
+        call_command(command, stdout=out)
+        command_output = out.getvalue().strip()
+
+        self.assertEqual(command_output, "No threads were found")
+
+    def run_command(self, plan):
+        """runs command with EXPLAIN returning given plan for all queries"""
+        category = Category.objects.get(slug='first-category')
+        thread = testutils.post_thread(category)
+        testutils.reply_thread(thread)
+
+        explain_query = checklistsindexes.explain_query
+        checklistsindexes.explain_query = lambda queryset: plan
+        try:
+            out = StringIO()
+            call_command(checklistsindexes.Command(), stdout=out)
+        finally:
+            checklistsindexes.explain_query = explain_query
+
+        return out.getvalue().strip().splitlines()
+
+    def test_indexes_used(self):
+        """command reports queries that use their indexes"""
+        command_lines = self.run_command({
+            'Node Type': 'Limit',
+            'Plans': [{
+                'Node Type': 'Index Scan',
+                'Index Name': index_name
+            } for index_name in INDEXES.values()],
+        })
+
+        for name, index_name in INDEXES.items():
+            self.assertIn('%s: uses %s' % (name, index_name), command_lines)
+        self.assertEqual(command_lines[-1], "All checked queries use their indexes")
+
+    def test_indexes_not_used(self):
+        """command reports queries that don't use their indexes"""
+        command_lines = self.run_command({
+            'Node Type': 'Limit',
+            'Plans': [{
+                'Node Type': 'Index Scan',
+                'Index Name': 'misago_thread_pkey'
+            }],
+        })
+
+        for name, index_name in INDEXES.items():
+            self.assertIn(
+                "%s: doesn't use %s (misago_thread_pkey)" % (name, index_name), command_lines)
+        self.assertEqual(command_lines[-1], "4 of 4 checked queries don't use their indexes")
+
+    def test_check_indexes(self):
+        """command explains lists queries on database"""
+        category = Category.objects.get(slug='first-category')
+        thread = testutils.post_thread(category)
+        testutils.reply_thread(thread)
+
+        out = StringIO()
+        call_command(checklistsindexes.Command(), stdout=out)
+        command_lines = out.getvalue().strip().splitlines()
+
+        for name in INDEXES:
+            self.assertTrue([l for l in command_lines if l.startswith('%s: ' % name)])
@@ -0,0 +1,59 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from misago.categories.models import Category
+from misago.threads import testutils
+from misago.threads.management.commands import checkpostspages
+from misago.threads.postspages import (
+    VISIBILITY_APPROVED, get_cached_posts_pages, get_posts_pages)
+
+
+class CheckPostsPagesTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.get(slug='first-category')
+
+    def test_no_threads(self):
+        """command works when there are no threads"""
+        command = checkpostspages.Command()
+
+        out = StringIO()
+        call_command(command, stdout=out)
+        command_output = out.getvalue().strip()
+
+        self.assertEqual(command_output, "No threads were found")
+
+    def test_pages_up_to_date(self):
+        """command leaves up to date pages in cache"""
+        thread = testutils.post_thread(self.category)
+        testutils.reply_thread(thread)
+        get_posts_pages(thread, VISIBILITY_APPROVED, 5)
+
+        command = checkpostspages.Command()
+
+        out = StringIO()
+        call_command(command, stdout=out)
+        command_output = out.getvalue().splitlines()[-1].strip()
+
+        self.assertEqual(command_output, "Posts pages of all threads are up to date")
+        self.assertIsNotNone(get_cached_posts_pages(thread, VISIBILITY_APPROVED))
+
+    def test_pages_outdated(self):
+        """command removes outdated pages from cache"""
+        thread = testutils.post_thread(self.category)
+        reply = testutils.reply_thread(thread)
+        get_posts_pages(thread, VISIBILITY_APPROVED, 5)
+
+        # update post without sending signals
+        thread.post_set.filter(pk=reply.pk).update(is_unapproved=True)
+
+        command = checkpostspages.Command()
+
+        out = StringIO()
+        call_command(command, stdout=out)
+        command_output = out.getvalue().splitlines()[-1].strip()
+
+        self.assertEqual(
+            command_output, "Outdated posts pages of 1 threads were removed from cache"
+        )
+        self.assertIsNone(get_cached_posts_pages(thread, VISIBILITY_APPROVED))
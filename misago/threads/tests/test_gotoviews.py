@@ -131,6 +131,20 @@ class GotoLastTests(GotoViewTestCase):
         response = self.client.get(response['location'])
         self.assertContains(response, post.get_absolute_url())
 
+    def test_goto_last_post_on_page_with_tail(self):
+        """last post on page with tail redirect url is valid"""
+        for _ in range((settings.MISAGO_POSTS_PER_PAGE - 1) * 2 + settings.MISAGO_POSTS_TAIL):
+            post = testutils.reply_thread(self.thread)
+
+        response = self.client.get(self.thread.get_last_post_url())
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            response['location'], GOTO_PAGE_URL % (self.thread.get_absolute_url(), 2, post.pk)
+        )
+
+        response = self.client.get(response['location'])
+        self.assertContains(response, post.get_absolute_url())
+
 
 class GotoNewTests(GotoViewTestCase):
     def test_goto_first_post(self):
@@ -0,0 +1,232 @@
+from functools import partial
+
+from misago.acl import add_acl
+from misago.acl import api as acl_api
+from misago.acl.testutils import override_acl
+from misago.categories.models import Category
+from misago.threads import testutils
+from misago.threads.permissions import threads as threads_permissions
+from misago.users.testutils import AuthenticatedUserTestCase
+
+
+MEMBER_ACL = {
+    'can_see': 1,
+    'can_browse': 1,
+    'can_see_all_threads': 1,
+    'can_start_threads': 1,
+    'can_reply_threads': 1,
+    'can_edit_posts': 1,
+    'can_hide_posts': 0,
+    'can_hide_own_posts': 1,
+    'can_protect_posts': 0,
+    'can_move_posts': 0,
+    'can_close_threads': 0,
+    'can_approve_content': 0,
+    'can_report_content': 1,
+    'can_see_reports': 0,
+    'can_see_posts_likes': 2,
+    'can_like_posts': 1,
+    'can_hide_events': 0,
+    'post_edit_time': 0,
+}
+
+MODERATOR_ACL = {
+    'can_see': 1,
+    'can_browse': 1,
+    'can_see_all_threads': 1,
+    'can_start_threads': 1,
+    'can_reply_threads': 1,
+    'can_edit_posts': 2,
+    'can_hide_posts': 2,
+    'can_hide_own_posts': 2,
+    'can_protect_posts': 1,
+    'can_move_posts': 1,
+    'can_close_threads': 1,
+    'can_approve_content': 1,
+    'can_report_content': 1,
+    'can_see_reports': 1,
+    'can_see_posts_likes': 2,
+    'can_like_posts': 1,
+    'can_hide_events': 2,
+    'post_edit_time': 0,
+}
+
+
+class PostsBatchACLTests(AuthenticatedUserTestCase):
+    def setUp(self):
+        super(PostsBatchACLTests, self).setUp()
+
+        self.category = Category.objects.get(slug='first-category')
+        self.thread = testutils.post_thread(category=self.category)
+
+        for _ in range(24):
+            testutils.reply_thread(self.thread, poster=self.user)
+            testutils.reply_thread(self.thread)
+        testutils.reply_thread(self.thread, is_event=True)
+
+    def override_acl(self, category_acl):
+        new_acl = self.user.acl_cache
+        new_acl['categories'][self.category.pk].update(category_acl)
+        override_acl(self.user, new_acl)
+
+    def get_posts(self):
+        posts = list(self.thread.post_set.order_by('id'))
+        for post in posts:
+            post.category = self.category
+            post.thread = self.thread
+        return posts
+
+    def assertPostsAcls(self, posts, first_post, own_reply, other_reply, event):
+        self.assertEqual(len(posts), 50)
+        for post in posts:
+            if post.is_event:
+                self.assertEqual(post.acl, event)
+            elif post.is_first_post:
+                self.assertEqual(post.acl, first_post)
+            elif post.poster_id == self.user.pk:
+                self.assertEqual(post.acl, own_reply)
+            else:
+                self.assertEqual(post.acl, other_reply)
+
+    def test_member_posts_acls(self):
+        """posts page annotated as batch has member's ACLs"""
+        self.override_acl(MEMBER_ACL)
+
+        posts = self.get_posts()
+        add_acl(self.user, posts)
+
+        common_acl = {
+            'can_reply': True,
+            'can_protect': False,
+            'can_approve': False,
+            'can_move': False,
+            'can_delete': False,
+            'can_report': 1,
+            'can_see_reports': 0,
+            'can_see_likes': 2,
+            'can_like': 1,
+        }
+
+        first_post = dict(common_acl, **{
+            'can_edit': False,
+            'can_see_hidden': True,
+            'can_unhide': False,
+            'can_hide': False,
+        })
+        own_reply = dict(common_acl, **{
+            'can_edit': True,
+            'can_see_hidden': False,
+            'can_unhide': True,
+            'can_hide': True,
+        })
+        other_reply = dict(common_acl, **{
+            'can_edit': False,
+            'can_see_hidden': False,
+            'can_unhide': False,
+            'can_hide': False,
+        })
+        event = {
+            'can_see_hidden': False,
+            'can_hide': False,
+            'can_delete': False,
+        }
+
+        self.assertPostsAcls(posts, first_post, own_reply, other_reply, event)
+
+    def test_moderator_posts_acls(self):
+        """posts page annotated as batch has moderator's ACLs"""
+        self.override_acl(MODERATOR_ACL)
+
+        posts = self.get_posts()
+        add_acl(self.user, posts)
+
+        common_acl = {
+            'can_reply': True,
+            'can_edit': True,
+            'can_protect': True,
+            'can_report': 1,
+            'can_see_reports': 1,
+            'can_see_likes': 2,
+            'can_like': 1,
+        }
+
+        first_post = dict(common_acl, **{
+            'can_see_hidden': True,
+            'can_unhide': False,
+            'can_hide': False,
+            'can_delete': False,
+            'can_approve': False,
+            'can_move': False,
+        })
+        reply = dict(common_acl, **{
+            'can_see_hidden': 2,
+            'can_unhide': True,
+            'can_hide': True,
+            'can_delete': True,
+            'can_approve': True,
+            'can_move': True,
+        })
+        event = {
+            'can_see_hidden': True,
+            'can_hide': True,
+            'can_delete': True,
+        }
+
+        self.assertPostsAcls(posts, first_post, reply, reply, event)
+
+    def test_batch_annotation_resolves_thread_once(self):
+        """posts page checks if thread can be replied once"""
+        self.override_acl(MEMBER_ACL)
+
+        posts = self.get_posts()
+        calls = []
+
+        can_reply_thread = threads_permissions.can_reply_thread
+
+        def counted_can_reply_thread(user, thread):
+            calls.append(thread.pk)
+            return can_reply_thread(user, thread)
+
+        threads_permissions.can_reply_thread = counted_can_reply_thread
+        try:
+            add_acl(self.user, posts)
+        finally:
+            threads_permissions.can_reply_thread = can_reply_thread
+
+        self.assertEqual(calls, [self.thread.pk])
+
+    def test_batch_annotation_queries(self):
+        """posts page is annotated without hitting database"""
+        posts = self.get_posts()
+
+        self.user.acl_cache  # make sure acl is loaded
+        with self.assertNumQueries(0):
+            add_acl(self.user, posts)
+
+    def test_batch_annotators_called_once(self):
+        """posts page is annotated by each batch annotator once, not once per post"""
+        self.override_acl(MEMBER_ACL)
+        posts = self.get_posts()
+        calls = []
+
+        get_type_batch_annotators = acl_api.providers.get_type_batch_annotators
+
+        def counted_get_type_batch_annotators(target):
+            annotators = []
+            for annotator in get_type_batch_annotators(target):
+                annotators.append(partial(counted_annotator, annotator))
+            return annotators
+
+        def counted_annotator(annotator, user, targets):
+            calls.append((annotator, len(targets)))
+            return annotator(user, targets)
+
+        acl_api.providers.get_type_batch_annotators = counted_get_type_batch_annotators
+        try:
+            add_acl(self.user, posts)
+        finally:
+            acl_api.providers.get_type_batch_annotators = get_type_batch_annotators
+
+        self.assertTrue(calls)
+        self.assertEqual(len(calls), len(set(annotator for annotator, _ in calls)))
+        self.assertEqual(set(targets for _, targets in calls), set([len(posts)]))
@@ -0,0 +1,204 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.test import TestCase
+
+from misago.categories.models import Category
+from misago.core.testutils import run_commit_hooks
+from misago.threads import testutils
+from misago.threads.paginator import PostsPagesPaginator, PostsPaginator
+from misago.threads.postspages import (
+    VISIBILITY_ALL, VISIBILITY_APPROVED, append_post_to_pages, compute_posts_pages,
+    get_cached_posts_pages, get_own_posts_page, get_post_page, get_posts_pages,
+    invalidate_posts_pages)
+
+
+class PostsPagesTests(TestCase):
+    def setUp(self):
+        category = Category.objects.get(slug='first-category')
+        self.thread = testutils.post_thread(category)
+        run_commit_hooks()
+        invalidate_posts_pages(self.thread.pk)
+
+    def get_posts_queryset(self, **filters):
+        return self.thread.post_set.filter(is_event=False, **filters).order_by('id')
+
+    def test_get_posts_pages(self):
+        """get_posts_pages returns ids of posts starting pages and number of posts"""
+        for _ in range(9):
+            testutils.reply_thread(self.thread)
+
+        posts_ids = [p.pk for p in self.get_posts_queryset()]
+
+        pages_ids, posts_count = get_posts_pages(self.thread, VISIBILITY_APPROVED, 5)
+        self.assertEqual(pages_ids, (posts_ids[0], posts_ids[4], posts_ids[8]))
+        self.assertEqual(posts_count, 10)
+
+    def test_get_posts_pages_visibility(self):
+        """get_posts_pages counts unapproved posts only for all posts visibility"""
+        for _ in range(2):
+            testutils.reply_thread(self.thread)
+        testutils.reply_thread(self.thread, is_unapproved=True)
+
+        self.assertEqual(get_posts_pages(self.thread, VISIBILITY_APPROVED, 5)[1], 3)
+        self.assertEqual(get_posts_pages(self.thread, VISIBILITY_ALL, 5)[1], 4)
+
+    def test_get_own_posts_page(self):
+        """get_own_posts_page returns page of post for user that sees own unapproved posts"""
+        user = get_user_model().objects.create_user('Bob', 'bob@bob.com', 'Pass.123')
+
+        for i in range(20):
+            testutils.reply_thread(self.thread)
+            if i % 3 == 0:
+                testutils.reply_thread(self.thread, poster=user, is_unapproved=True)
+            if i % 4 == 0:
+                testutils.reply_thread(self.thread, is_unapproved=True)
+        testutils.reply_thread(self.thread, poster=user, is_unapproved=True)
+
+        posts = list(self.thread.post_set.filter(
+            Q(is_unapproved=False) | Q(poster=user),
+            is_event=False,
+        ).order_by('id'))
+
+        for per_page, orphans in ((5, 0), (5, 3), (6, 2), (8, 6)):
+            paginator = PostsPaginator(posts, per_page, orphans)
+
+            for post in posts:
+                page = get_own_posts_page(self.thread, user, post.pk, per_page, orphans)
+                self.assertIn(post, paginator.page(page).object_list)
+                if page < paginator.num_pages:
+                    self.assertNotIn(post, paginator.page(page + 1).object_list)
+
+    def test_pages_validation(self):
+        """posts pages are recomputed if they don't count all thread's replies"""
+        self.assertEqual(get_posts_pages(self.thread, VISIBILITY_APPROVED, 5)[1], 1)
+
+        # reply's transaction isn't committed, so it isn't appended to pages
+        testutils.reply_thread(self.thread)
+        self.assertEqual(get_posts_pages(self.thread, VISIBILITY_APPROVED, 5)[1], 2)
+
+    def test_replies_are_appended(self):
+        """replies are appended to cached pages without computing them again"""
+        get_posts_pages(self.thread, VISIBILITY_APPROVED, 5)
+        get_posts_pages(self.thread, VISIBILITY_ALL, 5)
+
+        for _ in range(10):
+            testutils.reply_thread(self.thread)
+            run_commit_hooks()
+
+            for visibility in (VISIBILITY_APPROVED, VISIBILITY_ALL):
+                with self.assertNumQueries(0):
+                    pages = get_posts_pages(self.thread, visibility, 5)
+                self.assertEqual(pages, compute_posts_pages(self.thread, visibility, 4)['pages'])
+
+    def test_unapproved_reply_is_appended(self):
+        """unapproved reply is appended only to pages of all posts"""
+        approved_pages = get_posts_pages(self.thread, VISIBILITY_APPROVED, 5)
+        get_posts_pages(self.thread, VISIBILITY_ALL, 5)
+
+        testutils.reply_thread(self.thread, is_unapproved=True)
+        run_commit_hooks()
+
+        self.assertEqual(get_posts_pages(self.thread, VISIBILITY_APPROVED, 5), approved_pages)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_posts_pages(self.thread, VISIBILITY_ALL, 5)[1], 2)
+
+    def test_reply_out_of_order(self):
+        """reply committed after newer reply makes pages to be computed again"""
+        reply = testutils.reply_thread(self.thread)
+        testutils.reply_thread(self.thread)
+        run_commit_hooks()
+
+        get_posts_pages(self.thread, VISIBILITY_APPROVED, 5)
+
+        append_post_to_pages(reply)
+        self.assertIsNone(get_cached_posts_pages(self.thread, VISIBILITY_APPROVED))
+
+    def test_post_changes(self):
+        """pages are invalidated by posts changes that move posts between pages"""
+        reply = testutils.reply_thread(self.thread, is_unapproved=True)
+        run_commit_hooks()
+
+        def cache_pages():
+            get_posts_pages(self.thread, VISIBILITY_APPROVED, 5)
+            get_posts_pages(self.thread, VISIBILITY_ALL, 5)
+
+        # edits and hides don't change pages
+        cache_pages()
+        reply.original = 'Edited post'
+        reply.save()
+        reply.is_hidden = True
+        reply.save(update_fields=['is_hidden'])
+        run_commit_hooks()
+
+        self.assertIsNotNone(get_cached_posts_pages(self.thread, VISIBILITY_APPROVED))
+        self.assertIsNotNone(get_cached_posts_pages(self.thread, VISIBILITY_ALL))
+
+        # approval changes only pages of approved posts
+        reply.is_unapproved = False
+        reply.save(update_fields=['is_unapproved'])
+        run_commit_hooks()
+
+        self.assertIsNone(get_cached_posts_pages(self.thread, VISIBILITY_APPROVED))
+        self.assertIsNotNone(get_cached_posts_pages(self.thread, VISIBILITY_ALL))
+
+        # deletion changes all pages
+        cache_pages()
+        reply.delete()
+        run_commit_hooks()
+
+        self.assertIsNone(get_cached_posts_pages(self.thread, VISIBILITY_APPROVED))
+        self.assertIsNone(get_cached_posts_pages(self.thread, VISIBILITY_ALL))
+
+    def test_moved_post(self):
+        """moving post invalidates pages of both threads"""
+        other_thread = testutils.post_thread(self.thread.category)
+        reply = testutils.reply_thread(self.thread)
+        run_commit_hooks()
+
+        for thread in (self.thread, other_thread):
+            get_posts_pages(thread, VISIBILITY_APPROVED, 5)
+
+        reply.move(other_thread)
+        reply.save()
+        run_commit_hooks()
+
+        self.assertIsNone(get_cached_posts_pages(self.thread, VISIBILITY_APPROVED))
+        self.assertIsNone(get_cached_posts_pages(other_thread, VISIBILITY_APPROVED))
+
+    def test_paginator(self):
+        """paginator returns same pages that PostsPaginator does"""
+        for _ in range(20):
+            testutils.reply_thread(self.thread)
+
+        queryset = self.get_posts_queryset()
+        for per_page, orphans in ((5, 0), (5, 3), (6, 2), (8, 6)):
+            invalidate_posts_pages(self.thread.pk)
+            pages = get_posts_pages(self.thread, VISIBILITY_APPROVED, per_page)
+
+            paginator = PostsPaginator(queryset, per_page, orphans)
+            pages_paginator = PostsPagesPaginator(queryset, per_page, orphans, pages=pages)
+
+            self.assertEqual(pages_paginator.count, paginator.count)
+            self.assertEqual(pages_paginator.num_pages, paginator.num_pages)
+
+            for page in paginator.page_range:
+                self.assertEqual(
+                    list(pages_paginator.page(page).object_list),
+                    list(paginator.page(page).object_list),
+                )
+
+    def test_get_post_page(self):
+        """get_post_page returns number of page post is displayed on"""
+        for _ in range(20):
+            testutils.reply_thread(self.thread)
+
+        posts = list(self.get_posts_queryset())
+        for per_page, orphans in ((5, 0), (5, 3), (6, 2), (8, 6)):
+            pages = get_posts_pages(self.thread, VISIBILITY_APPROVED, per_page)
+            paginator = PostsPaginator(posts, per_page, orphans)
+
+            for post in posts:
+                page = get_post_page(pages, post.pk, per_page, orphans)
+                self.assertIn(post, paginator.page(page).object_list)
+                if page < paginator.num_pages:
+                    self.assertNotIn(post, paginator.page(page + 1).object_list)
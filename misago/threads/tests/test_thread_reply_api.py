@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from misago.acl.testutils import override_acl
+from misago.categories.counters import fold_deltas
 from misago.categories.models import Category
 from misago.threads import testutils
 from misago.threads.models import Thread
@@ -164,6 +167,7 @@ class ReplyThreadTests(AuthenticatedUserTestCase):
         self.assertEqual(thread.last_poster_name, self.user.username)
         self.assertEqual(thread.last_poster_slug, self.user.slug)
 
+        fold_deltas()
         category = Category.objects.get(pk=self.category.pk)
         self.assertEqual(category.last_thread_id, thread.id)
         self.assertEqual(category.last_thread_title, thread.title)
@@ -173,6 +177,28 @@ class ReplyThreadTests(AuthenticatedUserTestCase):
         self.assertEqual(category.last_poster_name, self.user.username)
         self.assertEqual(category.last_poster_slug, self.user.slug)
 
+    def test_reply_doesnt_update_category(self):
+        """reply is recorded as category delta instead of updating category's row"""
+        self.override_acl()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                self.api_link, data={
+                    'post': "This is test response!",
+                }
+            )
+        self.assertEqual(response.status_code, 200)
+
+        for query in queries.captured_queries:
+            self.assertNotIn('UPDATE "misago_categories_category"', query['sql'])
+
+        category = Category.objects.get(pk=self.category.pk)
+        self.assertEqual(category.posts, self.category.posts)
+
+        fold_deltas()
+        category = Category.objects.get(pk=self.category.pk)
+        self.assertEqual(category.posts, self.category.posts + 1)
+
     def test_post_unicode(self):
         """unicode characters can be posted"""
         self.override_acl()
@@ -204,6 +230,7 @@ class ReplyThreadTests(AuthenticatedUserTestCase):
         post = self.user.post_set.all()[:1][0]
         self.assertTrue(post.is_unapproved)
 
+        fold_deltas()
         category = Category.objects.get(slug='first-category')
         self.assertEqual(category.threads, self.category.threads)
         self.assertEqual(category.posts, self.category.posts)
@@ -230,6 +257,7 @@ class ReplyThreadTests(AuthenticatedUserTestCase):
         post = self.user.post_set.all()[:1][0]
         self.assertFalse(post.is_unapproved)
 
+        fold_deltas()
         category = Category.objects.get(slug='first-category')
         self.assertEqual(category.threads, self.category.threads)
         self.assertEqual(category.posts, self.category.posts + 1)
@@ -253,6 +281,7 @@ class ReplyThreadTests(AuthenticatedUserTestCase):
         post = self.user.post_set.all()[:1][0]
         self.assertTrue(post.is_unapproved)
 
+        fold_deltas()
         category = Category.objects.get(slug='first-category')
         self.assertEqual(category.threads, self.category.threads)
         self.assertEqual(category.posts, self.category.posts)
@@ -278,6 +307,7 @@ class ReplyThreadTests(AuthenticatedUserTestCase):
         post = self.user.post_set.all()[:1][0]
         self.assertFalse(post.is_unapproved)
 
+        fold_deltas()
         category = Category.objects.get(slug='first-category')
         self.assertEqual(category.threads, self.category.threads)
         self.assertEqual(category.posts, self.category.posts + 1)
@@ -308,6 +338,7 @@ class ReplyThreadTests(AuthenticatedUserTestCase):
         post = self.user.post_set.all()[:1][0]
         self.assertFalse(post.is_unapproved)
 
+        fold_deltas()
         category = Category.objects.get(slug='first-category')
         self.assertEqual(category.threads, self.category.threads)
         self.assertEqual(category.posts, self.category.posts + 1)
@@ -4,6 +4,7 @@ from __future__ import unicode_literals
 from django.urls import reverse
 
 from misago.acl.testutils import override_acl
+from misago.categories.counters import fold_deltas
 from misago.categories.models import Category
 from misago.users.testutils import AuthenticatedUserTestCase
 
@@ -200,6 +201,7 @@ class StartThreadTests(AuthenticatedUserTestCase):
         self.assertEqual(post.poster_id, self.user.id)
         self.assertEqual(post.poster_name, self.user.username)
 
+        fold_deltas()
         category = Category.objects.get(pk=self.category.pk)
         self.assertEqual(category.threads, 1)
         self.assertEqual(category.posts, 1)
@@ -355,6 +357,7 @@ class StartThreadTests(AuthenticatedUserTestCase):
         thread = self.user.thread_set.all()[:1][0]
         self.assertTrue(thread.is_hidden)
 
+        fold_deltas()
         category = Category.objects.get(pk=self.category.pk)
         self.assertNotEqual(category.last_thread_id, thread.id)
 
@@ -412,6 +415,7 @@ class StartThreadTests(AuthenticatedUserTestCase):
         post = self.user.post_set.all()[:1][0]
         self.assertTrue(post.is_unapproved)
 
+        fold_deltas()
         category = Category.objects.get(slug='first-category')
         self.assertEqual(category.threads, self.category.threads)
         self.assertEqual(category.posts, self.category.posts)
@@ -441,6 +445,7 @@ class StartThreadTests(AuthenticatedUserTestCase):
         post = self.user.post_set.all()[:1][0]
         self.assertFalse(post.is_unapproved)
 
+        fold_deltas()
         category = Category.objects.get(slug='first-category')
         self.assertEqual(category.threads, self.category.threads + 1)
         self.assertEqual(category.posts, self.category.posts + 1)
@@ -467,6 +472,7 @@ class StartThreadTests(AuthenticatedUserTestCase):
         post = self.user.post_set.all()[:1][0]
         self.assertTrue(post.is_unapproved)
 
+        fold_deltas()
         category = Category.objects.get(slug='first-category')
         self.assertEqual(category.threads, self.category.threads)
         self.assertEqual(category.posts, self.category.posts)
@@ -495,6 +501,7 @@ class StartThreadTests(AuthenticatedUserTestCase):
         post = self.user.post_set.all()[:1][0]
         self.assertFalse(post.is_unapproved)
 
+        fold_deltas()
         category = Category.objects.get(slug='first-category')
         self.assertEqual(category.threads, self.category.threads + 1)
         self.assertEqual(category.posts, self.category.posts + 1)
@@ -528,6 +535,7 @@ class StartThreadTests(AuthenticatedUserTestCase):
         post = self.user.post_set.all()[:1][0]
         self.assertFalse(post.is_unapproved)
 
+        fold_deltas()
         category = Category.objects.get(slug='first-category')
         self.assertEqual(category.threads, self.category.threads + 1)
         self.assertEqual(category.posts, self.category.posts + 1)
@@ -0,0 +1,112 @@
+from django.test import TestCase
+
+from misago.acl.testutils import override_acl
+from misago.categories.models import Category
+from misago.threads import testutils
+from misago.threads.models import Thread
+from misago.threads.permissions.threads import (
+    SHOW_ACCEPTED_VISIBLE, SHOW_ALL, SHOW_OWNED, build_threads_visibility,
+    exclude_invisible_threads, get_threads_visibility, merge_categories_ids)
+from misago.users.testutils import AuthenticatedUserTestCase
+
+
+class MergeCategoriesIdsTests(TestCase):
+    def test_merge_categories_ids(self):
+        """runs of three or more consecutive ids are merged into ranges"""
+        self.assertEqual(merge_categories_ids([]), ((), ()))
+        self.assertEqual(merge_categories_ids([4]), ((), (4, )))
+        self.assertEqual(merge_categories_ids([5, 4]), ((), (4, 5)))
+        self.assertEqual(
+            merge_categories_ids([13, 1, 2, 3, 5, 7, 8, 9, 10, 12]),
+            (((1, 3), (7, 10)), (5, 12, 13)),
+        )
+
+
+class ThreadsVisibilityTests(AuthenticatedUserTestCase):
+    def setUp(self):
+        super(ThreadsVisibilityTests, self).setUp()
+
+        self.category = Category.objects.get(slug='first-category')
+
+        self.thread = testutils.post_thread(category=self.category)
+        self.hidden_thread = testutils.post_thread(category=self.category, is_hidden=True)
+        self.unapproved_thread = testutils.post_thread(
+            category=self.category, is_unapproved=True)
+        self.own_thread = testutils.post_thread(category=self.category, poster=self.user)
+
+    def override_acl(self, acl):
+        final_acl = self.user.acl_cache['categories'][self.category.pk]
+        final_acl.update({
+            'can_see': 1,
+            'can_browse': 1,
+            'can_see_all_threads': 1,
+            'can_hide_threads': 0,
+            'can_approve_content': 0,
+        })
+        final_acl.update(acl)
+
+        override_acl(self.user, {
+            'categories': {
+                self.category.pk: final_acl,
+            },
+        })
+
+    def get_visible_threads(self):
+        queryset = exclude_invisible_threads(self.user, [self.category], Thread.objects)
+        return set(queryset.values_list('id', flat=True))
+
+    def test_see_all_threads(self):
+        """moderator sees all threads in category"""
+        self.override_acl({'can_hide_threads': 1, 'can_approve_content': 1})
+
+        self.assertEqual(
+            build_threads_visibility(self.user, [self.category]),
+            ((SHOW_ALL, (), (self.category.pk, )), ),
+        )
+        self.assertEqual(self.get_visible_threads(), set([
+            self.thread.pk,
+            self.hidden_thread.pk,
+            self.unapproved_thread.pk,
+            self.own_thread.pk,
+        ]))
+
+    def test_see_accepted_visible_threads(self):
+        """user sees visible threads that are approved or own"""
+        self.override_acl({})
+
+        self.assertEqual(
+            build_threads_visibility(self.user, [self.category]),
+            ((SHOW_ACCEPTED_VISIBLE, (), (self.category.pk, )), ),
+        )
+        self.assertEqual(self.get_visible_threads(), set([
+            self.thread.pk,
+            self.own_thread.pk,
+        ]))
+
+    def test_see_own_threads(self):
+        """user sees only own threads"""
+        self.override_acl({'can_see_all_threads': 0, 'can_hide_threads': 1})
+
+        self.assertEqual(
+            build_threads_visibility(self.user, [self.category]),
+            ((SHOW_OWNED, (), (self.category.pk, )), ),
+        )
+        self.assertEqual(self.get_visible_threads(), set([self.own_thread.pk]))
+
+    def test_see_no_threads(self):
+        """user can't browse category"""
+        self.override_acl({'can_browse': 0})
+
+        self.assertEqual(build_threads_visibility(self.user, [self.category]), ())
+        self.assertEqual(self.get_visible_threads(), set())
+
+    def test_visibility_is_memoized(self):
+        """visibility is computed once for ACL and categories"""
+        self.override_acl({})
+
+        visibility = get_threads_visibility(self.user, [self.category])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_threads_visibility(self.user, [self.category]), visibility)
+
+        self.override_acl({'can_see_all_threads': 0})
+        self.assertNotEqual(get_threads_visibility(self.user, [self.category]), visibility)
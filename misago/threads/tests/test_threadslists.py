@@ -1,5 +1,7 @@
 from datetime import timedelta
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.encoding import smart_str
@@ -177,6 +179,101 @@ class ApiTests(ThreadsListTestCase):
         response = self.client.get('%s?category=%s&list=nope' % (self.api_link, self.root.pk, ))
         self.assertEqual(response.status_code, 404)
 
+    def test_cursor_pagination(self):
+        """api paginates threads list with cursors"""
+        pinned = testutils.post_thread(category=self.first_category, is_global=True)
+        threads = [
+            testutils.post_thread(category=self.first_category)
+            for _ in range(settings.MISAGO_THREADS_PER_PAGE + 5)
+        ]
+        threads.reverse()
+
+        response = self.client.get('%s?after=' % self.api_link)
+        self.assertEqual(response.status_code, 200)
+
+        response_json = response.json()
+        self.assertNotIn('count', response_json)
+        self.assertIsNone(response_json['before'])
+        self.assertEqual(
+            [t['id'] for t in response_json['results']],
+            [pinned.pk] + [t.pk for t in threads[:settings.MISAGO_THREADS_PER_PAGE]],
+        )
+
+        response = self.client.get('%s?after=%s' % (self.api_link, response_json['after']))
+        self.assertEqual(response.status_code, 200)
+
+        response_json = response.json()
+        self.assertIsNone(response_json['after'])
+        self.assertEqual(
+            [t['id'] for t in response_json['results']],
+            [t.pk for t in threads[settings.MISAGO_THREADS_PER_PAGE:]],
+        )
+
+        response = self.client.get('%s?before=%s' % (self.api_link, response_json['before']))
+        self.assertEqual(response.status_code, 200)
+
+        response_json = response.json()
+        self.assertIsNone(response_json['before'])
+        self.assertEqual(
+            [t['id'] for t in response_json['results']],
+            [pinned.pk] + [t.pk for t in threads[:settings.MISAGO_THREADS_PER_PAGE]],
+        )
+
+    def test_first_page_pinned_threads(self):
+        """first page of category displays pinned threads before others"""
+        category_link = '%s?category=%s' % (self.api_link, self.first_category.pk)
+
+        standard = testutils.post_thread(category=self.first_category)
+        globally = testutils.post_thread(category=self.first_category, is_global=True)
+        locally = testutils.post_thread(category=self.first_category, is_pinned=True)
+        other = testutils.post_thread(category=self.first_category)
+
+        expected_threads = [globally.pk, locally.pk, other.pk, standard.pk]
+
+        response = self.client.get(category_link)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['id'] for t in response.json()['results']], expected_threads)
+
+        # locally pinned threads aren't pinned on threads list
+        response = self.client.get(self.api_link)
+        self.assertEqual(response.status_code, 200)
+
+        expected_threads = [globally.pk, other.pk, locally.pk, standard.pk]
+        self.assertEqual([t['id'] for t in response.json()['results']][:4], expected_threads)
+
+    def test_first_page_threads_query(self):
+        """first page of category selects pinned and limited remaining threads in one query"""
+        category_link = '%s?category=%s' % (self.api_link, self.first_category.pk)
+
+        globally = testutils.post_thread(category=self.first_category, is_global=True)
+        locally = testutils.post_thread(category=self.first_category, is_pinned=True)
+
+        threads_count = settings.MISAGO_THREADS_PER_PAGE + settings.MISAGO_THREADS_TAIL + 1
+        threads = [
+            testutils.post_thread(category=self.first_category) for _ in range(threads_count)
+        ]
+        threads.reverse()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(category_link)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(
+            [t['id'] for t in response.json()['results']],
+            [globally.pk, locally.pk] + [t.pk for t in threads[:settings.MISAGO_THREADS_PER_PAGE]],
+        )
+
+        # pinned and remaining threads have their own ordering, so no CASE expression is sorted
+        threads_queries = [q['sql'] for q in queries if 'UNION ALL' in q['sql']]
+        self.assertEqual(len(threads_queries), 1)
+        self.assertNotIn('CASE', threads_queries[0])
+        self.assertIn('LIMIT %s' % settings.MISAGO_THREADS_PER_PAGE, threads_queries[0])
+
+    def test_invalid_cursor(self):
+        """api returns 404 for invalid cursor"""
+        response = self.client.get('%s?after=nope' % self.api_link)
+        self.assertEqual(response.status_code, 404)
+
 
 class AllThreadsListTests(ThreadsListTestCase):
     def test_list_renders_empty(self):
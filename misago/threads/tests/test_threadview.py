@@ -131,6 +131,46 @@ class ThreadVisibilityTests(ThreadViewTestCase):
         self.assertContains(response, self.thread.title)
 
 
+class ThreadBreadcrumbsTests(ThreadViewTestCase):
+    def setUp(self):
+        super(ThreadBreadcrumbsTests, self).setUp()
+
+        self.subcategory = Category(name='Subcategory', slug='subcategory')
+        self.subcategory.insert_at(self.category, position='last-child', save=True)
+
+        self.thread = testutils.post_thread(category=self.subcategory)
+
+    def override_acl(self, acl=None):
+        category_acl = self.user.acl_cache['categories'][self.category.pk].copy()
+        category_acl.update({'can_see': 1, 'can_browse': 1, 'can_see_all_threads': 1})
+
+        override_acl(self.user, {
+            'visible_categories': [self.category.pk, self.subcategory.pk],
+            'browseable_categories': [self.category.pk, self.subcategory.pk],
+            'categories': {
+                self.category.pk: category_acl,
+                self.subcategory.pk: category_acl,
+            },
+        })
+
+    def test_breadcrumbs_display(self):
+        """thread view displays categories path in breadcrumbs"""
+        self.override_acl()
+
+        response = self.client.get(self.thread.get_absolute_url())
+        self.assertContains(response, self.category.get_absolute_url())
+        self.assertContains(response, self.subcategory.get_absolute_url())
+
+        category = Category.objects.get(pk=self.category.pk)
+        category.name = 'Renamed category'
+        category.save()
+
+        self.override_acl()
+
+        response = self.client.get(self.thread.get_absolute_url())
+        self.assertContains(response, 'Renamed category')
+
+
 class ThreadPostsVisibilityTests(ThreadViewTestCase):
     def test_post_renders(self):
         """post renders"""
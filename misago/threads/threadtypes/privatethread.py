@@ -1,4 +1,3 @@
-from django.urls import reverse
 from django.utils.translation import ugettext_lazy as _
 
 from misago.categories import PRIVATE_THREADS_ROOT_NAME
@@ -13,10 +12,10 @@ class PrivateThread(ThreadType):
         return _('Private threads')
 
     def get_category_absolute_url(self, category):
-        return reverse('misago:private-threads')
+        return self.build_url('misago:private-threads')
 
     def get_category_last_thread_url(self, category):
-        return reverse(
+        return self.build_url(
             'misago:private-thread',
             kwargs={
                 'slug': category.last_thread_slug,
@@ -25,7 +24,7 @@ class PrivateThread(ThreadType):
         )
 
     def get_category_last_post_url(self, category):
-        return reverse(
+        return self.build_url(
             'misago:private-thread-last',
             kwargs={
                 'slug': category.last_thread_slug,
@@ -34,11 +33,11 @@ class PrivateThread(ThreadType):
         )
 
     def get_category_read_api_url(self, category):
-        return reverse('misago:api:private-thread-read')
+        return self.build_url('misago:api:private-thread-read')
 
     def get_thread_absolute_url(self, thread, page=1):
         if page > 1:
-            return reverse(
+            return self.build_url(
                 'misago:private-thread',
                 kwargs={
                     'slug': thread.slug,
@@ -47,7 +46,7 @@ class PrivateThread(ThreadType):
                 }
             )
         else:
-            return reverse(
+            return self.build_url(
                 'misago:private-thread', kwargs={
                     'slug': thread.slug,
                     'pk': thread.pk,
@@ -55,7 +54,7 @@ class PrivateThread(ThreadType):
             )
 
     def get_thread_last_post_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:private-thread-last', kwargs={
                 'slug': thread.slug,
                 'pk': thread.pk,
@@ -63,7 +62,7 @@ class PrivateThread(ThreadType):
         )
 
     def get_thread_new_post_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:private-thread-new', kwargs={
                 'slug': thread.slug,
                 'pk': thread.pk,
@@ -71,35 +70,35 @@ class PrivateThread(ThreadType):
         )
 
     def get_thread_api_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:api:private-thread-detail', kwargs={
                 'pk': thread.pk,
             }
         )
 
     def get_thread_editor_api_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:api:private-thread-post-editor', kwargs={
                 'thread_pk': thread.pk,
             }
         )
 
     def get_thread_posts_api_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:api:private-thread-post-list', kwargs={
                 'thread_pk': thread.pk,
             }
         )
 
     def get_post_merge_api_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:api:private-thread-post-merge', kwargs={
                 'thread_pk': thread.pk,
             }
         )
 
     def get_post_absolute_url(self, post):
-        return reverse(
+        return self.build_url(
             'misago:private-thread-post',
             kwargs={
                 'slug': post.thread.slug,
@@ -109,7 +108,7 @@ class PrivateThread(ThreadType):
         )
 
     def get_post_api_url(self, post):
-        return reverse(
+        return self.build_url(
             'misago:api:private-thread-post-detail',
             kwargs={
                 'thread_pk': post.thread_id,
@@ -118,7 +117,7 @@ class PrivateThread(ThreadType):
         )
 
     def get_post_likes_api_url(self, post):
-        return reverse(
+        return self.build_url(
             'misago:api:private-thread-post-likes',
             kwargs={
                 'thread_pk': post.thread_id,
@@ -127,7 +126,7 @@ class PrivateThread(ThreadType):
         )
 
     def get_post_editor_api_url(self, post):
-        return reverse(
+        return self.build_url(
             'misago:api:private-thread-post-editor',
             kwargs={
                 'thread_pk': post.thread_id,
@@ -136,7 +135,7 @@ class PrivateThread(ThreadType):
         )
 
     def get_post_edits_api_url(self, post):
-        return reverse(
+        return self.build_url(
             'misago:api:private-thread-post-edits',
             kwargs={
                 'thread_pk': post.thread_id,
@@ -145,7 +144,7 @@ class PrivateThread(ThreadType):
         )
 
     def get_post_read_api_url(self, post):
-        return reverse(
+        return self.build_url(
             'misago:api:private-thread-post-read',
             kwargs={
                 'thread_pk': post.thread_id,
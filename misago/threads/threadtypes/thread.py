@@ -1,4 +1,3 @@
-from django.urls import reverse
 from django.utils.translation import ugettext_lazy as _
 
 from misago.categories import THREADS_ROOT_NAME
@@ -17,17 +16,17 @@ class Thread(ThreadType):
 
     def get_category_absolute_url(self, category):
         if category.level:
-            return reverse(
+            return self.build_url(
                 'misago:category', kwargs={
                     'pk': category.pk,
                     'slug': category.slug,
                 }
             )
         else:
-            return reverse('misago:threads')
+            return self.build_url('misago:threads')
 
     def get_category_last_thread_url(self, category):
-        return reverse(
+        return self.build_url(
             'misago:thread',
             kwargs={
                 'slug': category.last_thread_slug,
@@ -36,7 +35,7 @@ class Thread(ThreadType):
         )
 
     def get_category_last_post_url(self, category):
-        return reverse(
+        return self.build_url(
             'misago:thread-last',
             kwargs={
                 'slug': category.last_thread_slug,
@@ -45,11 +44,11 @@ class Thread(ThreadType):
         )
 
     def get_category_read_api_url(self, category):
-        return '{}?category={}'.format(reverse('misago:api:thread-read'), category.pk)
+        return '{}?category={}'.format(self.build_url('misago:api:thread-read'), category.pk)
 
     def get_thread_absolute_url(self, thread, page=1):
         if page > 1:
-            return reverse(
+            return self.build_url(
                 'misago:thread', kwargs={
                     'slug': thread.slug,
                     'pk': thread.pk,
@@ -57,7 +56,7 @@ class Thread(ThreadType):
                 }
             )
         else:
-            return reverse(
+            return self.build_url(
                 'misago:thread', kwargs={
                     'slug': thread.slug,
                     'pk': thread.pk,
@@ -65,7 +64,7 @@ class Thread(ThreadType):
             )
 
     def get_thread_last_post_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:thread-last', kwargs={
                 'slug': thread.slug,
                 'pk': thread.pk,
@@ -73,7 +72,7 @@ class Thread(ThreadType):
         )
 
     def get_thread_new_post_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:thread-new', kwargs={
                 'slug': thread.slug,
                 'pk': thread.pk,
@@ -81,7 +80,7 @@ class Thread(ThreadType):
         )
 
     def get_thread_unapproved_post_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:thread-unapproved', kwargs={
                 'slug': thread.slug,
                 'pk': thread.pk,
@@ -89,42 +88,42 @@ class Thread(ThreadType):
         )
 
     def get_thread_api_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-detail', kwargs={
                 'pk': thread.pk,
             }
         )
 
     def get_thread_editor_api_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-post-editor', kwargs={
                 'thread_pk': thread.pk,
             }
         )
 
     def get_thread_merge_api_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-merge', kwargs={
                 'pk': thread.pk,
             }
         )
 
     def get_thread_poll_api_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-poll-list', kwargs={
                 'thread_pk': thread.pk,
             }
         )
 
     def get_thread_posts_api_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-post-list', kwargs={
                 'thread_pk': thread.pk,
             }
         )
 
     def get_poll_api_url(self, poll):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-poll-detail', kwargs={
                 'thread_pk': poll.thread_id,
                 'pk': poll.pk,
@@ -132,7 +131,7 @@ class Thread(ThreadType):
         )
 
     def get_poll_votes_api_url(self, poll):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-poll-votes', kwargs={
                 'thread_pk': poll.thread_id,
                 'pk': poll.pk,
@@ -140,28 +139,28 @@ class Thread(ThreadType):
         )
 
     def get_post_merge_api_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-post-merge', kwargs={
                 'thread_pk': thread.pk,
             }
         )
 
     def get_post_move_api_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-post-move', kwargs={
                 'thread_pk': thread.pk,
             }
         )
 
     def get_post_split_api_url(self, thread):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-post-split', kwargs={
                 'thread_pk': thread.pk,
             }
         )
 
     def get_post_absolute_url(self, post):
-        return reverse(
+        return self.build_url(
             'misago:thread-post',
             kwargs={
                 'slug': post.thread.slug,
@@ -171,7 +170,7 @@ class Thread(ThreadType):
         )
 
     def get_post_api_url(self, post):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-post-detail', kwargs={
                 'thread_pk': post.thread_id,
                 'pk': post.pk,
@@ -179,7 +178,7 @@ class Thread(ThreadType):
         )
 
     def get_post_likes_api_url(self, post):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-post-likes', kwargs={
                 'thread_pk': post.thread_id,
                 'pk': post.pk,
@@ -187,7 +186,7 @@ class Thread(ThreadType):
         )
 
     def get_post_editor_api_url(self, post):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-post-editor', kwargs={
                 'thread_pk': post.thread_id,
                 'pk': post.pk,
@@ -195,7 +194,7 @@ class Thread(ThreadType):
         )
 
     def get_post_edits_api_url(self, post):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-post-edits', kwargs={
                 'thread_pk': post.thread_id,
                 'pk': post.pk,
@@ -203,7 +202,7 @@ class Thread(ThreadType):
         )
 
     def get_post_read_api_url(self, post):
-        return reverse(
+        return self.build_url(
             'misago:api:thread-post-read', kwargs={
                 'thread_pk': post.thread_id,
                 'pk': post.pk,
@@ -2,6 +2,8 @@ from django.urls import resolve
 from django.utils import six
 from django.utils.six.moves.urllib.parse import urlparse
 
+from misago.categories.tree import get_tree_index
+
 from .models import PostLike
 
 
@@ -10,31 +12,18 @@ def add_categories_to_items(root_category, categories, items):
     for category in categories:
         categories_dict[category.pk] = category
 
-    top_categories_map = {}
+    tree_index = get_tree_index()
+    if root_category.pk in tree_index:
+        top_categories_map = tree_index.get_top_categories_map(root_category.pk)
+    else:
+        # root is not in threads tree, eg. private threads
+        top_categories_map = {}
 
     for item in items:
-        item.top_category = None
         item.category = categories_dict[item.category_id]
 
-        if item.category == root_category:
-            continue
-        elif item.category.parent_id == root_category.pk:
-            item.top_category = item.category
-        elif item.category_id in top_categories_map:
-            item.top_category = top_categories_map[item.category_id]
-        elif root_category.has_child(item.category):
-            # item in subcategory resolution
-            for category in categories:
-                if (category.parent_id == root_category.pk and category.has_child(item.category)):
-                    top_categories_map[item.category_id] = category
-                    item.top_category = category
-        else:
-            # item from other category's scope
-            for category in categories:
-                category_is_parent = category.has_child(item.category)
-                if category.level == 1 and (category == item.category or category_is_parent):
-                    top_categories_map[item.category_id] = category
-                    item.top_category = category
+        top_category_id = top_categories_map.get(item.category_id)
+        item.top_category = categories_dict.get(top_category_id)
 
 
 def add_likes_to_posts(user, posts):
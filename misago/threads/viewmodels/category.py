@@ -1,9 +1,11 @@
 from django.http import Http404
 
 from misago.acl import add_acl
+from misago.categories import THREADS_ROOT_NAME
 from misago.categories.models import Category
 from misago.categories.permissions import allow_browse_category, allow_see_category
 from misago.categories.serializers import CategorySerializer
+from misago.categories.tree import get_tree_index
 from misago.core.shortcuts import validate_slug
 from misago.core.viewmodel import ViewModel as BaseViewModel
 from misago.threads.permissions import allow_use_private_threads
@@ -49,11 +51,11 @@ class ViewModel(BaseViewModel):
 
 class ThreadsRootCategory(ViewModel):
     def get_categories(self, request):
-        return [Category.objects.root_category()] + list(
-            Category.objects.all_categories().filter(
-                id__in=request.user.acl_cache['browseable_categories'],
-            ).select_related('parent')
-        )
+        tree_index = get_tree_index()
+        root_id = tree_index.get_special_id(THREADS_ROOT_NAME)
+
+        browseable_categories = request.user.acl_cache['browseable_categories']
+        return tree_index.get_categories([root_id] + list(browseable_categories))
 
 
 class ThreadsCategory(ThreadsRootCategory):
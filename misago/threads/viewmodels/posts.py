@@ -1,9 +1,12 @@
+from functools import partial
+
 from misago.acl import add_acl
 from misago.conf import settings
 from misago.core.shortcuts import paginate, pagination_dict
 from misago.readtracker.threadstracker import make_posts_read_aware
-from misago.threads.paginator import PostsPaginator
+from misago.threads.paginator import PostsPagesPaginator, PostsPaginator
 from misago.threads.permissions import exclude_invisible_posts
+from misago.threads.postspages import get_posts_pages, get_posts_visibility
 from misago.threads.serializers import PostSerializer
 from misago.threads.utils import add_likes_to_posts
 from misago.users.online.utils import make_users_status_aware
@@ -24,7 +27,11 @@ class ViewModel(object):
         posts_limit = settings.MISAGO_POSTS_PER_PAGE
         posts_orphans = settings.MISAGO_POSTS_TAIL
         list_page = paginate(
-            posts_queryset, page, posts_limit, posts_orphans, paginator=PostsPaginator
+            posts_queryset,
+            page,
+            posts_limit,
+            posts_orphans,
+            paginator=self.get_posts_paginator(request, thread_model, posts_limit),
         )
         paginator = pagination_dict(list_page)
 
@@ -78,6 +85,14 @@ class ViewModel(object):
         ).filter(is_event=False).order_by('id')
         return exclude_invisible_posts(request.user, thread.category, queryset)
 
+    def get_posts_paginator(self, request, thread, per_page):
+        visibility = get_posts_visibility(request.user, thread)
+        if visibility is None:
+            return PostsPaginator
+
+        pages = get_posts_pages(thread, visibility, per_page)
+        return partial(PostsPagesPaginator, pages=pages)
+
     def get_events_queryset(self, request, thread, limit, first_post=None, last_post=None):
         queryset = thread.post_set.select_related('poster').filter(is_event=True)
 
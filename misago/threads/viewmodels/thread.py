@@ -4,6 +4,7 @@ from django.utils.translation import gettext as _
 from misago.acl import add_acl
 from misago.categories import PRIVATE_THREADS_ROOT_NAME, THREADS_ROOT_NAME
 from misago.categories.models import Category
+from misago.categories.tree import get_tree_index
 from misago.core.shortcuts import validate_slug
 from misago.core.viewmodel import ViewModel as BaseViewModel
 from misago.readtracker.threadstracker import make_read_aware
@@ -75,10 +76,17 @@ class ViewModel(BaseViewModel):
         thread_path = []
 
         if category.level:
-            categories = Category.objects.filter(
-                tree_id=category.tree_id, lft__lte=category.lft, rght__gte=category.rght
-            ).order_by('level')
-            thread_path = list(categories)
+            tree_index = get_tree_index()
+            if category.pk in tree_index:
+                # breadcrumbs end with thread's category that we already have
+                ancestors_ids = tree_index.get_ancestors_ids(category.pk)
+                thread_path = tree_index.get_categories(ancestors_ids) + [category]
+            else:
+                # category was created by other process and our index is not updated yet
+                categories = Category.objects.filter(
+                    tree_id=category.tree_id, lft__lte=category.lft, rght__gte=category.rght
+                ).order_by('level')
+                thread_path = list(categories)
         else:
             thread_path = [category]
 
@@ -1,7 +1,7 @@
 from datetime import timedelta
 
 from django.core.exceptions import PermissionDenied
-from django.db.models import F, Q
+from django.db.models import Q
 from django.http import Http404
 from django.utils import timezone
 from django.utils.translation import ugettext as _
@@ -9,8 +9,12 @@ from django.utils.translation import ugettext_lazy
 
 from misago.acl import add_acl
 from misago.conf import settings
+from misago.core.counts import cached_count_paginator
+from misago.core.cursorpagination import CursorPage, cursor_pagination_dict, paginate_by_cursor
+from misago.core.pgutils import union_all
 from misago.core.shortcuts import paginate, pagination_dict
 from misago.readtracker import threadstracker
+from misago.readtracker.models import CategoryRead, ThreadRead
 from misago.threads.models import Thread
 from misago.threads.participants import make_participants_aware
 from misago.threads.permissions import exclude_invisible_threads
@@ -38,9 +42,49 @@ LIST_DENIED_MESSAGES = {
     'unapproved': ugettext_lazy("You have to sign in to see list of threads with unapproved posts."),
 }
 
+# thread had no posts since user has read its category
+READ_CATEGORY_SQL = """
+EXISTS (
+    SELECT 1 FROM %(reads)s
+    WHERE %(reads)s.user_id = %%s
+        AND %(reads)s.category_id = %(threads)s.category_id
+        AND %(reads)s.last_read_on >= %(threads)s.last_post_on
+)
+""".strip() % {
+    'reads': CategoryRead._meta.db_table,
+    'threads': Thread._meta.db_table,
+}
+
+# user has read thread
+READ_THREAD_SQL = """
+EXISTS (
+    SELECT 1 FROM %(reads)s
+    WHERE %(reads)s.user_id = %%s AND %(reads)s.thread_id = %(threads)s.id
+)
+""".strip() % {
+    'reads': ThreadRead._meta.db_table,
+    'threads': Thread._meta.db_table,
+}
+
+# user has read thread before its last post
+UNREAD_THREAD_SQL = """
+EXISTS (
+    SELECT 1 FROM %(reads)s
+    WHERE %(reads)s.user_id = %%s AND %(reads)s.thread_id = %(threads)s.id
+        AND %(reads)s.last_read_on < %(threads)s.last_post_on
+)
+""".strip() % {
+    'reads': ThreadRead._meta.db_table,
+    'threads': Thread._meta.db_table,
+}
+
 
 class ViewModel(object):
-    def __init__(self, request, category, list_type, page):
+    def __init__(self, request, category, list_type, page, after=None, before=None):
+        """
+        threads list is paginated with cursors instead of page numbers if
+        after or before cursor is given (empty string for first page)
+        """
         self.allow_see_list(request, category, list_type)
 
         category_model = category.unwrap()
@@ -52,18 +96,40 @@ class ViewModel(object):
             base_queryset, category_model, threads_categories
         )
 
-        list_page = paginate(
-            threads_queryset, page, settings.MISAGO_THREADS_PER_PAGE, settings.MISAGO_THREADS_TAIL
-        )
-        paginator = pagination_dict(list_page)
+        if after is not None or before is not None:
+            list_page = paginate_by_cursor(
+                threads_queryset,
+                '-last_post_id',
+                settings.MISAGO_THREADS_PER_PAGE,
+                after=after,
+                before=before,
+            )
+            paginator = cursor_pagination_dict(list_page)
+            is_first_page = not list_page.has_previous()
+        else:
+            # new and unread lists depend on time and read tracker, so their counts aren't cached
+            if list_type in ('new', 'unread'):
+                list_paginator = None
+            else:
+                list_paginator = cached_count_paginator(
+                    'threads', [category.pk for category in threads_categories])
+
+            list_page = paginate(
+                threads_queryset,
+                page,
+                settings.MISAGO_THREADS_PER_PAGE,
+                settings.MISAGO_THREADS_TAIL,
+                paginator=list_paginator,
+            )
+            paginator = pagination_dict(list_page)
+            is_first_page = list_page.number == 1
 
-        if list_page.number > 1:
+        if not is_first_page:
             threads = list(list_page.object_list)
         else:
-            pinned_threads = list(
-                self.get_pinned_threads(base_queryset, category_model, threads_categories)
+            threads = self.get_first_page_threads(
+                base_queryset, category_model, threads_categories, list_page
             )
-            threads = list(pinned_threads) + list(list_page.object_list)
 
         if list_type in ('new', 'unread'):
             # we already know all threads on list are unread
@@ -105,6 +171,10 @@ class ViewModel(object):
         return get_threads_queryset(request.user, threads_categories,
                                     list_type).order_by('-last_post_id')
 
+    def get_first_page_threads(self, queryset, category, threads_categories, list_page):
+        pinned_threads = list(self.get_pinned_threads(queryset, category, threads_categories))
+        return pinned_threads + list(list_page.object_list)
+
     def get_pinned_threads(self, queryset, category, threads_categories):
         return []
 
@@ -135,24 +205,54 @@ class ViewModel(object):
 
 
 class ForumThreads(ViewModel):
-    def get_pinned_threads(self, queryset, category, threads_categories):
+    def get_first_page_threads(self, queryset, category, threads_categories, list_page):
+        if isinstance(list_page, CursorPage):
+            # threads on cursor page are already selected
+            return super(ForumThreads, self).get_first_page_threads(
+                queryset, category, threads_categories, list_page
+            )
+
+        # select pinned threads and first page of remaining threads with single query
+        # each part is selected with its own ordering and limit, so it can use its index
+        pinned_queryset = self.get_pinned_threads(queryset, category, threads_categories)
+        querysets = [pinned_queryset.extra(select={'is_pinned': 'TRUE'}).order_by()]
+
+        if list_page.end_index():
+            remaining_queryset = self.get_remaining_threads_queryset(
+                queryset, category, threads_categories
+            )
+            querysets.append(
+                remaining_queryset.extra(select={'is_pinned': 'FALSE'})[:list_page.end_index()]
+            )
+
+        threads = list(union_all(*querysets))
+
+        pinned_threads = [t for t in threads if t.is_pinned]
+        pinned_threads.sort(key=lambda t: (t.weight, t.last_post_id), reverse=True)
+
+        remaining_threads = [t for t in threads if not t.is_pinned]
+        remaining_threads.sort(key=lambda t: t.last_post_id, reverse=True)
+
+        return pinned_threads + remaining_threads
+
+    def get_pinned_filter(self, category, threads_categories):
         if category.level:
-            return list(queryset.filter(weight=2)
-                        ) + list(queryset.filter(weight=1, category__in=threads_categories))
+            return Q(weight=2) | Q(weight=1, category__in=threads_categories)
         else:
-            return queryset.filter(weight=2)
+            return Q(weight=2)
 
-    def get_remaining_threads_queryset(self, queryset, category, threads_categories):
+    def get_remaining_filter(self, category, threads_categories):
         if category.level:
-            return queryset.filter(
-                weight=0,
-                category__in=threads_categories,
-            )
+            return Q(weight=0, category__in=threads_categories)
         else:
-            return queryset.filter(
-                weight__lt=2,
-                category__in=threads_categories,
-            )
+            return Q(weight__lt=2, category__in=threads_categories)
+
+    def get_pinned_threads(self, queryset, category, threads_categories):
+        pinned_filter = self.get_pinned_filter(category, threads_categories)
+        return queryset.filter(pinned_filter).order_by('-weight', '-last_post_id')
+
+    def get_remaining_threads_queryset(self, queryset, category, threads_categories):
+        return queryset.filter(self.get_remaining_filter(category, threads_categories))
 
 
 class PrivateThreads(ViewModel):
@@ -201,58 +301,33 @@ def filter_threads_queryset(user, categories, list_type, queryset):
 
 
 def filter_read_threads_queryset(user, categories, list_type, queryset):
-    # grab cutoffs for categories
+    """
+    filters queryset to threads that are new or unread for user
+
+    Instead of OR-ing condition for every category user has read, threads
+    are checked against user's categories and threads reads with EXISTS
+    subqueries correlated with thread. Those produce same SQL and plans no
+    matter how many categories or threads user has read.
+    """
+    # grab cutoff date, threads without posts after it are read
     cutoff_date = timezone.now() - timedelta(days=settings.MISAGO_READTRACKER_CUTOFF)
 
     if cutoff_date < user.joined_on:
         cutoff_date = user.joined_on
 
-    categories_dict = {}
-    for record in user.categoryread_set.filter(category__in=categories):
-        if record.last_read_on > cutoff_date:
-            categories_dict[record.category_id] = record.last_read_on
+    queryset = queryset.filter(last_post_on__gt=cutoff_date)
+
+    # threads that had no posts since user has read their category are read
+    conditions = ['NOT %s' % READ_CATEGORY_SQL]
+    params = [user.pk]
 
     if list_type == 'new':
         # new threads have no entry in reads table
-        # AND were started after cutoff date
-        read_threads = user.threadread_set.filter(category__in=categories).values('thread_id')
-
-        condition = Q(last_post_on__lte=cutoff_date)
-        condition = condition | Q(id__in=read_threads)
-
-        if categories_dict:
-            for category_id, category_cutoff in categories_dict.items():
-                condition = condition | Q(
-                    category_id=category_id,
-                    last_post_on__lte=category_cutoff,
-                )
-
-        return queryset.exclude(condition)
+        conditions.append('NOT %s' % READ_THREAD_SQL)
+        params.append(user.pk)
     elif list_type == 'unread':
         # unread threads were read in past but have new posts
-        # after cutoff date
-        read_threads = user.threadread_set.filter(
-            category__in=categories,
-            thread__last_post_on__gt=cutoff_date,
-            last_read_on__lt=F('thread__last_post_on'),
-        ).values('thread_id')
-
-        queryset = queryset.filter(id__in=read_threads)
-
-        # unread threads have last reply after read/cutoff date
-        if categories_dict:
-            conditions = None
-
-            for category_id, category_cutoff in categories_dict.items():
-                condition = Q(
-                    category_id=category_id,
-                    last_post_on__lte=category_cutoff,
-                )
-                if conditions:
-                    conditions = conditions | condition
-                else:
-                    conditions = condition
+        conditions.append(UNREAD_THREAD_SQL)
+        params.append(user.pk)
 
-            return queryset.exclude(conditions)
-        else:
-            return queryset
+    return queryset.extra(where=conditions, params=params)
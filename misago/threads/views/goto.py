@@ -1,5 +1,3 @@
-from math import ceil
-
 from django.core.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404, redirect
 from django.utils.translation import ugettext as _
@@ -7,6 +5,8 @@ from django.views.generic import View
 
 from misago.conf import settings
 from misago.threads.permissions import exclude_invisible_posts
+from misago.threads.postspages import (
+    get_own_posts_page, get_post_page, get_posts_pages, get_posts_visibility)
 from misago.threads.viewmodels import ForumThread, PrivateThread
 
 
@@ -21,7 +21,7 @@ class GotoView(View):
         posts_queryset = exclude_invisible_posts(request.user, thread.category, thread.post_set)
 
         target_post = self.get_target_post(thread, posts_queryset.order_by('id'), **kwargs)
-        target_page = self.compute_post_page(target_post, posts_queryset)
+        target_page = self.compute_post_page(request, thread, target_post, posts_queryset)
 
         return self.get_redirect(thread, target_post, target_page)
 
@@ -34,35 +34,19 @@ class GotoView(View):
     def get_target_post(self, thread, posts_queryset):
         raise NotImplementedError("goto views should define their own get_target_post method")
 
-    def compute_post_page(self, target_post, posts_queryset):
-        # filter out events
-        posts_queryset = posts_queryset.filter(is_event=False)
-
-        thread_len = posts_queryset.count()
-        if thread_len <= settings.MISAGO_POSTS_PER_PAGE + settings.MISAGO_POSTS_TAIL:
-            return 1  # no chance for post to be on other page than only page
-
-        # compute total count of thread pages
-        hits = max(1, thread_len - settings.MISAGO_POSTS_TAIL)
-        hits += int(ceil(hits / float(settings.MISAGO_POSTS_PER_PAGE)))
-        thread_pages = int(ceil(hits / float(settings.MISAGO_POSTS_PER_PAGE)))
-
-        # is target an event?
-        if target_post.is_event:
-            target_event = target_post
-            previous_posts = posts_queryset.filter(pk__lt=target_event.pk)
-            target_post = previous_posts.order_by('id').last()
+    def compute_post_page(self, request, thread, target_post, posts_queryset):
+        per_page = settings.MISAGO_POSTS_PER_PAGE
+        orphans = settings.MISAGO_POSTS_TAIL
 
-        # resolve post's page
-        post_offset = posts_queryset.filter(pk__lte=target_post.pk).count()
-        hits = max(1, post_offset)
-        hits += int(ceil(hits / float(settings.MISAGO_POSTS_PER_PAGE)))
-        post_page = int(ceil(hits / float(settings.MISAGO_POSTS_PER_PAGE)))
+        visibility = get_posts_visibility(request.user, thread)
+        if not visibility:
+            # user may see their own unapproved posts, so thread has pages just for them
+            return get_own_posts_page(thread, request.user, target_post.pk, per_page, orphans)
 
-        if post_page > thread_pages:
-            post_page = thread_pages
+        pages = get_posts_pages(thread, visibility, per_page)
 
-        return post_page
+        # events are displayed on page of post preceding them
+        return get_post_page(pages, target_post.pk, per_page, orphans)
 
     def get_redirect(self, thread, target_post, target_page):
         thread_url = thread.thread_type.get_thread_absolute_url(thread, target_page)
@@ -12,7 +12,7 @@ from django.shortcuts import get_object_or_404
 from django.utils.translation import ugettext as _
 
 from misago.acl import add_acl
-from misago.categories.models import Category
+from misago.categories.synchronization import synchronize_categories
 from misago.core.rest_permissions import IsAuthenticatedOrReadOnly
 from misago.core.shortcuts import get_int_or_404
 from misago.threads.moderation import hide_post, hide_thread
@@ -217,10 +217,7 @@ class UserViewSet(viewsets.GenericViewSet):
                         post.thread.synchronize()
                         post.thread.save()
 
-                    categories = Category.objects.filter(id__in=categories_to_sync)
-                    for category in categories.iterator():
-                        category.synchronize()
-                        category.save()
+                    synchronize_categories(categories_to_sync)
 
                 profile.delete()
 
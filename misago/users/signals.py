@@ -1,5 +1,11 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import Signal, receiver
 
+from misago.core.counts import invalidate_counts
+
+
+UserModel = get_user_model()
 
 delete_user_content = Signal()
 username_changed = Signal()
@@ -8,3 +14,18 @@ username_changed = Signal()
 @receiver(username_changed)
 def handle_name_change(sender, **kwargs):
     sender.user_renames.update(changed_by_username=sender.username)
+
+
+# user fields that decide which lists user is counted on
+USERS_COUNTS_FIELDS = ('rank', 'rank_id', 'is_active', 'slug')
+
+
+@receiver(post_save, sender=UserModel)
+@receiver(post_delete, sender=UserModel)
+@receiver(m2m_changed, sender=UserModel.follows.through)
+def invalidate_users_counts(sender, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not set(update_fields).intersection(USERS_COUNTS_FIELDS):
+        return
+
+    invalidate_counts('users')
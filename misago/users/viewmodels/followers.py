@@ -1,6 +1,7 @@
 from django.http import Http404
 
 from misago.conf import settings
+from misago.core.counts import cached_count_paginator
 from misago.core.shortcuts import paginate, pagination_dict
 from misago.users.online.utils import make_users_status_aware
 from misago.users.serializers import UserCardSerializer
@@ -20,7 +21,13 @@ class Followers(object):
             else:
                 raise Http404()
 
-        list_page = paginate(queryset, page, settings.MISAGO_USERS_PER_PAGE, 4)
+        list_page = paginate(
+            queryset,
+            page,
+            settings.MISAGO_USERS_PER_PAGE,
+            4,
+            paginator=cached_count_paginator('users'),
+        )
         make_users_status_aware(request.user, list_page.object_list)
 
         self.users = list_page.object_list
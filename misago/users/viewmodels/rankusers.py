@@ -1,4 +1,5 @@
 from misago.conf import settings
+from misago.core.counts import cached_count_paginator
 from misago.core.shortcuts import paginate, pagination_dict
 from misago.users.online.utils import make_users_status_aware
 from misago.users.serializers import UserCardSerializer
@@ -15,7 +16,13 @@ class RankUsers(object):
         if not request.user.is_staff:
             queryset = queryset.filter(is_active=True)
 
-        list_page = paginate(queryset, page, settings.MISAGO_USERS_PER_PAGE, 4)
+        list_page = paginate(
+            queryset,
+            page,
+            settings.MISAGO_USERS_PER_PAGE,
+            4,
+            paginator=cached_count_paginator('users'),
+        )
         make_users_status_aware(request.user, list_page.object_list)
 
         self.users = list_page.object_list
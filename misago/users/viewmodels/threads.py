@@ -1,5 +1,6 @@
 from misago.acl import add_acl
 from misago.conf import settings
+from misago.core.counts import cached_count_paginator
 from misago.core.shortcuts import paginate, pagination_dict
 from misago.readtracker import threadstracker
 from misago.threads.permissions import exclude_invisible_threads
@@ -22,7 +23,12 @@ class UserThreads(object):
         ).order_by('-id')
 
         list_page = paginate(
-            posts_queryset, page, settings.MISAGO_POSTS_PER_PAGE, settings.MISAGO_POSTS_TAIL
+            posts_queryset,
+            page,
+            settings.MISAGO_POSTS_PER_PAGE,
+            settings.MISAGO_POSTS_TAIL,
+            paginator=cached_count_paginator(
+                'threads', [category.pk for category in threads_categories]),
         )
         paginator = pagination_dict(list_page)
 
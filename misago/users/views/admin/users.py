@@ -7,7 +7,7 @@ from django.utils.translation import ugettext_lazy as _
 
 from misago.admin.auth import start_admin_session
 from misago.admin.views import generic
-from misago.categories.models import Category
+from misago.categories.synchronization import synchronize_categories
 from misago.conf import settings
 from misago.core.mail import mail_users
 from misago.core.pgutils import batch_update
@@ -339,9 +339,7 @@ class DeleteThreadsStep(DeletionStep):
                 deleted_threads += 1
 
         if recount_categories:
-            for category in Category.objects.filter(id__in=recount_categories):
-                category.synchronize()
-                category.save()
+            synchronize_categories(recount_categories)
         else:
             is_completed = True
 
@@ -372,9 +370,7 @@ class DeletePostsStep(DeletionStep):
                 thread.synchronize()
                 thread.save()
 
-            for category in Category.objects.filter(id__in=recount_categories):
-                category.synchronize()
-                category.save()
+            synchronize_categories(recount_categories)
         else:
             is_completed = True
 